@@ -0,0 +1,90 @@
+"""AAFCO evaluation throughput: the previous per-plan getattr loop versus the
+compiled profile evaluated over a whole batch.
+
+    python benchmarks/aafco_batch.py --vectors 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.aafco import AAFCO_STANDARDS, COMPILED_PROFILES, evaluate_aafco_batch  # noqa: E402
+from dog_meal_planner.models import NUTRIENT_FIELDS, Nutrients  # noqa: E402
+
+
+def legacy_evaluate(nutrients, standards):
+    warnings = {}
+    for field, standard in standards.items():
+        value = getattr(nutrients, field)
+        if value < standard.minimum:
+            warnings[field] = (
+                f"{standard.name} below minimum: {value:.2f}{standard.units} "
+                f"< {standard.minimum}{standard.units}"
+            )
+    return warnings
+
+
+def build_vectors(count: int, violation_rate: float):
+    rng = random.Random(3)
+    healthy = {
+        "kcal": 1000.0,
+        "protein_g": 70.0,
+        "fat_g": 30.0,
+        "carbs_g": 80.0,
+        "calcium_mg": 2000.0,
+        "phosphorus_mg": 1500.0,
+        "iron_mg": 15.0,
+        "zinc_mg": 30.0,
+        "vitamin_a_iu": 3000.0,
+        "vitamin_d_iu": 300.0,
+        "vitamin_e_mg": 30.0,
+    }
+    nutrients = []
+    for _ in range(count):
+        values = dict(healthy)
+        if rng.random() < violation_rate:
+            values[rng.choice(NUTRIENT_FIELDS[1:])] = 0.0
+        nutrients.append(Nutrients(**values))
+    return nutrients
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=500_000)
+    parser.add_argument("--violation-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    nutrients = build_vectors(args.vectors, args.violation_rate)
+    legacy_standards = {field: standard for field, standard in AAFCO_STANDARDS.items()}
+
+    started = time.perf_counter()
+    for item in nutrients:
+        legacy_evaluate(item, legacy_standards)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectors = [item.to_tuple() for item in nutrients]
+    convert_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    evaluate_aafco_batch(vectors, COMPILED_PROFILES["adult_maintenance"])
+    compiled_seconds = time.perf_counter() - started
+
+    rows = (
+        ("legacy (minimums only)", legacy_seconds),
+        ("to_tuple conversion", convert_seconds),
+        ("compiled (min/max/Ca:P)", compiled_seconds),
+        ("compiled incl. conversion", convert_seconds + compiled_seconds),
+    )
+    print(f"{'engine':>26} {'seconds':>9} {'vectors/s':>12}")
+    for label, seconds in rows:
+        print(f"{label:>26} {seconds:>9.2f} {args.vectors / seconds:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Request latency while the database is being backed up.
+
+The server is seeded with saved plans, then clients read and update plans
+while the backup CLI runs back to back in a separate process. Each phase
+reports read and write latency alongside how long each backup took: no
+backup, the CLI defaults (small steps with a pause between them, at lowered
+CPU priority), the same at normal priority, the whole copy in a single step,
+and incremental backups.
+
+    python benchmarks/backup_latency.py --plans 30000 --clients 4 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from load_test import ROOT_DIR, free_port, percentile, wait_for_health
+
+PHASES: Dict[str, Optional[List[str]]] = {
+    "no backup": None,
+    "stepped": [],
+    "nice 0": ["--nice", "0"],
+    "one step": ["--step-pages", "-1", "--pause", "0"],
+    "incremental": ["--incremental"],
+}
+
+
+def seed(db_path: Path, plans: int) -> None:
+    env = dict(os.environ, DOG_MEAL_PLANNER_DB=str(db_path))
+    env["PYTHONPATH"] = str(ROOT_DIR / "src")
+    subprocess.run([sys.executable, "-c", "from dog_meal_planner.storage import init_db; init_db()"], env=env, check=True)
+    rng = random.Random(11)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO plans (name, payload) VALUES (?, ?)",
+        (
+            (
+                f"seed {index}",
+                json.dumps(
+                    {
+                        "fields": {"dog-weight": f"{rng.uniform(3, 60):.1f}", "mer-factor": "neutered_adult"},
+                        "recipeItems": [{"name": f"item {item}", "grams": rng.random()} for item in range(40)],
+                    }
+                ),
+            )
+            for index in range(plans)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def client_loop(args: Tuple[int, float, int, int]) -> List[Tuple[str, float, int]]:
+    port, duration, plans, seed_value = args
+    rng = random.Random(seed_value)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    samples: List[Tuple[str, float, int]] = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        plan_id = rng.randint(1, plans)
+        if rng.random() < 0.2:
+            kind, method = "write", "PUT"
+            body = json.dumps({"name": f"seed {plan_id - 1}", "payload": {"fields": {"dog-weight": str(rng.uniform(3, 60))}}})
+        else:
+            kind, method, body = "read", "GET", None
+        started = time.perf_counter()
+        conn.request(method, f"/plans/{plan_id}", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        samples.append((kind, time.perf_counter() - started, response.status))
+    conn.close()
+    return samples
+
+
+def backup_loop(options: List[str], env: Dict[str, str], stop: threading.Event, durations: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "dog_meal_planner.backup", "create", *options],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        durations.append(time.perf_counter() - started)
+
+
+def run_phase(port: int, env: Dict[str, str], options: Optional[List[str]], args: argparse.Namespace) -> Dict[str, float]:
+    stop = threading.Event()
+    durations: List[float] = []
+    backups = threading.Thread(target=backup_loop, args=(options, env, stop, durations)) if options is not None else None
+    if backups:
+        backups.start()
+    with ProcessPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(client_loop, [(port, args.duration, args.plans, index) for index in range(args.clients)]))
+    stop.set()
+    if backups:
+        backups.join()
+    samples = [sample for result in results for sample in result]
+    row: Dict[str, float] = {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, status in samples if status >= 400),
+        "backups": len(durations),
+        "backup_s": sum(durations) / len(durations) if durations else 0.0,
+    }
+    for kind in ("read", "write"):
+        latencies = [latency for sample_kind, latency, _ in samples if sample_kind == kind]
+        row[f"{kind}_p50_ms"] = percentile(latencies, 0.50) * 1000
+        row[f"{kind}_p99_ms"] = percentile(latencies, 0.99) * 1000
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=30_000)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "backup.db"
+        seed(db_path, args.plans)
+        print(f"database: {db_path.stat().st_size / 2**20:.0f} MiB, {args.plans} plans")
+        env = dict(os.environ, DOG_MEAL_PLANNER_DB=str(db_path), DOG_MEAL_PLANNER_BACKUP_DIR=str(Path(tmp) / "backups"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR / "src"), env.get("PYTHONPATH")]))
+        env["DOG_MEAL_PLANNER_JOBS"] = "0"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dog_meal_planner.server", "--port", str(port), "--workers", "1",
+             "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_for_health(port)
+            print(
+                f"{'phase':<12} {'requests':>9} {'errors':>7} {'read p50':>9} {'read p99':>9} "
+                f"{'write p50':>10} {'write p99':>10} {'backups':>8} {'backup s':>9}"
+            )
+            for label, options in PHASES.items():
+                row = run_phase(port, env, options, args)
+                print(
+                    f"{label:<12} {row['requests']:>9} {row['errors']:>7} {row['read_p50_ms']:>9.2f} "
+                    f"{row['read_p99_ms']:>9.2f} {row['write_p50_ms']:>10.2f} {row['write_p99_ms']:>10.2f} "
+                    f"{row['backups']:>8} {row['backup_s']:>9.2f}"
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
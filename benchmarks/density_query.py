@@ -0,0 +1,117 @@
+"""Nutrient density range queries: R*Tree-backed search versus a full scan of
+the ingredients table on a synthetic catalog.
+
+    python benchmarks/density_query.py --ingredients 100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.density_index import DensityRange, search_by_density  # noqa: E402
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+
+COLUMNS = ("id", "name", "kcal_per_100g", "calcium_mg", "phosphorus_mg", "zinc_mg")
+QUERIES = {
+    "calcium band": [DensityRange("calcium_mg", 150.0, 152.0)],
+    "Ca high, P low": [DensityRange("calcium_mg", minimum=300.0), DensityRange("phosphorus_mg", maximum=80.0)],
+    "Ca/P box + zinc": [
+        DensityRange("calcium_mg", 150.0, 170.0),
+        DensityRange("phosphorus_mg", 90.0, 100.0),
+        DensityRange("zinc_mg", minimum=2.0),
+    ],
+    "wide Ca/P box": [DensityRange("calcium_mg", 100.0, 250.0), DensityRange("phosphorus_mg", 50.0, 150.0)],
+}
+
+
+def build_catalog(count: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    rng = random.Random(7)
+    conn.executemany(
+        """
+        INSERT INTO ingredients (
+            name, kcal_per_100g, protein_g, fat_g, carbs_g, calcium_mg, phosphorus_mg,
+            iron_mg, zinc_mg, vitamin_a_iu, vitamin_d_iu, vitamin_e_mg
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                f"ingredient {index}",
+                rng.uniform(20, 600),
+                rng.uniform(0, 40),
+                rng.uniform(0, 40),
+                rng.uniform(0, 80),
+                rng.uniform(0, 1000),
+                rng.uniform(0, 600),
+                rng.uniform(0, 10),
+                rng.uniform(0, 12),
+                rng.uniform(0, 5000),
+                rng.uniform(0, 200),
+                rng.uniform(0, 10),
+            )
+            for index in range(count)
+        ),
+    )
+    conn.commit()
+    return conn
+
+
+def full_scan(conn: sqlite3.Connection, ranges) -> list:
+    conditions, params = [], []
+    for item in ranges:
+        density = f"{item.field} * 100.0 / kcal_per_100g"
+        if item.minimum is not None:
+            conditions.append(f"{density} >= ?")
+            params.append(item.minimum)
+        if item.maximum is not None:
+            conditions.append(f"{density} <= ?")
+            params.append(item.maximum)
+    return conn.execute(
+        f"""
+        SELECT {', '.join(COLUMNS)} FROM ingredients
+        WHERE kcal_per_100g > 0 AND {' AND '.join(conditions)}
+        ORDER BY name LIMIT 100
+        """,
+        params,
+    ).fetchall()
+
+
+def median_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ingredients", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = build_catalog(args.ingredients)
+    print(f"{'query':>16} {'matches':>8} {'rtree ms':>9} {'scan ms':>9}")
+    for label, ranges in QUERIES.items():
+        matches = len(search_by_density(conn, ranges, COLUMNS, limit=args.ingredients))
+        assert [row["id"] for row in search_by_density(conn, ranges, COLUMNS)] == [
+            row["id"] for row in full_scan(conn, ranges)
+        ]
+        indexed = median_ms(lambda: search_by_density(conn, ranges, COLUMNS), args.repeat)
+        scanned = median_ms(lambda: full_scan(conn, ranges), args.repeat)
+        print(f"{label:>16} {matches:>8} {indexed:>9.2f} {scanned:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Throughput of the API under uvicorn with 1..N workers on one box.
+
+    python benchmarks/load_test.py --workers 1 2 4 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+PLAN_BODY = json.dumps(
+    {
+        "dog": {
+            "weight_kg": 20.0,
+            "target_weight_kg": 20.0,
+            "age_years": 3.0,
+            "sex": "male",
+            "neutered": True,
+            "activity": "moderate",
+        },
+        "mer_factor_key": "neutered_adult",
+        "kibble": {"name": "kibble", "kcal_per_100g": 350.0},
+        "kibble_grams": 100.0,
+        "treats_kcal": 50.0,
+        "recipe": {
+            "items": [
+                {
+                    "ingredient": {
+                        "name": f"ingredient {index}",
+                        "kcal_per_100g": 120.0 + index,
+                        "nutrients_per_100g": {"protein_g": 20.0, "fat_g": 5.0, "calcium_mg": 15.0},
+                    },
+                    "grams": 50.0,
+                }
+                for index in range(20)
+            ]
+        },
+    }
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_health(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not become healthy")
+
+
+def client_loop(args: Tuple[int, float, float]) -> List[Tuple[str, float, int]]:
+    port, duration, write_ratio = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    samples: List[Tuple[str, float, int]] = []
+    deadline = time.monotonic() + duration
+    counter = 0
+    while time.monotonic() < deadline:
+        counter += 1
+        if write_ratio and counter % int(1 / write_ratio) == 0:
+            route, method = "/ingredients", "POST"
+            body = json.dumps({"name": f"load {os.getpid()} {counter}", "kcal_per_100g": 100.0})
+        elif counter % 4 == 0:
+            route, method, body = "/ingredients", "GET", None
+        else:
+            route, method, body = "/compute-plan", "POST", PLAN_BODY
+        started = time.perf_counter()
+        conn.request(method, route, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        samples.append((f"{method} {route}", time.perf_counter() - started, response.status))
+    conn.close()
+    return samples
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run(workers: int, clients: int, duration: float, write_ratio: float) -> Dict[str, float]:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DOG_MEAL_PLANNER_DB=str(Path(tmp) / "load.db"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR / "src"), env.get("PYTHONPATH")]))
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "dog_meal_planner.server",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            env=env,
+        )
+        try:
+            wait_for_health(port)
+            with ProcessPoolExecutor(max_workers=clients) as pool:
+                results = list(pool.map(client_loop, [(port, duration, write_ratio)] * clients))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    samples = [sample for result in results for sample in result]
+    latencies = [latency for _, latency, _ in samples]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    return {
+        "workers": workers,
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / duration,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=(os.cpu_count() or 1) * 2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'requests':>9} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in args.workers:
+        row = run(workers, args.clients, args.duration, args.write_ratio)
+        print(
+            f"{row['workers']:>7} {row['requests']:>9} {row['errors']:>6} "
+            f"{row['rps']:>9.1f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
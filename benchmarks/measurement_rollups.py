@@ -0,0 +1,77 @@
+"""Weight and intake time series: batched daily ingest for many dogs, and MER
+trend latency from the weekly rollups as history grows past the raw window.
+
+    python benchmarks/measurement_rollups.py --dogs 1000 --days 540
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.measurements import MeasurementPoint, ingest_measurements, mer_trend  # noqa: E402
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+
+
+def trend_latency_ms(conn: sqlite3.Connection, dogs: int, today: date, samples: int = 200) -> float:
+    rng = random.Random(1)
+    timings = []
+    for _ in range(samples):
+        dog_id = rng.randint(1, dogs)
+        started = time.perf_counter()
+        mer_trend(conn, dog_id, None, 8, today)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dogs", type=int, default=1_000)
+    parser.add_argument("--days", type=int, default=540)
+    parser.add_argument("--db", type=Path, help="file database to use instead of memory")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db or ":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO dogs (id, name, weight_kg, age_years, sex, neutered, activity) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((index, f"dog {index}", 20.0, 4.0, "female", 1, "moderate") for index in range(1, args.dogs + 1)),
+    )
+    rng = random.Random(5)
+    weights = {dog_id: rng.uniform(4, 45) for dog_id in range(1, args.dogs + 1)}
+    start = date(2025, 1, 1)
+    checkpoints = {30, 180, args.days}
+    ingest_seconds = 0.0
+    total = 0
+
+    print(f"{'day':>5} {'points':>10} {'raw rows':>10} {'rollup rows':>12} {'ingest pts/s':>13} {'trend ms':>9}")
+    for offset in range(args.days):
+        today = start + timedelta(days=offset)
+        batch = []
+        for dog_id, weight in weights.items():
+            weights[dog_id] = weight * rng.gauss(1.0, 0.002)
+            batch.append(MeasurementPoint(dog_id, today, round(weights[dog_id], 2), round(rng.gauss(900, 80), 1)))
+        started = time.perf_counter()
+        ingest_measurements(conn, batch, today)
+        conn.commit()
+        ingest_seconds += time.perf_counter() - started
+        total += len(batch)
+        if offset + 1 in checkpoints:
+            raw = conn.execute("SELECT count(*) FROM dog_measurements").fetchone()[0]
+            rollups = conn.execute("SELECT count(*) FROM dog_measurement_rollups").fetchone()[0]
+            print(
+                f"{offset + 1:>5} {total:>10} {raw:>10} {rollups:>12} "
+                f"{total / ingest_seconds:>13.0f} {trend_latency_ms(conn, args.dogs, today):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Latency of cheap and expensive routes when /compute-plan is overloaded,
+with admission control on and off.
+
+Heavy clients post plans back to back, far more of them than the server can
+serve at once. Light clients poll /health and /rer alongside them. With
+admission control, the extra heavy requests get a 503 with Retry-After after
+a bounded wait, and the cheap routes stay fast.
+
+    python benchmarks/overload_test.py --heavy-clients 32 --light-clients 4 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from load_test import PLAN_BODY, ROOT_DIR, free_port, percentile, wait_for_health
+
+ROUTES = {
+    "heavy": [("POST", "/compute-plan", PLAN_BODY)],
+    "light": [("GET", "/health", None), ("GET", "/rer?weight=20", None)],
+}
+
+
+@contextmanager
+def serve(admission: bool) -> Iterator[int]:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DOG_MEAL_PLANNER_DB=str(Path(tmp) / "overload.db"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR / "src"), env.get("PYTHONPATH")]))
+        env["DOG_MEAL_PLANNER_ADMISSION"] = "1" if admission else "0"
+        env["DOG_MEAL_PLANNER_JOBS"] = "0"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dog_meal_planner.server", "--port", str(port), "--workers", "1",
+             "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_for_health(port)
+            yield port
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def client_loop(args: Tuple[int, str, float]) -> List[Tuple[str, float, int]]:
+    port, kind, duration = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    samples: List[Tuple[str, float, int]] = []
+    deadline = time.monotonic() + duration
+    counter = 0
+    while time.monotonic() < deadline:
+        method, route, body = ROUTES[kind][counter % len(ROUTES[kind])]
+        counter += 1
+        started = time.perf_counter()
+        conn.request(method, route, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        samples.append((kind, time.perf_counter() - started, response.status))
+        if response.status == 503:
+            # Well-behaved clients back off; a short pause keeps the overload sustained.
+            time.sleep(0.05)
+    conn.close()
+    return samples
+
+
+def run(admission: bool, heavy: int, light: int, duration: float) -> Dict[str, Dict[str, float]]:
+    jobs = [("heavy", heavy), ("light", light)]
+    with serve(admission) as port:
+        with ProcessPoolExecutor(max_workers=heavy + light) as pool:
+            results = list(
+                pool.map(client_loop, [(port, kind, duration) for kind, count in jobs for _ in range(count)])
+            )
+    samples = [sample for result in results for sample in result]
+    report = {}
+    for kind, _ in jobs:
+        served = [latency for name, latency, status in samples if name == kind and status < 500]
+        shed = sum(1 for name, _, status in samples if name == kind and status == 503)
+        report[kind] = {
+            "ok": len(served),
+            "shed": shed,
+            "p50_ms": percentile(served, 0.50) * 1000 if served else float("nan"),
+            "p99_ms": percentile(served, 0.99) * 1000 if served else float("nan"),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--heavy-clients", type=int, default=32)
+    parser.add_argument("--light-clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'admission':>9} {'routes':>6} {'ok':>7} {'503s':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for admission in (False, True):
+        report = run(admission, args.heavy_clients, args.light_clients, args.duration)
+        for kind, row in report.items():
+            print(
+                f"{'on' if admission else 'off':>9} {kind:>6} {row['ok']:>7} {row['shed']:>6} "
+                f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
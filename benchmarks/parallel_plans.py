@@ -0,0 +1,96 @@
+"""Scaling of compute_meal_plans_parallel from 1 to N worker processes.
+
+    python benchmarks/parallel_plans.py --plans 200000 --max-workers 16
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.models import Dog, Ingredient, Nutrients, Recipe, RecipeItem  # noqa: E402
+from dog_meal_planner.nutrition import (  # noqa: E402
+    MER_FACTORS,
+    PlanInput,
+    compute_meal_plans_parallel,
+)
+
+
+def build_catalog(recipe_count: int, items_per_recipe: int):
+    ingredients = [
+        Ingredient(
+            name=f"ingredient {index}",
+            kcal_per_100g=100.0 + index % 300,
+            nutrients_per_100g=Nutrients(
+                protein_g=10.0 + index % 20,
+                fat_g=2.0 + index % 10,
+                calcium_mg=5.0 + index % 50,
+                phosphorus_mg=100.0 + index % 80,
+            ),
+        )
+        for index in range(recipe_count * items_per_recipe)
+    ]
+    recipes = {
+        recipe_id: Recipe(
+            items=[
+                RecipeItem(ingredient=ingredients[recipe_id * items_per_recipe + offset], grams=40.0)
+                for offset in range(items_per_recipe)
+            ]
+        )
+        for recipe_id in range(recipe_count)
+    }
+    kibbles = {"kibble": Ingredient(name="kibble", kcal_per_100g=360.0)}
+    return kibbles, recipes
+
+
+def build_inputs(count: int, recipe_count: int):
+    factors = list(MER_FACTORS.values())
+    return [
+        PlanInput(
+            dog=Dog(
+                weight_kg=3.0 + index % 50,
+                target_weight_kg=None,
+                age_years=1.0 + index % 12,
+                sex="female" if index % 2 else "male",
+                neutered=bool(index % 3),
+                activity="moderate",
+            ),
+            mer_factor=factors[index % len(factors)],
+            kibble_key="kibble",
+            kibble_grams=float(index % 150),
+            treats_kcal=float(index % 60),
+            recipe_key=index % recipe_count,
+        )
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=50_000)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--items", type=int, default=12)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    kibbles, recipes = build_catalog(args.recipes, args.items)
+    inputs = build_inputs(args.plans, args.recipes)
+    worker_counts = sorted({1, *[2**power for power in range(1, 8) if 2**power < args.max_workers], args.max_workers})
+
+    baseline = None
+    print(f"{'workers':>7} {'seconds':>9} {'plans/s':>10} {'speedup':>8}")
+    for workers in worker_counts:
+        started = time.perf_counter()
+        plans = compute_meal_plans_parallel(inputs, kibbles, recipes, workers=workers)
+        elapsed = time.perf_counter() - started
+        assert len(plans) == len(inputs)
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>9.2f} {len(inputs) / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
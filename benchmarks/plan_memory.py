@@ -0,0 +1,213 @@
+"""Resident memory of N in-memory plans: dict-backed, per-item objects (the
+previous model layout) versus slotted models with interned ingredients.
+
+    python benchmarks/plan_memory.py --plans 100000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import resource
+import subprocess
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner import models  # noqa: E402
+from dog_meal_planner.nutrition import MER_FACTORS, compute_meal_plan  # noqa: E402
+
+
+@dataclass(frozen=True)
+class LegacyNutrients:
+    kcal: float = 0.0
+    protein_g: float = 0.0
+    fat_g: float = 0.0
+    carbs_g: float = 0.0
+    calcium_mg: float = 0.0
+    phosphorus_mg: float = 0.0
+    iron_mg: float = 0.0
+    zinc_mg: float = 0.0
+    vitamin_a_iu: float = 0.0
+    vitamin_d_iu: float = 0.0
+    vitamin_e_mg: float = 0.0
+
+
+@dataclass(frozen=True)
+class LegacyIngredient:
+    name: str
+    kcal_per_100g: float
+    nutrients_per_100g: LegacyNutrients = field(default_factory=LegacyNutrients)
+
+
+@dataclass(frozen=True)
+class LegacyRecipeItem:
+    ingredient: LegacyIngredient
+    grams: float
+
+
+@dataclass(frozen=True)
+class LegacyRecipe:
+    items: List[LegacyRecipeItem]
+
+
+@dataclass(frozen=True)
+class LegacyDog:
+    weight_kg: float
+    target_weight_kg: Optional[float]
+    age_years: float
+    sex: str
+    neutered: bool
+    activity: str
+
+
+@dataclass(frozen=True)
+class LegacyMealPlan:
+    target_kcal: float
+    kibble_kcal: float
+    treats_kcal: float
+    homemade_kcal_budget: float
+    total_kcal: float
+    nutrients_total: LegacyNutrients
+    nutrients_per_1000_kcal: LegacyNutrients
+    aafco_warnings: Dict[str, str]
+    per_meal_grams: Dict[str, float]
+
+
+def catalog(size: int) -> List[dict]:
+    rng = random.Random(7)
+    return [
+        {
+            "name": f"ingredient {index}",
+            "kcal_per_100g": float(rng.randint(50, 400)),
+            "nutrients_per_100g": {
+                name: float(rng.randint(0, 200)) for name in models.NUTRIENT_FIELDS if name != "kcal"
+            },
+        }
+        for index in range(size)
+    ]
+
+
+def plan_requests(count: int, ingredients: List[dict], items: int):
+    rng = random.Random(11)
+    for index in range(count):
+        yield (
+            {
+                "weight_kg": 3.0 + index % 50,
+                "target_weight_kg": None,
+                "age_years": 1.0 + index % 12,
+                "sex": "female" if index % 2 else "male",
+                "neutered": True,
+                "activity": "moderate",
+            },
+            [(rng.choice(ingredients), float(rng.randint(20, 200))) for _ in range(items)],
+        )
+
+
+def build_compact(count: int, ingredients: List[dict], items: int) -> list:
+    kibble = models.intern_ingredient("kibble", 360.0, {})
+    plans = []
+    for dog_data, recipe_data in plan_requests(count, ingredients, items):
+        recipe = models.Recipe(
+            items=[
+                models.RecipeItem(
+                    ingredient=models.intern_ingredient(
+                        data["name"], data["kcal_per_100g"], data["nutrients_per_100g"]
+                    ),
+                    grams=grams,
+                )
+                for data, grams in recipe_data
+            ]
+        )
+        dog = models.Dog(**dog_data)
+        plan = compute_meal_plan(dog, MER_FACTORS["neutered_adult"], kibble, 50.0, 20.0, recipe)
+        plans.append((dog, recipe, plan))
+    return plans
+
+
+def build_legacy(count: int, ingredients: List[dict], items: int) -> list:
+    kibble = models.Ingredient(name="kibble", kcal_per_100g=360.0)
+    plans = []
+    for dog_data, recipe_data in plan_requests(count, ingredients, items):
+        legacy_items = []
+        model_items = []
+        for data, grams in recipe_data:
+            nutrients = LegacyNutrients(**data["nutrients_per_100g"])
+            legacy_items.append(
+                LegacyRecipeItem(LegacyIngredient(data["name"], data["kcal_per_100g"], nutrients), grams)
+            )
+            model_items.append(
+                models.RecipeItem(
+                    models.Ingredient(
+                        data["name"], data["kcal_per_100g"], models.Nutrients(**data["nutrients_per_100g"])
+                    ),
+                    grams,
+                )
+            )
+        plan = compute_meal_plan(
+            models.Dog(**dog_data), MER_FACTORS["neutered_adult"], kibble, 50.0, 20.0, models.Recipe(model_items)
+        )
+        legacy_plan = LegacyMealPlan(
+            target_kcal=plan.target_kcal,
+            kibble_kcal=plan.kibble_kcal,
+            treats_kcal=plan.treats_kcal,
+            homemade_kcal_budget=plan.homemade_kcal_budget,
+            total_kcal=plan.total_kcal,
+            nutrients_total=LegacyNutrients(**plan.nutrients_total.to_dict()),
+            nutrients_per_1000_kcal=LegacyNutrients(**plan.nutrients_per_1000_kcal.to_dict()),
+            aafco_warnings=plan.aafco_warnings,
+            per_meal_grams=plan.per_meal_grams,
+        )
+        plans.append((LegacyDog(**dog_data), LegacyRecipe(legacy_items), legacy_plan))
+    return plans
+
+
+def measure(mode: str, count: int, catalog_size: int, items: int) -> None:
+    ingredients = catalog(catalog_size)
+    gc.collect()
+    tracemalloc.start()
+    builder = build_compact if mode == "compact" else build_legacy
+    plans = builder(count, ingredients, items)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:>8} {len(plans):>8} {retained / 2**20:>12.1f} {max_rss_mb:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=100_000)
+    parser.add_argument("--catalog", type=int, default=300)
+    parser.add_argument("--items", type=int, default=8)
+    parser.add_argument("--mode", choices=["legacy", "compact"])
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.plans, args.catalog, args.items)
+        return
+    print(f"{'mode':>8} {'plans':>8} {'retained MB':>12} {'max RSS MB':>12}")
+    for mode in ("legacy", "compact"):
+        subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--mode",
+                mode,
+                "--plans",
+                str(args.plans),
+                "--catalog",
+                str(args.catalog),
+                "--items",
+                str(args.items),
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Saved plan search: filtering many plans by dog weight, MER factor, total
+kcal and AAFCO warnings with the indexed generated columns, against loading
+every payload and filtering it in Python.
+
+    python benchmarks/plan_search.py --plans 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.nutrition import MER_FACTORS  # noqa: E402
+from dog_meal_planner.plan_search import PlanFilters, aafco_warning_count, search_plans  # noqa: E402
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+
+NUTRIENTS = ("calcium_mg", "phosphorus_mg", "zinc_mg", "vitamin_d_iu", "copper_mg")
+
+QUERIES = {
+    "weight band": PlanFilters(min_dog_weight_kg=20, max_dog_weight_kg=22),
+    "factor + kcal": PlanFilters(mer_factor_key="weight_loss", min_total_kcal=1400),
+    "warnings": PlanFilters(min_aafco_warnings=4),
+}
+
+
+def payload(rng: random.Random) -> Dict[str, Any]:
+    unit = rng.choice(("kg", "lb"))
+    weight = rng.uniform(3, 60) * (2.20462 if unit == "lb" else 1)
+    warnings = {name: f"{name} below AAFCO minimum" for name in rng.sample(NUTRIENTS, rng.randint(0, 5))}
+    return {
+        "fields": {"dog-weight": f"{weight:.1f}", "weight-unit": unit, "mer-factor": rng.choice(list(MER_FACTORS))},
+        "recipeItems": [{"name": f"item {index}", "grams": rng.uniform(10, 300)} for index in range(rng.randint(2, 8))],
+        "result": {"total_kcal": rng.uniform(200, 2500), "aafco_warnings": warnings},
+    }
+
+
+def python_scan(conn: sqlite3.Connection, filters: PlanFilters) -> List[int]:
+    matches = []
+    for row in conn.execute("SELECT id, payload FROM plans"):
+        data = json.loads(row["payload"])
+        fields = data.get("fields", {})
+        weight = float(fields["dog-weight"]) * (0.45359237 if fields.get("weight-unit") == "lb" else 1.0)
+        result = data.get("result", {})
+        checks = (
+            (filters.min_dog_weight_kg, weight, lambda bound, value: value >= bound),
+            (filters.max_dog_weight_kg, weight, lambda bound, value: value <= bound),
+            (filters.mer_factor_key, fields.get("mer-factor"), lambda bound, value: value == bound),
+            (filters.min_total_kcal, result.get("total_kcal"), lambda bound, value: value >= bound),
+            (filters.min_aafco_warnings, len(result.get("aafco_warnings", {})), lambda bound, value: value >= bound),
+        )
+        if all(bound is None or check(bound, value) for bound, value, check in checks):
+            matches.append(row["id"])
+    return matches
+
+
+def median_ms(run: Callable[[], Any], samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    rng = random.Random(3)
+    started = time.perf_counter()
+    plans = [payload(rng) for _ in range(args.plans)]
+    conn.executemany(
+        "INSERT INTO plans (name, payload, aafco_warning_count) VALUES (?, ?, ?)",
+        ((f"plan {index}", json.dumps(plan), aafco_warning_count(plan)) for index, plan in enumerate(plans)),
+    )
+    conn.commit()
+    print(f"inserted {args.plans} plans in {time.perf_counter() - started:.2f}s")
+
+    print(f"{'query':<15} {'matches':>8} {'scan ms':>9} {'indexed ms':>11} {'speedup':>8}")
+    for label, filters in QUERIES.items():
+        indexed = {row["id"] for row in search_plans(conn, filters, "total_kcal", args.plans)}
+        scanned = python_scan(conn, filters)
+        # Rounding in the stored weight text can move a plan across a band edge.
+        assert len(indexed.symmetric_difference(scanned)) <= len(scanned) // 100 + 1, label
+        scan = median_ms(lambda: python_scan(conn, filters), max(3, args.samples // 5))
+        search = median_ms(lambda: search_plans(conn, filters, "total_kcal", args.plans), args.samples)
+        print(f"{label:<15} {len(indexed):>8} {scan:>9.1f} {search:>11.2f} {scan / search:>7.0f}x")
+
+    where, params = QUERIES["weight band"].where()
+    print("\nEXPLAIN QUERY PLAN (weight band):")
+    for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM plans WHERE {where} ORDER BY total_kcal", params):
+        print(f"  {row['detail']}")
+
+
+if __name__ == "__main__":
+    main()
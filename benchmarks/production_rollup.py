@@ -0,0 +1,119 @@
+"""Kitchen production rollup: summing every plan in Python versus the
+SQL-side rollup, with full and incremental refreshes of the plan lines.
+
+    python benchmarks/production_rollup.py --plans 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.production import (  # noqa: E402
+    plan_lines,
+    production_rollup,
+    refresh_production_lines,
+)
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+
+
+def build_database(plans: int, ingredients: int, recipes: int) -> sqlite3.Connection:
+    rng = random.Random(4)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO ingredients (id, name, kcal_per_100g) VALUES (?, ?, ?)",
+        ((index, f"ingredient {index}", rng.uniform(50, 400)) for index in range(1, ingredients + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO recipes (id, name) VALUES (?, ?)",
+        ((index, f"recipe {index}") for index in range(1, recipes + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO recipe_items (recipe_id, ingredient_id, grams) VALUES (?, ?, ?)",
+        (
+            (recipe, rng.randint(1, ingredients), rng.uniform(20, 300))
+            for recipe in range(1, recipes + 1)
+            for _ in range(5)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO plans (name, payload) VALUES (?, ?)",
+        ((f"plan {index}", json.dumps(random_plan(rng, ingredients, recipes))) for index in range(plans)),
+    )
+    conn.commit()
+    return conn
+
+
+def random_plan(rng: random.Random, ingredients: int, recipes: int) -> dict:
+    meals = rng.choice((["breakfast", "dinner"], ["breakfast", "lunch", "dinner"]))
+    if rng.random() < 0.5:
+        return {"recipe_id": rng.randint(1, recipes), "meals": meals}
+    items = [{"ingredient_id": rng.randint(1, ingredients), "grams": rng.uniform(20, 300)} for _ in range(5)]
+    return {"recipe": {"items": items}, "meals": meals}
+
+
+def python_rollup(conn: sqlite3.Connection) -> dict:
+    # What a client does today: load every plan and its recipe, then sum.
+    totals: dict = defaultdict(float)
+    for row in conn.execute("SELECT id, payload FROM plans").fetchall():
+        for _, meals_json, recipe_id, ingredient_id, _, grams in plan_lines(row["id"], json.loads(row["payload"])):
+            meals = json.loads(meals_json)
+            if recipe_id is None:
+                items = [(ingredient_id, grams)]
+            else:
+                items = conn.execute(
+                    "SELECT ingredient_id, grams FROM recipe_items WHERE recipe_id = ?", (recipe_id,)
+                ).fetchall()
+            for item_ingredient_id, item_grams in items:
+                for meal in meals:
+                    totals[item_ingredient_id, meal] += item_grams / len(meals)
+    return totals
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=20_000)
+    parser.add_argument("--ingredients", type=int, default=2_000)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    conn = build_database(args.plans, args.ingredients, args.recipes)
+    legacy, legacy_ms = timed(lambda: python_rollup(conn))
+    _, full_ms = timed(lambda: refresh_production_lines(conn, full=True))
+    rollup, rollup_ms = timed(lambda: production_rollup(conn))
+    expected = sum(legacy.values())
+    assert abs(rollup["total_grams_per_day"] - expected) < 1e-6 * expected
+
+    rng = random.Random(9)
+    for _ in range(args.edits):
+        conn.execute(
+            "UPDATE plans SET payload = ? WHERE id = ?",
+            (json.dumps(random_plan(rng, args.ingredients, args.recipes)), rng.randint(1, args.plans)),
+        )
+    refreshed, incremental_ms = timed(lambda: refresh_production_lines(conn))
+
+    print(f"{args.plans} plans")
+    print(f"{'python per-plan sum':>28} {legacy_ms:>9.1f} ms")
+    print(f"{'full refresh of plan lines':>28} {full_ms:>9.1f} ms")
+    print(f"{'incremental refresh':>28} {incremental_ms:>9.1f} ms ({refreshed} plans)")
+    print(f"{'SQL rollup':>28} {rollup_ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
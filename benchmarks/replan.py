@@ -0,0 +1,116 @@
+"""Re-planning after a catalog edit: recomputing every saved dog plan versus
+only the plans the dependency index links to the edited ingredient.
+
+    python benchmarks/replan.py --dogs 2000 --plans-per-dog 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.api import compute_dog_plan  # noqa: E402
+from dog_meal_planner.dog_plans import dependent_plan_ids, record_dependencies, replan  # noqa: E402
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+
+
+def build_database(dogs: int, plans_per_dog: int, ingredients: int, recipes: int) -> sqlite3.Connection:
+    rng = random.Random(3)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO ingredients (id, name, kcal_per_100g, protein_g, calcium_mg) VALUES (?, ?, ?, ?, ?)",
+        (
+            (index, f"ingredient {index}", rng.uniform(80, 400), rng.uniform(0, 30), rng.uniform(0, 500))
+            for index in range(1, ingredients + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO recipes (id, name) VALUES (?, ?)",
+        ((index, f"recipe {index}") for index in range(1, recipes + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO recipe_items (recipe_id, ingredient_id, grams) VALUES (?, ?, ?)",
+        (
+            (recipe, rng.randint(1, ingredients), rng.uniform(20, 300))
+            for recipe in range(1, recipes + 1)
+            for _ in range(5)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO dogs (id, name, weight_kg, age_years, sex, neutered, activity) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (index, f"dog {index}", rng.uniform(3, 45), rng.uniform(1, 12), "female", 1, "moderate")
+            for index in range(1, dogs + 1)
+        ),
+    )
+    for dog_id in range(1, dogs + 1):
+        for number in range(plans_per_dog):
+            request = {
+                "mer_factor_key": "neutered_adult",
+                "kibble_id": rng.randint(1, ingredients),
+                "kibble_grams": 100.0,
+                "treats_kcal": 20.0,
+            }
+            if rng.random() < 0.5:
+                request["recipe_id"] = rng.randint(1, recipes)
+            else:
+                items = [{"ingredient_id": rng.randint(1, ingredients), "grams": 100.0} for _ in range(4)]
+                request["recipe"] = {"items": items}
+            cursor = conn.execute(
+                "INSERT INTO dog_plans (dog_id, name, request) VALUES (?, ?, ?)",
+                (dog_id, f"plan {dog_id}.{number}", json.dumps(request)),
+            )
+            record_dependencies(conn, int(cursor.lastrowid), request)
+    conn.commit()
+    return conn
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dogs", type=int, default=2_000)
+    parser.add_argument("--plans-per-dog", type=int, default=3)
+    parser.add_argument("--ingredients", type=int, default=1_000)
+    parser.add_argument("--recipes", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = build_database(args.dogs, args.plans_per_dog, args.ingredients, args.recipes)
+    all_ids = [row[0] for row in conn.execute("SELECT id FROM dog_plans")]
+    everything, full_ms = timed(lambda: replan(conn, all_ids, compute_dog_plan))
+
+    rng = random.Random(8)
+    lookups, recomputes, counts = [], [], []
+    for _ in range(args.edits):
+        ingredient_id = rng.randint(1, args.ingredients)
+        conn.execute("UPDATE ingredients SET calcium_mg = calcium_mg * 1.1 WHERE id = ?", (ingredient_id,))
+        plan_ids, lookup_ms = timed(lambda: dependent_plan_ids(conn, ingredient_ids=[ingredient_id]))
+        count, replan_ms = timed(lambda: replan(conn, plan_ids, compute_dog_plan))
+        lookups.append(lookup_ms)
+        recomputes.append(replan_ms)
+        counts.append(count)
+
+    print(f"{everything} dog plans, {args.edits} single-ingredient edits")
+    print(f"{'recompute every plan':>32} {full_ms:>9.1f} ms")
+    print(f"{'dependency lookup (mean)':>32} {sum(lookups) / len(lookups):>9.2f} ms")
+    print(
+        f"{'recompute dependents (mean)':>32} {sum(recomputes) / len(recomputes):>9.2f} ms "
+        f"({sum(counts) / len(counts):.1f} plans per edit)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Replay captured API traffic against a local instance and report throughput
+and latency percentiles per route.
+
+Capture traffic by starting the server with DOG_MEAL_PLANNER_RECORD_DIR set.
+Replay launches its own server on a scratch copy of --db, or on an empty
+database, with the USDA client pointed at a local stub. Redacted api_key
+fields, and the server's own USDA key, are filled with a placeholder.
+
+    python benchmarks/replay_traffic.py captures/ --rate 1
+    python benchmarks/replay_traffic.py captures/ --rate 10 --db data/dog_meal_planner.db
+    python benchmarks/replay_traffic.py captures/ --rate max --concurrency 32
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from load_test import ROOT_DIR, free_port, percentile, wait_for_health
+
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from dog_meal_planner.traffic import load_traffic  # noqa: E402
+
+PLACEHOLDER_KEY = "replay"
+
+
+class USDAStub(BaseHTTPRequestHandler):
+    # Answers /food/<fdc_id> with a deterministic FoodData Central payload.
+    def do_GET(self) -> None:
+        fdc_id = int(self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1] or 0)
+        amounts = {
+            "Energy": 100 + fdc_id % 300,
+            "Protein": fdc_id % 40,
+            "Total lipid (fat)": fdc_id % 25,
+            "Carbohydrate, by difference": fdc_id % 60,
+            "Calcium, Ca": fdc_id % 900,
+            "Phosphorus, P": fdc_id % 700,
+        }
+        body = json.dumps(
+            {
+                "fdcId": fdc_id,
+                "description": f"stub food {fdc_id}",
+                "foodNutrients": [{"nutrient": {"name": name}, "amount": amount} for name, amount in amounts.items()],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def usda_stub() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), USDAStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+
+@contextmanager
+def serve(db: Optional[Path], usda_url: str, workers: int) -> Iterator[int]:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "replay.db"
+        if db is not None:
+            with sqlite3.connect(db) as source, sqlite3.connect(db_path) as target:
+                source.backup(target)
+        env = dict(os.environ, DOG_MEAL_PLANNER_DB=str(db_path), DOG_MEAL_PLANNER_USDA_URL=usda_url)
+        # Recorded usda_import jobs use the server's key, which the stub ignores.
+        env["DOG_MEAL_PLANNER_USDA_API_KEY"] = PLACEHOLDER_KEY
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR / "src"), env.get("PYTHONPATH")]))
+        env.pop("DOG_MEAL_PLANNER_RECORD_DIR", None)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dog_meal_planner.server", "--port", str(port), "--workers", str(workers),
+             "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_for_health(port)
+            yield port
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def restore_redacted(record: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+    body = record.get("body")
+    query = record.get("query") or ""
+    for path in record.get("redacted", []):
+        if path.startswith("?"):
+            query = "&".join(filter(None, [query, f"{path[1:]}={PLACEHOLDER_KEY}"]))
+            continue
+        *parents, leaf = path.split(".")
+        target = body
+        for key in parents:
+            target = target[int(key)] if isinstance(target, list) else target[key]
+        target[leaf] = PLACEHOLDER_KEY
+    url = record["path"] + (f"?{query}" if query else "")
+    if "body" not in record:
+        return url, None
+    return url, json.dumps(body).encode()
+
+
+def replay(port: int, records: List[Dict[str, Any]], rate: Optional[float], concurrency: int) -> Tuple[list, float]:
+    local = threading.local()
+    samples: List[Tuple[str, float, int]] = []
+
+    def send(record: Dict[str, Any]) -> None:
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        url, body = restore_redacted(record)
+        headers = {"Content-Type": record["content_type"]} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            local.conn.request(record["method"], url, body=body, headers=headers)
+            response = local.conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            del local.conn
+            status = 0
+        route = f"{record['method']} {record.get('route') or record['path']}"
+        samples.append((route, time.perf_counter() - started, status))
+
+    first = records[0]["ts"] if records else 0.0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if rate is not None:
+                delay = (record["ts"] - first) / rate - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, record)
+    return samples, time.perf_counter() - started
+
+
+def report(samples: List[Tuple[str, float, int]], elapsed: float) -> None:
+    by_route: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    for route, latency, status in samples:
+        by_route[route].append((latency, status))
+        by_route["all"].append((latency, status))
+    print(f"{'route':<40} {'count':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route in sorted(by_route, key=lambda name: (name == "all", name)):
+        rows = by_route[route]
+        latencies = [latency for latency, _ in rows]
+        errors = sum(1 for _, status in rows if status == 0 or status >= 500)
+        print(
+            f"{route[:40]:<40} {len(rows):>6} {errors:>6} {len(rows) / elapsed:>8.1f} "
+            f"{percentile(latencies, 0.50) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f} "
+            f"{percentile(latencies, 0.99) * 1000:>8.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", type=Path, nargs="+", help="traffic files or capture directories")
+    parser.add_argument("--rate", default="1", help="speed-up over the recorded timing, or 'max'")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--db", type=Path, help="database to replay against (copied, never modified)")
+    args = parser.parse_args()
+
+    records = load_traffic(args.captures)
+    if not records:
+        parser.error("no traffic records found")
+    rate = None if args.rate == "max" else float(args.rate)
+    with usda_stub() as usda_url, serve(args.db, usda_url, args.workers) as port:
+        samples, elapsed = replay(port, records, rate, args.concurrency)
+    print(f"replayed {len(samples)} requests at rate {args.rate} in {elapsed:.1f} s")
+    report(samples, elapsed)
+
+
+if __name__ == "__main__":
+    main()
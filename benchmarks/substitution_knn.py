@@ -0,0 +1,119 @@
+"""Substitution index latency: KD-tree build, k-nearest queries against a
+brute-force scan, and incremental syncs after catalog edits.
+
+Synthetic ingredients are drawn around a few hundred nutrient archetypes, the
+way real catalogs cluster into meats, grains, organs and supplements.
+
+    python benchmarks/substitution_knn.py --ingredients 100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dog_meal_planner.density_index import DENSITY_FIELDS  # noqa: E402
+from dog_meal_planner.storage import SCHEMA_PATH  # noqa: E402
+from dog_meal_planner.substitution import SubstitutionIndex, weighted_distance  # noqa: E402
+from dog_meal_planner.substitution import DEFAULT_WEIGHTS  # noqa: E402
+
+RANGES = {
+    "protein_g": 40,
+    "fat_g": 40,
+    "carbs_g": 80,
+    "calcium_mg": 1000,
+    "phosphorus_mg": 600,
+    "iron_mg": 10,
+    "zinc_mg": 12,
+    "vitamin_a_iu": 5000,
+    "vitamin_d_iu": 200,
+    "vitamin_e_mg": 10,
+}
+
+
+def ingredient_rows(count: int, archetypes: int, rng: random.Random):
+    centres = [
+        (rng.uniform(50, 600), {field: rng.choice((0.0, rng.uniform(0, top))) for field, top in RANGES.items()})
+        for _ in range(archetypes)
+    ]
+    for index in range(count):
+        kcal, centre = rng.choice(centres)
+        values = [max(centre[field] * rng.gauss(1.0, 0.08), 0.0) for field in DENSITY_FIELDS]
+        yield (f"ingredient {index}", kcal * rng.gauss(1.0, 0.05), *values)
+
+
+def build_catalog(count: int, archetypes: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        f"""
+        INSERT INTO ingredients (name, kcal_per_100g, {', '.join(DENSITY_FIELDS)})
+        VALUES ({', '.join('?' for _ in range(len(DENSITY_FIELDS) + 2))})
+        """,
+        ingredient_rows(count, archetypes, random.Random(11)),
+    )
+    conn.commit()
+    return conn
+
+
+def timed_ms(func) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ingredients", type=int, default=100_000)
+    parser.add_argument("--archetypes", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = build_catalog(args.ingredients, args.archetypes)
+    index = SubstitutionIndex()
+    print(f"initial load + build: {timed_ms(lambda: index.sync(conn)):.0f} ms for {len(index)} ingredients")
+
+    rng = random.Random(2)
+    ids = [rng.randint(1, args.ingredients) for _ in range(args.queries)]
+    indexed = [
+        timed_ms(lambda ident=ident: index.nearest(index.vector(ident), args.k, exclude={ident}))
+        for ident in ids
+    ]
+    vectors = {ident: index.vector(ident) for ident in range(1, args.ingredients + 1)}
+
+    def brute(ident: int) -> list:
+        query = vectors[ident]
+        return sorted(
+            (weighted_distance(vector, query, DEFAULT_WEIGHTS), other)
+            for other, vector in vectors.items()
+            if other != ident
+        )[: args.k]
+
+    scanned = [timed_ms(lambda ident=ident: brute(ident)) for ident in ids[:10]]
+    for ident in ids[:10]:
+        found = index.nearest(index.vector(ident), args.k, exclude={ident})
+        assert [other for _, other in found] == [other for _, other in brute(ident)]
+
+    print(f"{'':>22} {'median ms':>10} {'p95 ms':>8}")
+    for label, samples in (("kd-tree k-nearest", indexed), ("brute-force scan", scanned)):
+        ordered = sorted(samples)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+        print(f"{label:>22} {statistics.median(samples):>10.3f} {p95:>8.3f}")
+
+    edits = []
+    for step in range(200):
+        ident = rng.randint(1, args.ingredients)
+        conn.execute("UPDATE ingredients SET calcium_mg = calcium_mg * 1.1 WHERE id = ?", (ident,))
+        edits.append(timed_ms(lambda: index.sync(conn)))
+    print(f"sync after one edit: median {statistics.median(edits):.3f} ms, max {max(edits):.1f} ms (includes rebuilds)")
+
+
+if __name__ == "__main__":
+    main()
@@ -66,6 +66,37 @@ const merFactorMap = {
 const KG_PER_LB = 0.45359237;
 const LB_PER_KG = 1 / KG_PER_LB;
 const USDA_API_KEY_STORAGE = "usdaApiKey";
+const COMPUTE_DEBOUNCE_MS = 400;
+const ENGINE_RESYNC_INTERVAL = 500;
+
+// Field order mirrors dog_meal_planner.models.Nutrients.
+const NUTRIENT_FIELDS = [
+  "kcal",
+  "protein_g",
+  "fat_g",
+  "carbs_g",
+  "calcium_mg",
+  "phosphorus_mg",
+  "iron_mg",
+  "zinc_mg",
+  "vitamin_a_iu",
+  "vitamin_d_iu",
+  "vitamin_e_mg",
+];
+
+const TOTAL_KEYS = {
+  kcal: "kcalTotal",
+  protein_g: "proteinTotal",
+  fat_g: "fatTotal",
+  carbs_g: "carbsTotal",
+  calcium_mg: "calciumTotal",
+  phosphorus_mg: "phosphorusTotal",
+  iron_mg: "ironTotal",
+  zinc_mg: "zincTotal",
+  vitamin_a_iu: "vitaminATotal",
+  vitamin_d_iu: "vitaminDTotal",
+  vitamin_e_mg: "vitaminETotal",
+};
 
 let currentWeightUnit = weightUnitEl?.value || "kg";
 
@@ -151,18 +182,101 @@ const buildIngredient = (container) => {
   };
 };
 
+const readRecipeItem = (itemEl) => ({
+  ingredient: buildIngredient(itemEl),
+  grams: parseNumber(itemEl.querySelector("input[data-field='grams']").value),
+});
+
 const buildRecipeItems = () => {
   const items = [];
   recipeItemsContainer.querySelectorAll(".recipe-item").forEach((itemEl) => {
-    const ingredient = buildIngredient(itemEl);
-    const grams = parseNumber(
-      itemEl.querySelector("input[data-field='grams']").value
-    );
-    items.push({ ingredient, grams });
+    items.push(readRecipeItem(itemEl));
   });
   return items;
 };
 
+const emptyNutrients = () => {
+  const nutrients = {};
+  NUTRIENT_FIELDS.forEach((field) => {
+    nutrients[field] = 0;
+  });
+  return nutrients;
+};
+
+// Mirrors one iteration of Recipe.total_nutrients: kcal comes from
+// kcal_per_100g, everything else from nutrients_per_100g.
+const itemContribution = ({ ingredient, grams }) => {
+  const scale = grams / 100;
+  const contribution = emptyNutrients();
+  NUTRIENT_FIELDS.forEach((field) => {
+    const per100g =
+      field === "kcal"
+        ? ingredient.kcal_per_100g
+        : ingredient.nutrients_per_100g[field];
+    contribution[field] = (per100g || 0) * scale;
+  });
+  return contribution;
+};
+
+const toTotals = (nutrients) => {
+  const totals = {};
+  NUTRIENT_FIELDS.forEach((field) => {
+    totals[TOTAL_KEYS[field]] = nutrients[field];
+  });
+  return totals;
+};
+
+// Running recipe totals. Each item's contribution is cached so an edit only
+// re-reads that item's inputs and applies the difference.
+const recipeEngine = {
+  contributions: new Map(),
+  totals: emptyNutrients(),
+  updatesSinceResync: 0,
+};
+
+const applyContribution = (contribution, sign) => {
+  NUTRIENT_FIELDS.forEach((field) => {
+    recipeEngine.totals[field] += sign * contribution[field];
+  });
+};
+
+// Rebuild the totals from the cached contributions so repeated add/subtract
+// cycles cannot accumulate floating point drift.
+const resyncRecipeTotals = () => {
+  recipeEngine.totals = emptyNutrients();
+  recipeEngine.contributions.forEach(({ nutrients }) => {
+    applyContribution(nutrients, 1);
+  });
+  recipeEngine.updatesSinceResync = 0;
+};
+
+const updateItemContribution = (itemEl) => {
+  const previous = recipeEngine.contributions.get(itemEl);
+  if (previous) {
+    applyContribution(previous.nutrients, -1);
+  }
+  const item = readRecipeItem(itemEl);
+  const nutrients = itemContribution(item);
+  recipeEngine.contributions.set(itemEl, { name: item.ingredient.name, nutrients });
+  applyContribution(nutrients, 1);
+  recipeEngine.updatesSinceResync += 1;
+  if (recipeEngine.updatesSinceResync >= ENGINE_RESYNC_INTERVAL) {
+    resyncRecipeTotals();
+  }
+};
+
+const removeItemContribution = (itemEl) => {
+  if (recipeEngine.contributions.delete(itemEl)) {
+    resyncRecipeTotals();
+  }
+};
+
+const clearRecipeItems = () => {
+  recipeItemsContainer.innerHTML = "";
+  recipeEngine.contributions.clear();
+  resyncRecipeTotals();
+};
+
 const listMeals = () =>
   document
     .getElementById("meals")
@@ -188,11 +302,16 @@ const createRecipeItem = (item) => {
 
   itemEl.querySelector(".remove").addEventListener("click", () => {
     itemEl.remove();
-    refreshSummary();
+    removeItemContribution(itemEl);
+    scheduleSummary();
   });
   itemEl.querySelectorAll("input").forEach((input) => {
-    input.addEventListener("input", () => refreshSummary());
+    input.addEventListener("input", () => {
+      updateItemContribution(itemEl);
+      scheduleSummary();
+    });
   });
+  updateItemContribution(itemEl);
   return fragment;
 };
 
@@ -262,70 +381,21 @@ const calculateRer = (weightKg) => {
   return 70 * Math.pow(weightKg, 0.75);
 };
 
-const calculateRecipeTotals = () => {
-  let kcalTotal = 0;
-  let proteinTotal = 0;
-  let fatTotal = 0;
-  let carbsTotal = 0;
-  let calciumTotal = 0;
-  let phosphorusTotal = 0;
-  let ironTotal = 0;
-  let zincTotal = 0;
-  let vitaminATotal = 0;
-  let vitaminDTotal = 0;
-  let vitaminETotal = 0;
-
-  buildRecipeItems().forEach(({ ingredient, grams }) => {
-    const multiplier = grams / 100;
-    kcalTotal += ingredient.kcal_per_100g * multiplier;
-    proteinTotal += (ingredient.nutrients_per_100g.protein_g || 0) * multiplier;
-    fatTotal += (ingredient.nutrients_per_100g.fat_g || 0) * multiplier;
-    carbsTotal += (ingredient.nutrients_per_100g.carbs_g || 0) * multiplier;
-    calciumTotal += (ingredient.nutrients_per_100g.calcium_mg || 0) * multiplier;
-    phosphorusTotal += (ingredient.nutrients_per_100g.phosphorus_mg || 0) * multiplier;
-    ironTotal += (ingredient.nutrients_per_100g.iron_mg || 0) * multiplier;
-    zincTotal += (ingredient.nutrients_per_100g.zinc_mg || 0) * multiplier;
-    vitaminATotal += (ingredient.nutrients_per_100g.vitamin_a_iu || 0) * multiplier;
-    vitaminDTotal += (ingredient.nutrients_per_100g.vitamin_d_iu || 0) * multiplier;
-    vitaminETotal += (ingredient.nutrients_per_100g.vitamin_e_mg || 0) * multiplier;
-  });
-
-  return {
-    kcalTotal,
-    proteinTotal,
-    fatTotal,
-    carbsTotal,
-    calciumTotal,
-    phosphorusTotal,
-    ironTotal,
-    zincTotal,
-    vitaminATotal,
-    vitaminDTotal,
-    vitaminETotal,
-  };
-};
+const calculateRecipeTotals = () => toTotals(recipeEngine.totals);
 
 const calculateKibbleTotals = () => {
   const grams = parseNumber(document.getElementById("kibble-grams").value);
-  const multiplier = grams / 100;
   const kcalPer100g = parseNumber(document.getElementById("kibble-kcal").value);
   const nutrients = readNutrients(
     document.querySelector(".nutrients[data-prefix='kibble']")
   );
 
-  return {
-    kcalTotal: kcalPer100g * multiplier,
-    proteinTotal: (nutrients.protein_g || 0) * multiplier,
-    fatTotal: (nutrients.fat_g || 0) * multiplier,
-    carbsTotal: (nutrients.carbs_g || 0) * multiplier,
-    calciumTotal: (nutrients.calcium_mg || 0) * multiplier,
-    phosphorusTotal: (nutrients.phosphorus_mg || 0) * multiplier,
-    ironTotal: (nutrients.iron_mg || 0) * multiplier,
-    zincTotal: (nutrients.zinc_mg || 0) * multiplier,
-    vitaminATotal: (nutrients.vitamin_a_iu || 0) * multiplier,
-    vitaminDTotal: (nutrients.vitamin_d_iu || 0) * multiplier,
-    vitaminETotal: (nutrients.vitamin_e_mg || 0) * multiplier,
-  };
+  return toTotals(
+    itemContribution({
+      ingredient: { kcal_per_100g: kcalPer100g, nutrients_per_100g: nutrients },
+      grams,
+    })
+  );
 };
 
 const combineTotals = (totalsA, totalsB) => ({
@@ -462,9 +532,9 @@ const updateMealDistribution = (meals, totals) => {
 
 const updateIngredientHighlights = (recipeTotals, kibbleTotals) => {
   ingredientHighlightsEl.innerHTML = "";
-  const items = buildRecipeItems().map(({ ingredient, grams }) => ({
-    name: ingredient.name,
-    kcal: (ingredient.kcal_per_100g || 0) * (grams / 100),
+  const items = Array.from(recipeEngine.contributions.values(), ({ name, nutrients }) => ({
+    name,
+    kcal: nutrients.kcal,
   }));
   items.push({
     name: document.getElementById("kibble-name").value.trim() || "Kibble",
@@ -579,6 +649,20 @@ const refreshSummary = () => {
   updateDiagnosticPills(diagnosticMessages);
 };
 
+// Coalesce bursts of input events into a single summary render per frame and
+// a single debounced server recompute.
+let summaryFrame = null;
+
+const scheduleSummary = () => {
+  if (summaryFrame === null) {
+    summaryFrame = requestAnimationFrame(() => {
+      summaryFrame = null;
+      refreshSummary();
+    });
+  }
+  scheduleComputePlan();
+};
+
 const collectFormState = () => {
   const state = {
     fields: {
@@ -603,13 +687,14 @@ const collectFormState = () => {
       document.querySelector(".nutrients[data-prefix='kibble']")
     ),
     recipeItems: buildRecipeItems(),
+    result: currentPlanResult(),
   };
 
   return state;
 };
 
 const applyRecipeItems = (items) => {
-  recipeItemsContainer.innerHTML = "";
+  clearRecipeItems();
   (items || []).forEach((item) => {
     const fragment = createRecipeItem(item);
     recipeItemsContainer.appendChild(fragment);
@@ -649,19 +734,40 @@ const applyFormState = (state) => {
 
   applyRecipeItems(state.recipeItems || []);
 
+  rememberPlanResult(state.result || null);
   refreshSummary();
 };
 
+// Catalog responses keyed by URL, revalidated with If-None-Match so an
+// unchanged list costs a 304 instead of a full body.
+const catalogCache = new Map();
+
+const fetchCatalog = async (url) => {
+  const cached = catalogCache.get(url);
+  const headers = cached ? { "If-None-Match": cached.etag } : {};
+  const response = await fetch(url, { headers, cache: "no-store" });
+  if (response.status === 304 && cached) {
+    return cached.data;
+  }
+  if (!response.ok) {
+    throw new Error(`${response.status} ${await response.text()}`);
+  }
+  const data = await response.json();
+  const etag = response.headers.get("ETag");
+  if (etag) {
+    catalogCache.set(url, { etag, data });
+  } else {
+    catalogCache.delete(url);
+  }
+  return data;
+};
+
 const refreshPlans = async (selectedId) => {
   if (!planSelect) {
     return;
   }
   try {
-    const response = await fetch("/plans");
-    if (!response.ok) {
-      throw new Error(await response.text());
-    }
-    const plans = await response.json();
+    const plans = await fetchCatalog("/plans");
     const current = selectedId || planSelect.value;
     planSelect.innerHTML = "";
     if (!plans.length) {
@@ -692,6 +798,11 @@ const savePlan = async () => {
     handleError("Enter a plan name before saving.");
     return;
   }
+  // Saved totals and warnings are indexed for search, so they must match
+  // the form; recompute first if it changed since the last result.
+  if (!currentPlanResult() && !(await computePlan())) {
+    return;
+  }
   const state = collectFormState();
   resultEl.textContent = "Saving plan...";
   try {
@@ -723,13 +834,7 @@ const loadPlan = async () => {
   }
   resultEl.textContent = "Loading plan...";
   try {
-    const response = await fetch(`/plans/${planSelect.value}`);
-    if (!response.ok) {
-      const errorText = await response.text();
-      handleError(`Request failed (${response.status}). ${errorText}`);
-      return;
-    }
-    const data = await response.json();
+    const data = await fetchCatalog(`/plans/${planSelect.value}`);
     applyFormState(data.payload);
     if (planNameInput) {
       planNameInput.value = data.name;
@@ -767,11 +872,7 @@ const refreshRecipes = async (selectedId) => {
     return;
   }
   try {
-    const response = await fetch("/recipes");
-    if (!response.ok) {
-      throw new Error(await response.text());
-    }
-    const recipes = await response.json();
+    const recipes = await fetchCatalog("/recipes");
     const current = selectedId || recipeSelect.value;
     recipeSelect.innerHTML = "";
     if (!recipes.length) {
@@ -841,13 +942,7 @@ const loadRecipe = async () => {
   }
   resultEl.textContent = "Loading recipe...";
   try {
-    const response = await fetch(`/recipes/${recipeSelect.value}`);
-    if (!response.ok) {
-      const errorText = await response.text();
-      handleError(`Request failed (${response.status}). ${errorText}`);
-      return;
-    }
-    const data = await response.json();
+    const data = await fetchCatalog(`/recipes/${recipeSelect.value}`);
     if (recipeNameInput) {
       recipeNameInput.value = data.name;
     }
@@ -935,17 +1030,46 @@ const resetPlan = () => {
       input.value = input.querySelector("option")?.value || "";
     }
   });
-  recipeItemsContainer.innerHTML = "";
+  clearRecipeItems();
   addRecipeItem();
   if (weightUnitEl) {
     currentWeightUnit = weightUnitEl.value;
     updateWeightUnitLabels(currentWeightUnit);
   }
+  rememberPlanResult(null);
   refreshSummary();
   handleSuccess({ status: "Reset to defaults." });
 };
 
+// Once a plan has been computed, later edits recompute it automatically.
+// Only the newest request is allowed to finish; older ones are aborted.
+let livePlanPreview = false;
+// Saved with the plan so the server can index totals and warnings. The
+// request it was computed from is kept too, so a result is only reused while
+// the form still builds the same request.
+let lastPlanResult = null;
+
+const rememberPlanResult = (result, request = buildPayload()) => {
+  lastPlanResult = result ? { request: JSON.stringify(request), result } : null;
+};
+
+const currentPlanResult = () => {
+  if (!lastPlanResult || lastPlanResult.request !== JSON.stringify(buildPayload())) {
+    return null;
+  }
+  return lastPlanResult.result;
+};
+let computeTimer = null;
+let computeController = null;
+
 const computePlan = async () => {
+  clearTimeout(computeTimer);
+  computeTimer = null;
+  if (computeController) {
+    computeController.abort();
+  }
+  const controller = new AbortController();
+  computeController = controller;
   const payload = buildPayload();
   resultEl.textContent = "Computing...";
   try {
@@ -953,17 +1077,37 @@ const computePlan = async () => {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
+      signal: controller.signal,
     });
     if (!response.ok) {
       const errorText = await response.text();
       handleError(`Request failed (${response.status}). ${errorText}`);
-      return;
+      return null;
     }
     const data = await response.json();
+    livePlanPreview = true;
+    rememberPlanResult(data, payload);
     handleSuccess(data);
+    return data;
   } catch (error) {
+    if (error.name === "AbortError") {
+      return null;
+    }
     handleError(`Request failed. ${error}`);
+    return null;
+  } finally {
+    if (computeController === controller) {
+      computeController = null;
+    }
+  }
+};
+
+const scheduleComputePlan = () => {
+  if (!livePlanPreview) {
+    return;
   }
+  clearTimeout(computeTimer);
+  computeTimer = setTimeout(() => computePlan(), COMPUTE_DEBOUNCE_MS);
 };
 
 addItemButton.addEventListener("click", () => addRecipeItem());
@@ -1003,8 +1147,8 @@ if (usdaApiKeyInput) {
 }
 
 document.querySelectorAll("input, select").forEach((input) => {
-  input.addEventListener("input", () => refreshSummary());
-  input.addEventListener("change", () => refreshSummary());
+  input.addEventListener("input", () => scheduleSummary());
+  input.addEventListener("change", () => scheduleSummary());
 });
 
 addRecipeItem();
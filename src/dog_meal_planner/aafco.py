@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-from dog_meal_planner.models import Nutrients
+from dog_meal_planner.models import NUTRIENT_FIELDS, Nutrients
 
 
 @dataclass(frozen=True)
@@ -11,29 +12,156 @@ class AAFCOStandard:
     name: str
     minimum: float
     units: str
+    maximum: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class AAFCOProfile:
+    name: str
+    standards: Dict[str, AAFCOStandard]
+    calcium_phosphorus_ratio: Optional[Tuple[float, float]] = None
 
 
 # TODO: Replace placeholders with authoritative AAFCO minimums for adult maintenance per 1000 kcal.
 AAFCO_STANDARDS: Dict[str, AAFCOStandard] = {
     "protein_g": AAFCOStandard("protein", 45.0, "g"),
     "fat_g": AAFCOStandard("fat", 13.0, "g"),
-    "calcium_mg": AAFCOStandard("calcium", 1250.0, "mg"),
-    "phosphorus_mg": AAFCOStandard("phosphorus", 1000.0, "mg"),
+    "calcium_mg": AAFCOStandard("calcium", 1250.0, "mg", maximum=6250.0),
+    "phosphorus_mg": AAFCOStandard("phosphorus", 1000.0, "mg", maximum=4000.0),
     "iron_mg": AAFCOStandard("iron", 7.5, "mg"),
     "zinc_mg": AAFCOStandard("zinc", 15.0, "mg"),
-    "vitamin_a_iu": AAFCOStandard("vitamin A", 1250.0, "IU"),
-    "vitamin_d_iu": AAFCOStandard("vitamin D", 125.0, "IU"),
+    "vitamin_a_iu": AAFCOStandard("vitamin A", 1250.0, "IU", maximum=62500.0),
+    "vitamin_d_iu": AAFCOStandard("vitamin D", 125.0, "IU", maximum=750.0),
     "vitamin_e_mg": AAFCOStandard("vitamin E", 12.5, "mg"),
 }
 
+AAFCO_GROWTH_STANDARDS: Dict[str, AAFCOStandard] = {
+    "protein_g": AAFCOStandard("protein", 56.3, "g"),
+    "fat_g": AAFCOStandard("fat", 21.3, "g"),
+    "calcium_mg": AAFCOStandard("calcium", 3000.0, "mg", maximum=6250.0),
+    "phosphorus_mg": AAFCOStandard("phosphorus", 2500.0, "mg", maximum=4000.0),
+    "iron_mg": AAFCOStandard("iron", 22.0, "mg"),
+    "zinc_mg": AAFCOStandard("zinc", 25.0, "mg"),
+    "vitamin_a_iu": AAFCOStandard("vitamin A", 1250.0, "IU", maximum=62500.0),
+    "vitamin_d_iu": AAFCOStandard("vitamin D", 125.0, "IU", maximum=750.0),
+    "vitamin_e_mg": AAFCOStandard("vitamin E", 12.5, "mg"),
+}
+
+AAFCO_PROFILES: Dict[str, AAFCOProfile] = {
+    "adult_maintenance": AAFCOProfile("adult_maintenance", AAFCO_STANDARDS, (1.0, 2.0)),
+    "growth": AAFCOProfile("growth", AAFCO_GROWTH_STANDARDS, (1.0, 2.0)),
+}
+
+CALCIUM_INDEX = NUTRIENT_FIELDS.index("calcium_mg")
+PHOSPHORUS_INDEX = NUTRIENT_FIELDS.index("phosphorus_mg")
+
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    name: str
+    checks: Tuple[Tuple[int, float, float], ...]
+    standards: Tuple[Tuple[str, AAFCOStandard], ...]
+    ratio_bounds: Optional[Tuple[float, float]]
+    passes: Callable[[Sequence[float]], bool]
+
+
+def _compile_predicate(
+    checks: Sequence[Tuple[int, float, float]],
+    ratio_bounds: Optional[Tuple[float, float]],
+) -> Callable[[Sequence[float]], bool]:
+    # Bounds are precomputed (index, min, max) tuples; a missing maximum is
+    # inf, so every check is one chained comparison and NaN always fails.
+    if ratio_bounds is None:
+        def passes(vector: Sequence[float]) -> bool:
+            for index, low, high in checks:
+                if not low <= vector[index] <= high:
+                    return False
+            return True
+
+        return passes
 
-def evaluate_aafco(nutrients_per_1000_kcal: Nutrients, standards: Dict[str, AAFCOStandard]) -> Dict[str, str]:
+    ratio_low, ratio_high = ratio_bounds
+
+    def passes_with_ratio(vector: Sequence[float]) -> bool:
+        for index, low, high in checks:
+            if not low <= vector[index] <= high:
+                return False
+        phosphorus = vector[PHOSPHORUS_INDEX]
+        return phosphorus <= 0 or ratio_low * phosphorus <= vector[CALCIUM_INDEX] <= ratio_high * phosphorus
+
+    return passes_with_ratio
+
+
+def compile_profile(profile: AAFCOProfile) -> CompiledProfile:
+    standards = tuple(profile.standards.items())
+    checks = tuple(
+        (
+            NUTRIENT_FIELDS.index(field),
+            standard.minimum,
+            math.inf if standard.maximum is None else standard.maximum,
+        )
+        for field, standard in standards
+    )
+    ratio_bounds = profile.calcium_phosphorus_ratio
+    return CompiledProfile(
+        profile.name,
+        checks,
+        standards,
+        ratio_bounds,
+        _compile_predicate(checks, ratio_bounds),
+    )
+
+
+COMPILED_PROFILES: Dict[str, CompiledProfile] = {
+    name: compile_profile(profile) for name, profile in AAFCO_PROFILES.items()
+}
+
+
+def _violation_message(standard: AAFCOStandard, value: float) -> str:
+    if math.isnan(value):
+        return f"{standard.name} is not a number"
+    if value < standard.minimum:
+        return (
+            f"{standard.name} below minimum: {value:.2f}{standard.units} "
+            f"< {standard.minimum}{standard.units}"
+        )
+    return (
+        f"{standard.name} above maximum: {value:.2f}{standard.units} "
+        f"> {standard.maximum}{standard.units}"
+    )
+
+
+def _profile_warnings(vector: Sequence[float], profile: CompiledProfile) -> Dict[str, str]:
     warnings: Dict[str, str] = {}
-    for field, standard in standards.items():
-        value = getattr(nutrients_per_1000_kcal, field)
-        if value < standard.minimum:
-            warnings[field] = (
-                f"{standard.name} below minimum: {value:.2f}{standard.units} "
-                f"< {standard.minimum}{standard.units}"
+    for (index, low, high), (field, standard) in zip(profile.checks, profile.standards):
+        if not low <= vector[index] <= high:
+            warnings[field] = _violation_message(standard, vector[index])
+    ratio_bounds = profile.ratio_bounds
+    if ratio_bounds is not None and vector[PHOSPHORUS_INDEX] > 0:
+        ratio = vector[CALCIUM_INDEX] / vector[PHOSPHORUS_INDEX]
+        if not ratio_bounds[0] <= ratio <= ratio_bounds[1]:
+            warnings["calcium_phosphorus_ratio"] = (
+                f"Ca:P ratio outside range: {ratio:.2f} "
+                f"not in {ratio_bounds[0]}-{ratio_bounds[1]}"
             )
     return warnings
+
+
+def evaluate_aafco_batch(
+    vectors: Sequence[Sequence[float]],
+    profile: CompiledProfile,
+) -> List[Dict[str, str]]:
+    # vectors hold per-1000-kcal values in NUTRIENT_FIELDS order. Messages are
+    # only built for vectors that fail the compiled predicate.
+    passes = profile.passes
+    return [{} if passes(vector) else _profile_warnings(vector, profile) for vector in vectors]
+
+
+def evaluate_aafco(
+    nutrients_per_1000_kcal: Nutrients,
+    profile: Union[CompiledProfile, Dict[str, AAFCOStandard]] = COMPILED_PROFILES["adult_maintenance"],
+) -> Dict[str, str]:
+    # Callers written against the original signature pass a standards dict.
+    if not isinstance(profile, CompiledProfile):
+        profile = compile_profile(AAFCOProfile("custom", profile))
+    return evaluate_aafco_batch([nutrients_per_1000_kcal.to_tuple()], profile)[0]
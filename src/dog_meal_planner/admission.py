@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    limit: int
+    queue_size: int
+    timeout_seconds: float
+    # Lower values are admitted first when a slot frees up.
+    priority: int
+
+
+ROUTE_CLASSES: Dict[str, RouteClass] = {
+    "cheap": RouteClass("cheap", limit=64, queue_size=256, timeout_seconds=1.0, priority=0),
+    "catalog": RouteClass("catalog", limit=16, queue_size=64, timeout_seconds=2.0, priority=1),
+    # Saves, deletes, job submission and measurement ingest: one short write
+    # transaction each, kept out of the expensive class so a compute storm
+    # cannot shed them.
+    "write": RouteClass("write", limit=8, queue_size=64, timeout_seconds=2.0, priority=1),
+    "expensive": RouteClass("expensive", limit=4, queue_size=16, timeout_seconds=5.0, priority=2),
+}
+
+# First match wins; anything unmatched is treated as expensive.
+ROUTE_RULES: Tuple[Tuple[Tuple[str, ...], Pattern[str], str], ...] = (
+    (("GET", "HEAD"), re.compile(r"^/(health|rer(/[^/]+)?|kcal-to-grams|static/.*)?$"), "cheap"),
+    (("GET", "HEAD"), re.compile(r"^/(production|ingredients/\d+/substitutes)$"), "expensive"),
+    (("GET", "HEAD"), re.compile(r"^/(ingredients|recipes|plans|jobs|dogs|dog-plans)(/.*)?$"), "catalog"),
+    # Updates that replan every dependent dog plan, and plan computation.
+    (("PUT",), re.compile(r"^/(ingredients|recipes|dogs)/\d+$"), "expensive"),
+    (("POST",), re.compile(r"^/(compute-plan|production/refresh|dogs/\d+/plans)$"), "expensive"),
+    (("POST", "PUT", "DELETE"), re.compile(r"^/admin/.*$"), "expensive"),
+    (
+        ("POST", "PUT", "DELETE"),
+        re.compile(r"^/((ingredients|recipes|plans|jobs|dogs|dog-plans)(/.*)?|measurements|ingredient/manual)$"),
+        "write",
+    ),
+)
+DEFAULT_ROUTE_CLASS = "expensive"
+TOTAL_LIMIT = 64
+
+
+def classify(method: str, path: str) -> RouteClass:
+    for methods, pattern, name in ROUTE_RULES:
+        if method in methods and pattern.match(path):
+            return ROUTE_CLASSES[name]
+    return ROUTE_CLASSES[DEFAULT_ROUTE_CLASS]
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    # Per-class concurrency limits under a shared total. Waiters queue per
+    # class up to queue_size and for at most timeout_seconds; freed slots go to
+    # the waiting request with the lowest priority value, then oldest first.
+    def __init__(self, classes: Dict[str, RouteClass] = ROUTE_CLASSES, total_limit: int = TOTAL_LIMIT) -> None:
+        self.classes = classes
+        self.total_limit = total_limit
+        self.in_flight = {name: 0 for name in classes}
+        self.queued = {name: 0 for name in classes}
+        self.service_seconds = {name: 0.05 for name in classes}
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def _has_slot(self, route_class: RouteClass) -> bool:
+        return (
+            self.in_flight[route_class.name] < route_class.limit
+            and sum(self.in_flight.values()) < self.total_limit
+        )
+
+    def retry_after(self, route_class: RouteClass) -> int:
+        # Time to drain the class's queue at its recent service rate.
+        backlog = self.queued[route_class.name] + self.in_flight[route_class.name]
+        return max(1, math.ceil(backlog * self.service_seconds[route_class.name] / route_class.limit))
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        name = route_class.name
+        # Queue behind anyone already waiting in this class so arrivals cannot jump the line.
+        if self._has_slot(route_class) and not self.queued[name]:
+            self.in_flight[name] += 1
+            return
+        if self.queued[name] >= route_class.queue_size:
+            raise Overloaded(self.retry_after(route_class))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._order), name, future))
+        self.queued[name] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), route_class.timeout_seconds)
+        except asyncio.TimeoutError:
+            if future.done():
+                return
+            future.cancel()
+            raise Overloaded(self.retry_after(route_class)) from None
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot already granted.
+            if future.done() and not future.cancelled():
+                self.release(route_class, None)
+            future.cancel()
+            raise
+        finally:
+            self.queued[name] -= 1
+
+    def release(self, route_class: RouteClass, elapsed: float | None) -> None:
+        name = route_class.name
+        self.in_flight[name] -= 1
+        if elapsed is not None:
+            self.service_seconds[name] = 0.8 * self.service_seconds[name] + 0.2 * elapsed
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        skipped: List[Tuple[int, int, str, asyncio.Future]] = []
+        while self._waiters and sum(self.in_flight.values()) < self.total_limit:
+            entry = heapq.heappop(self._waiters)
+            _, _, name, future = entry
+            if future.done():
+                continue
+            if self.in_flight[name] >= self.classes[name].limit:
+                skipped.append(entry)
+                continue
+            self.in_flight[name] += 1
+            future.set_result(None)
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        try:
+            await self.controller.acquire(route_class)
+        except Overloaded as exc:
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class, time.monotonic() - started)
+
+
+def admission_enabled() -> bool:
+    return os.getenv("DOG_MEAL_PLANNER_ADMISSION", "1") == "1"
+
+
+admission_controller = AdmissionController()
@@ -2,22 +2,68 @@ from __future__ import annotations
 
 import json
 import sqlite3
+from dataclasses import asdict
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
 
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 
-from dog_meal_planner.models import Dog, Ingredient, Nutrients, Recipe, RecipeItem
+from dog_meal_planner.aafco import AAFCO_PROFILES, COMPILED_PROFILES, evaluate_aafco_batch
+from dog_meal_planner.admission import AdmissionMiddleware, admission_controller, admission_enabled
+from dog_meal_planner.backup import list_backups, restore_backup
+from dog_meal_planner.density_index import MAX_SEARCH_LIMIT, parse_density_ranges, search_by_density
+from dog_meal_planner.dog_plans import (
+    DOG_FIELDS,
+    dependent_plan_ids,
+    dog_fields,
+    record_dependencies,
+    replan,
+)
+from dog_meal_planner.http_cache import (
+    StaticAsset,
+    StaticAssetCache,
+    asset_response_parts,
+    catalog_validators,
+    etag_matches,
+)
+from dog_meal_planner.jobs import (
+    FINISHED_STATUSES,
+    JOB_KINDS,
+    JobConflict,
+    cancel_job,
+    job_runner,
+    jobs_enabled,
+    submit_job,
+)
+from dog_meal_planner.measurements import MeasurementPoint, ingest_measurements, measurement_series, mer_trend
+from dog_meal_planner.models import (
+    Dog,
+    Ingredient,
+    Nutrients,
+    Recipe,
+    RecipeItem,
+    intern_ingredient,
+)
 from dog_meal_planner.nutrition import (
     MER_FACTORS,
     calories_to_grams,
     compute_meal_plan,
     compute_rer,
+    normalize_per_1000_kcal,
 )
-from dog_meal_planner.storage import db_session, init_db
+from dog_meal_planner.plan_search import MAX_PLAN_SEARCH_LIMIT, PlanFilters, aafco_warning_count, search_plans
+from dog_meal_planner.production import pending_plan_changes, production_rollup, refresh_production_lines
+from dog_meal_planner.storage import db_session, db_write_session, init_db
+from dog_meal_planner.substitution import (
+    aafco_delta,
+    nutrient_delta,
+    parse_weights,
+    substitute_in_recipe,
+    substitution_index,
+)
+from dog_meal_planner.traffic import TrafficRecorder, recorder_options, recording_directory
 from dog_meal_planner.usda import USDAClient, ingredient_from_usda
 
 
@@ -25,12 +71,29 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 FRONTEND_DIR = BASE_DIR / "frontend"
 
 app = FastAPI(title="Dog Meal Planner")
-app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+static_assets = StaticAssetCache(FRONTEND_DIR)
 
 
 @app.on_event("startup")
 async def startup() -> None:
     init_db()
+    if jobs_enabled():
+        job_runner.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    job_runner.stop()
+
+
+# Wraps the app and every middleware added before it, so load is shed before
+# any work is done; only the traffic recorder below sits outside it.
+if admission_enabled():
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+# Outside admission control, so the capture holds the offered load including shed requests.
+if recording_directory() is not None:
+    app.add_middleware(TrafficRecorder, directory=recording_directory(), **recorder_options())
 
 
 class NutrientsPayload(BaseModel):
@@ -56,26 +119,31 @@ class IngredientPayload(BaseModel):
     nutrients_per_100g: NutrientsPayload = Field(default_factory=NutrientsPayload)
 
     def to_model(self) -> Ingredient:
-        return Ingredient(
-            name=self.name,
-            kcal_per_100g=self.kcal_per_100g,
-            nutrients_per_100g=self.nutrients_per_100g.to_model(),
+        return intern_ingredient(
+            self.name,
+            self.kcal_per_100g,
+            self.nutrients_per_100g.model_dump(),
         )
 
 
 class RecipeItemPayload(BaseModel):
-    ingredient: IngredientPayload
     grams: float
+    ingredient_id: Optional[int] = None
+    ingredient: Optional[IngredientPayload] = None
 
-    def to_model(self) -> RecipeItem:
-        return RecipeItem(ingredient=self.ingredient.to_model(), grams=self.grams)
+    def to_model(self, ingredients: Optional[Mapping[int, Ingredient]] = None) -> RecipeItem:
+        if self.ingredient is not None:
+            return RecipeItem(ingredient=self.ingredient.to_model(), grams=self.grams)
+        if self.ingredient_id is None:
+            raise HTTPException(status_code=400, detail="Recipe item requires ingredient data")
+        return RecipeItem(ingredient=(ingredients or {})[self.ingredient_id], grams=self.grams)
 
 
 class RecipePayload(BaseModel):
     items: List[RecipeItemPayload]
 
-    def to_model(self) -> Recipe:
-        return Recipe(items=[item.to_model() for item in self.items])
+    def to_model(self, ingredients: Optional[Mapping[int, Ingredient]] = None) -> Recipe:
+        return Recipe(items=[item.to_model(ingredients) for item in self.items])
 
 
 class DogPayload(BaseModel):
@@ -90,14 +158,61 @@ class DogPayload(BaseModel):
         return Dog(**self.model_dump())
 
 
-class ComputePlanPayload(BaseModel):
-    dog: DogPayload
+class PlanRequestPayload(BaseModel):
     mer_factor_key: str
-    kibble: IngredientPayload
+    kibble: Optional[IngredientPayload] = None
+    kibble_id: Optional[int] = None
     kibble_grams: float
     treats_kcal: float
-    recipe: RecipePayload
+    recipe: Optional[RecipePayload] = None
+    recipe_id: Optional[int] = None
     meals: List[str] = Field(default_factory=lambda: ["breakfast", "dinner"])
+    aafco_profile: Optional[str] = None
+
+    def resolved_aafco_profile(self) -> str:
+        if self.aafco_profile is not None:
+            return self.aafco_profile
+        return "growth" if self.mer_factor_key.startswith("puppy") else "adult_maintenance"
+
+
+class ComputePlanPayload(PlanRequestPayload):
+    dog: DogPayload
+
+
+class DogCreatePayload(DogPayload):
+    name: str
+
+
+class DogRecord(DogCreatePayload):
+    id: int
+    created_at: str
+    updated_at: str
+
+
+class DogPlanPayload(PlanRequestPayload):
+    name: str
+
+
+class MeasurementPayload(BaseModel):
+    dog_id: int
+    day: date
+    weight_kg: Optional[float] = Field(default=None, gt=0)
+    kcal_fed: Optional[float] = Field(default=None, ge=0)
+
+
+class MeasurementBatchPayload(BaseModel):
+    points: List[MeasurementPayload]
+
+
+class DogPlanRecord(BaseModel):
+    id: int
+    dog_id: int
+    name: str
+    request: Dict[str, Any]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    computed_at: str
+    created_at: str
 
 
 class IngredientRecord(BaseModel):
@@ -154,6 +269,66 @@ class PlanSummary(BaseModel):
     updated_at: str
 
 
+class PlanSearchResult(PlanSummary):
+    dog_weight_kg: Optional[float]
+    mer_factor_key: Optional[str]
+    total_kcal: Optional[float]
+    aafco_warning_count: Optional[int]
+
+
+class JobSubmitPayload(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    max_attempts: Optional[int] = Field(default=None, ge=1)
+
+
+class JobRecord(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: float
+    progress_message: Optional[str]
+    attempts: int
+    max_attempts: int
+    error: Optional[str]
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+
+
+class BackupRequestPayload(BaseModel):
+    incremental: bool = False
+
+
+class BackupRecord(BaseModel):
+    name: str
+    kind: str
+    parent: Optional[str]
+    created_at: str
+    page_size: int
+    page_count: int
+    pages_written: int
+    compressed_bytes: int
+    copy_seconds: float
+
+
+INGREDIENT_COLUMNS = (
+    "id",
+    "name",
+    "kcal_per_100g",
+    "protein_g",
+    "fat_g",
+    "carbs_g",
+    "calcium_mg",
+    "phosphorus_mg",
+    "iron_mg",
+    "zinc_mg",
+    "vitamin_a_iu",
+    "vitamin_d_iu",
+    "vitamin_e_mg",
+)
+
+
 def nutrients_from_row(row: sqlite3.Row) -> Dict[str, float]:
     return {
         "kcal": row["kcal_per_100g"],
@@ -194,6 +369,17 @@ def fetch_ingredient_or_404(conn: sqlite3.Connection, ingredient_id: int) -> sql
     return row
 
 
+def fetch_ingredient_rows(conn: sqlite3.Connection, ingredient_ids: List[int]) -> Dict[int, sqlite3.Row]:
+    if not ingredient_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in ingredient_ids)
+    rows = conn.execute(
+        f"SELECT {', '.join(INGREDIENT_COLUMNS)} FROM ingredients WHERE id IN ({placeholders})",
+        ingredient_ids,
+    ).fetchall()
+    return {row["id"]: row for row in rows}
+
+
 def insert_ingredient(conn: sqlite3.Connection, payload: IngredientPayload) -> int:
     nutrients = payload.nutrients_per_100g
     cursor = conn.execute(
@@ -282,6 +468,121 @@ def fetch_recipe_or_404(conn: sqlite3.Connection, recipe_id: int) -> Dict[str, A
     }
 
 
+def fetch_job_or_404(conn: sqlite3.Connection, job_id: int) -> sqlite3.Row:
+    row = conn.execute(
+        """
+        SELECT id, kind, status, progress, progress_message, attempts, max_attempts, error,
+               result, created_at, started_at, finished_at
+        FROM jobs
+        WHERE id = ?
+        """,
+        (job_id,),
+    ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return row
+
+
+def job_record_from_row(row: sqlite3.Row) -> JobRecord:
+    return JobRecord(**{field: row[field] for field in JobRecord.model_fields})
+
+
+def ingredient_model_from_row(row: sqlite3.Row) -> Ingredient:
+    return intern_ingredient(row["name"], row["kcal_per_100g"], nutrients_from_row(row))
+
+
+def fetch_catalog_references(
+    conn: sqlite3.Connection,
+    ingredient_ids: Set[int],
+    recipe_id: Optional[int] = None,
+) -> Tuple[Dict[int, Ingredient], Optional[List[RecipeItem]]]:
+    # One round trip for every referenced ingredient plus, when asked, the
+    # recipe's existence marker and its items.
+    columns = """
+        ingredients.id AS id, ingredients.name AS name,
+        ingredients.kcal_per_100g AS kcal_per_100g, ingredients.protein_g AS protein_g,
+        ingredients.fat_g AS fat_g, ingredients.carbs_g AS carbs_g,
+        ingredients.calcium_mg AS calcium_mg, ingredients.phosphorus_mg AS phosphorus_mg,
+        ingredients.iron_mg AS iron_mg, ingredients.zinc_mg AS zinc_mg,
+        ingredients.vitamin_a_iu AS vitamin_a_iu, ingredients.vitamin_d_iu AS vitamin_d_iu,
+        ingredients.vitamin_e_mg AS vitamin_e_mg
+    """
+    queries: List[str] = []
+    params: List[Any] = []
+    if ingredient_ids:
+        placeholders = ", ".join("?" for _ in ingredient_ids)
+        queries.append(
+            f"SELECT 'ingredient' AS source, NULL AS item_id, NULL AS grams, {columns} "
+            f"FROM ingredients WHERE ingredients.id IN ({placeholders})"
+        )
+        params.extend(sorted(ingredient_ids))
+    if recipe_id is not None:
+        queries.append(
+            "SELECT 'recipe' AS source, NULL AS item_id, NULL AS grams, "
+            + ", ".join(f"NULL AS {name}" for name in INGREDIENT_COLUMNS)
+            + " FROM recipes WHERE recipes.id = ?"
+        )
+        queries.append(
+            f"SELECT 'item' AS source, recipe_items.id AS item_id, recipe_items.grams AS grams, {columns} "
+            "FROM recipe_items JOIN ingredients ON ingredients.id = recipe_items.ingredient_id "
+            "WHERE recipe_items.recipe_id = ?"
+        )
+        params.extend([recipe_id, recipe_id])
+    if not queries:
+        return {}, None
+    rows = conn.execute(
+        " UNION ALL ".join(queries) + " ORDER BY source, item_id",
+        params,
+    ).fetchall()
+    ingredients: Dict[int, Ingredient] = {}
+    recipe_items: Optional[List[RecipeItem]] = None
+    for row in rows:
+        if row["source"] == "ingredient":
+            ingredients[row["id"]] = ingredient_model_from_row(row)
+        elif row["source"] == "recipe":
+            recipe_items = recipe_items if recipe_items is not None else []
+    if recipe_items is not None:
+        recipe_items = [
+            RecipeItem(ingredient=ingredient_model_from_row(row), grams=row["grams"])
+            for row in rows
+            if row["source"] == "item"
+        ]
+    missing = ingredient_ids - ingredients.keys()
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Ingredient not found: {', '.join(str(value) for value in sorted(missing))}",
+        )
+    if recipe_id is not None and recipe_items is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return ingredients, recipe_items
+
+
+def resolve_plan_models(
+    conn: sqlite3.Connection, payload: ComputePlanPayload
+) -> Tuple[Ingredient, Recipe]:
+    if (payload.kibble is None) == (payload.kibble_id is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of kibble or kibble_id")
+    if (payload.recipe is None) == (payload.recipe_id is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of recipe or recipe_id")
+    ingredient_ids: Set[int] = set()
+    if payload.kibble_id is not None:
+        ingredient_ids.add(payload.kibble_id)
+    if payload.recipe is not None:
+        ingredient_ids.update(
+            item.ingredient_id
+            for item in payload.recipe.items
+            if item.ingredient is None and item.ingredient_id is not None
+        )
+    ingredients, recipe_items = fetch_catalog_references(conn, ingredient_ids, payload.recipe_id)
+    kibble = payload.kibble.to_model() if payload.kibble else ingredients[payload.kibble_id]
+    if payload.recipe is not None:
+        recipe = payload.recipe.to_model(ingredients)
+    else:
+        recipe = Recipe(items=recipe_items or [])
+    return kibble, recipe
+
+
 def fetch_plan_or_404(conn: sqlite3.Connection, plan_id: int) -> sqlite3.Row:
     row = conn.execute(
         "SELECT id, name, payload, created_at, updated_at FROM plans WHERE id = ?",
@@ -292,28 +593,117 @@ def fetch_plan_or_404(conn: sqlite3.Connection, plan_id: int) -> sqlite3.Row:
     return row
 
 
+def fetch_dog_or_404(conn: sqlite3.Connection, dog_id: int) -> sqlite3.Row:
+    row = conn.execute("SELECT * FROM dogs WHERE id = ?", (dog_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Dog not found")
+    return row
+
+
+def dog_record_from_row(row: sqlite3.Row) -> DogRecord:
+    return DogRecord(
+        id=row["id"],
+        name=row["name"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        **dog_fields(row),
+    )
+
+
+def fetch_dog_plan_or_404(conn: sqlite3.Connection, plan_id: int) -> DogPlanRecord:
+    row = conn.execute("SELECT * FROM dog_plans WHERE id = ?", (plan_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Dog plan not found")
+    return DogPlanRecord(
+        id=row["id"],
+        dog_id=row["dog_id"],
+        name=row["name"],
+        request=json.loads(row["request"]),
+        result=json.loads(row["result"]) if row["result"] is not None else None,
+        error=row["error"],
+        computed_at=row["computed_at"],
+        created_at=row["created_at"],
+    )
+
+
+def compute_dog_plan(conn: sqlite3.Connection, dog: Dict[str, Any], request: Dict[str, Any]) -> dict:
+    try:
+        return compute_plan_response(conn, ComputePlanPayload(dog=DogPayload(**dog), **request))
+    except HTTPException as exc:
+        raise ValueError(exc.detail) from exc
+
+
+def replan_dependents(response: Response, conn: sqlite3.Connection, **changed: List[int]) -> int:
+    replanned = replan(conn, dependent_plan_ids(conn, **changed), compute_dog_plan)
+    response.headers["X-Replanned-Plans"] = str(replanned)
+    return replanned
+
+
+def asset_response(request: Request, asset: StaticAsset, immutable: bool) -> Response:
+    status_code, body, headers = asset_response_parts(
+        asset,
+        request.headers.get("accept-encoding", ""),
+        request.headers.get("if-none-match"),
+        immutable,
+    )
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type=asset.media_type if status_code == 200 else None,
+    )
+
+
+def catalog_not_modified(
+    request: Request,
+    response: Response,
+    conn: sqlite3.Connection,
+    tables: Iterable[str],
+) -> Optional[Response]:
+    headers = catalog_validators(conn, tables)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
 
 
 @app.get("/")
-async def frontend() -> FileResponse:
-    return FileResponse(FRONTEND_DIR / "index.html")
+async def frontend(request: Request) -> Response:
+    asset = static_assets.index()
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Frontend not found")
+    return asset_response(request, asset, immutable=False)
 
 
-@app.post("/compute-plan")
-async def compute_plan(payload: ComputePlanPayload) -> dict:
+@app.get("/static/{asset_path:path}")
+async def static_asset(request: Request, asset_path: str, v: Optional[str] = None) -> Response:
+    asset = static_assets.get(asset_path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return asset_response(request, asset, immutable=v == asset.digest)
+
+
+def compute_plan_response(conn: sqlite3.Connection, payload: ComputePlanPayload) -> dict:
     if payload.mer_factor_key not in MER_FACTORS:
         raise HTTPException(status_code=400, detail="Unknown mer_factor_key")
+    aafco_profile = payload.resolved_aafco_profile()
+    if aafco_profile not in AAFCO_PROFILES:
+        raise HTTPException(status_code=400, detail="Unknown aafco_profile")
+    kibble, recipe = resolve_plan_models(conn, payload)
     plan = compute_meal_plan(
         dog=payload.dog.to_model(),
         mer_factor=MER_FACTORS[payload.mer_factor_key],
-        kibble=payload.kibble.to_model(),
+        kibble=kibble,
         kibble_grams=payload.kibble_grams,
         treats_kcal=payload.treats_kcal,
-        recipe=payload.recipe.to_model(),
+        recipe=recipe,
         meals=tuple(payload.meals),
+        aafco_profile=aafco_profile,
     )
     return {
         "target_kcal": plan.target_kcal,
@@ -321,13 +711,24 @@ async def compute_plan(payload: ComputePlanPayload) -> dict:
         "treats_kcal": plan.treats_kcal,
         "homemade_kcal_budget": plan.homemade_kcal_budget,
         "total_kcal": plan.total_kcal,
-        "nutrients_total": plan.nutrients_total.__dict__,
-        "nutrients_per_1000_kcal": plan.nutrients_per_1000_kcal.__dict__,
+        "nutrients_total": plan.nutrients_total.to_dict(),
+        "nutrients_per_1000_kcal": plan.nutrients_per_1000_kcal.to_dict(),
+        "aafco_profile": aafco_profile,
         "aafco_warnings": plan.aafco_warnings,
         "per_meal_grams": plan.per_meal_grams,
     }
 
 
+# The heavier endpoints are plain functions so FastAPI runs them in its threadpool
+# and the event loop keeps answering /health and /rer while they compute.
+@app.post("/compute-plan")
+def compute_plan(
+    payload: ComputePlanPayload,
+    conn: sqlite3.Connection = Depends(db_session),
+) -> dict:
+    return compute_plan_response(conn, payload)
+
+
 class USDAIngredientPayload(BaseModel):
     api_key: str
     fdc_id: int
@@ -336,7 +737,7 @@ class USDAIngredientPayload(BaseModel):
 
 
 @app.post("/ingredient/from-usda")
-async def ingredient_from_usda_endpoint(
+def ingredient_from_usda_endpoint(
     payload: USDAIngredientPayload,
     conn: sqlite3.Connection = Depends(db_session),
 ) -> dict:
@@ -346,13 +747,13 @@ async def ingredient_from_usda_endpoint(
     response = {
         "name": ingredient.name,
         "kcal_per_100g": ingredient.kcal_per_100g,
-        "nutrients_per_100g": ingredient.nutrients_per_100g.__dict__,
+        "nutrients_per_100g": ingredient.nutrients_per_100g.to_dict(),
     }
     if payload.save:
         ingredient_payload = IngredientPayload(
             name=ingredient.name,
             kcal_per_100g=ingredient.kcal_per_100g,
-            nutrients_per_100g=NutrientsPayload(**ingredient.nutrients_per_100g.__dict__),
+            nutrients_per_100g=NutrientsPayload(**ingredient.nutrients_per_100g.to_dict()),
         )
         response["id"] = insert_ingredient(conn, ingredient_payload)
     return response
@@ -364,17 +765,26 @@ async def ingredient_manual(payload: IngredientPayload) -> dict:
     return {
         "name": ingredient.name,
         "kcal_per_100g": ingredient.kcal_per_100g,
-        "nutrients_per_100g": ingredient.nutrients_per_100g.__dict__,
+        "nutrients_per_100g": ingredient.nutrients_per_100g.to_dict(),
     }
 
 
 @app.post("/recipe")
-async def recipe_endpoint(payload: RecipePayload) -> dict:
-    recipe = payload.to_model()
+def recipe_endpoint(
+    payload: RecipePayload,
+    conn: sqlite3.Connection = Depends(db_session),
+) -> dict:
+    ingredient_ids = {
+        item.ingredient_id
+        for item in payload.items
+        if item.ingredient is None and item.ingredient_id is not None
+    }
+    ingredients, _ = fetch_catalog_references(conn, ingredient_ids)
+    recipe = payload.to_model(ingredients)
     nutrients = recipe.total_nutrients()
     return {
         "kcal": nutrients.kcal,
-        "nutrients": nutrients.__dict__,
+        "nutrients": nutrients.to_dict(),
     }
 
 
@@ -400,7 +810,7 @@ async def rer_with_unit(weight: float, unit: str = "kg") -> dict:
 @app.post("/ingredients", response_model=IngredientRecord)
 async def create_ingredient(
     payload: IngredientPayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> IngredientRecord:
     ingredient_id = insert_ingredient(conn, payload)
     row = fetch_ingredient_or_404(conn, ingredient_id)
@@ -409,8 +819,13 @@ async def create_ingredient(
 
 @app.get("/ingredients", response_model=List[IngredientRecord])
 async def list_ingredients(
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> List[IngredientRecord]:
+) -> Union[List[IngredientRecord], Response]:
+    not_modified = catalog_not_modified(request, response, conn, ["ingredients"])
+    if not_modified:
+        return not_modified
     rows = conn.execute(
         """
         SELECT id, name, kcal_per_100g, protein_g, fat_g, carbs_g, calcium_mg, phosphorus_mg,
@@ -422,20 +837,130 @@ async def list_ingredients(
     return [IngredientRecord(**ingredient_from_row(row)) for row in rows]
 
 
+@app.get("/ingredients/search", response_model=List[IngredientRecord])
+async def search_ingredients(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_SEARCH_LIMIT),
+    conn: sqlite3.Connection = Depends(db_session),
+) -> Union[List[IngredientRecord], Response]:
+    # Nutrient bounds are per 100 kcal, e.g. ?calcium_mg_min=150&phosphorus_mg_max=120.
+    bounds = {key: value for key, value in request.query_params.items() if key != "limit"}
+    try:
+        ranges = parse_density_ranges(bounds)
+        if not ranges:
+            raise ValueError("Provide at least one nutrient range")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    not_modified = catalog_not_modified(request, response, conn, ["ingredients"])
+    if not_modified:
+        return not_modified
+    rows = search_by_density(conn, ranges, INGREDIENT_COLUMNS, limit)
+    return [IngredientRecord(**ingredient_from_row(row)) for row in rows]
+
+
 @app.get("/ingredients/{ingredient_id}", response_model=IngredientRecord)
 async def get_ingredient(
     ingredient_id: int,
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> IngredientRecord:
+) -> Union[IngredientRecord, Response]:
+    not_modified = catalog_not_modified(request, response, conn, ["ingredients"])
+    if not_modified:
+        return not_modified
     row = fetch_ingredient_or_404(conn, ingredient_id)
     return IngredientRecord(**ingredient_from_row(row))
 
 
+@app.get("/ingredients/{ingredient_id}/substitutes", response_model=None)
+def ingredient_substitutes(
+    ingredient_id: int,
+    request: Request,
+    response: Response,
+    k: int = Query(5, ge=1, le=MAX_SEARCH_LIMIT),
+    recipe_id: Optional[int] = None,
+    aafco_profile: str = "adult_maintenance",
+    conn: sqlite3.Connection = Depends(db_session),
+) -> Union[dict, Response]:
+    # Optional per-nutrient weights, e.g. ?calcium_mg_weight=4&vitamin_a_iu_weight=0.
+    reserved = {"k", "recipe_id", "aafco_profile"}
+    try:
+        weights = parse_weights(
+            {key: value for key, value in request.query_params.items() if key not in reserved}
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if aafco_profile not in AAFCO_PROFILES:
+        raise HTTPException(status_code=400, detail="Unknown aafco_profile")
+    not_modified = catalog_not_modified(
+        request, response, conn, ["ingredients", "recipes", "recipe_items"]
+    )
+    if not_modified:
+        return not_modified
+    row = fetch_ingredient_or_404(conn, ingredient_id)
+    substitution_index.sync(conn)
+    query = substitution_index.vector(ingredient_id)
+    if query is None:
+        raise HTTPException(status_code=400, detail="Ingredient has no calories to compare")
+    neighbours = substitution_index.nearest(query, k, weights, exclude={ingredient_id})
+    rows = fetch_ingredient_rows(conn, [ident for _, ident in neighbours])
+    neighbours = [(distance, ident) for distance, ident in neighbours if ident in rows]
+    result: Dict[str, Any] = {
+        "ingredient": IngredientRecord(**ingredient_from_row(row)),
+        "aafco_profile": aafco_profile,
+        "substitutes": [
+            {"ingredient": IngredientRecord(**ingredient_from_row(rows[ident])), "distance": distance}
+            for distance, ident in neighbours
+        ],
+    }
+    if recipe_id is None:
+        return result
+
+    items = [
+        (
+            item["ingredient"]["id"],
+            RecipeItem(
+                ingredient=intern_ingredient(
+                    item["ingredient"]["name"],
+                    item["ingredient"]["kcal_per_100g"],
+                    item["ingredient"]["nutrients_per_100g"],
+                ),
+                grams=item["grams"],
+            ),
+        )
+        for item in fetch_recipe_or_404(conn, recipe_id)["items"]
+    ]
+    if all(ident != ingredient_id for ident, _ in items):
+        raise HTTPException(status_code=400, detail="Ingredient is not part of the recipe")
+    baseline = normalize_per_1000_kcal(Recipe(items=[item for _, item in items]).total_nutrients())
+    swapped = [
+        substitute_in_recipe(items, ingredient_id, ingredient_model_from_row(rows[ident]))
+        for _, ident in neighbours
+    ]
+    per_1000 = [normalize_per_1000_kcal(recipe.total_nutrients()) for recipe, _ in swapped]
+    warnings = evaluate_aafco_batch(
+        [baseline.to_tuple()] + [nutrients.to_tuple() for nutrients in per_1000],
+        COMPILED_PROFILES[aafco_profile],
+    )
+    result["recipe_id"] = recipe_id
+    result["aafco_warnings"] = warnings[0]
+    for entry, (_, grams), nutrients, substitute_warnings in zip(
+        result["substitutes"], swapped, per_1000, warnings[1:]
+    ):
+        entry["grams"] = grams
+        entry["aafco_warnings"] = substitute_warnings
+        entry["aafco_delta"] = aafco_delta(warnings[0], substitute_warnings)
+        entry["nutrients_per_1000_kcal_delta"] = nutrient_delta(baseline, nutrients)
+    return result
+
+
 @app.put("/ingredients/{ingredient_id}", response_model=IngredientRecord)
-async def update_ingredient(
+def update_ingredient(
     ingredient_id: int,
     payload: IngredientPayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    response: Response,
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> IngredientRecord:
     nutrients = payload.nutrients_per_100g
     cursor = conn.execute(
@@ -464,6 +989,7 @@ async def update_ingredient(
     )
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="Ingredient not found")
+    replan_dependents(response, conn, ingredient_ids=[ingredient_id])
     row = fetch_ingredient_or_404(conn, ingredient_id)
     return IngredientRecord(**ingredient_from_row(row))
 
@@ -471,8 +997,10 @@ async def update_ingredient(
 @app.delete("/ingredients/{ingredient_id}")
 async def delete_ingredient(
     ingredient_id: int,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> dict:
+    if dependent_plan_ids(conn, ingredient_ids=[ingredient_id]):
+        raise HTTPException(status_code=409, detail="Ingredient is used by a dog plan")
     try:
         cursor = conn.execute("DELETE FROM ingredients WHERE id = ?", (ingredient_id,))
     except sqlite3.IntegrityError as exc:
@@ -488,7 +1016,7 @@ async def delete_ingredient(
 @app.post("/recipes", response_model=RecipeRecord)
 async def create_recipe(
     payload: RecipeCreatePayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> RecipeRecord:
     cursor = conn.execute("INSERT INTO recipes (name) VALUES (?)", (payload.name,))
     recipe_id = int(cursor.lastrowid)
@@ -503,8 +1031,13 @@ async def create_recipe(
 
 @app.get("/recipes", response_model=List[RecipeSummary])
 async def list_recipes(
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> List[RecipeSummary]:
+) -> Union[List[RecipeSummary], Response]:
+    not_modified = catalog_not_modified(request, response, conn, ["recipes"])
+    if not_modified:
+        return not_modified
     rows = conn.execute("SELECT id, name FROM recipes ORDER BY name").fetchall()
     return [RecipeSummary(id=row["id"], name=row["name"]) for row in rows]
 
@@ -512,16 +1045,24 @@ async def list_recipes(
 @app.get("/recipes/{recipe_id}", response_model=RecipeRecord)
 async def get_recipe(
     recipe_id: int,
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> RecipeRecord:
+) -> Union[RecipeRecord, Response]:
+    not_modified = catalog_not_modified(
+        request, response, conn, ["recipes", "recipe_items", "ingredients"]
+    )
+    if not_modified:
+        return not_modified
     return RecipeRecord(**fetch_recipe_or_404(conn, recipe_id))
 
 
 @app.put("/recipes/{recipe_id}", response_model=RecipeRecord)
-async def update_recipe(
+def update_recipe(
     recipe_id: int,
     payload: RecipeCreatePayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    response: Response,
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> RecipeRecord:
     cursor = conn.execute("UPDATE recipes SET name = ? WHERE id = ?", (payload.name, recipe_id))
     if cursor.rowcount == 0:
@@ -533,14 +1074,17 @@ async def update_recipe(
             "INSERT INTO recipe_items (recipe_id, ingredient_id, grams) VALUES (?, ?, ?)",
             (recipe_id, ingredient_id, item.grams),
         )
+    replan_dependents(response, conn, recipe_ids=[recipe_id])
     return RecipeRecord(**fetch_recipe_or_404(conn, recipe_id))
 
 
 @app.delete("/recipes/{recipe_id}")
 async def delete_recipe(
     recipe_id: int,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> dict:
+    if dependent_plan_ids(conn, recipe_ids=[recipe_id]):
+        raise HTTPException(status_code=409, detail="Recipe is used by a dog plan")
     conn.execute("DELETE FROM recipe_items WHERE recipe_id = ?", (recipe_id,))
     cursor = conn.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
     if cursor.rowcount == 0:
@@ -551,20 +1095,21 @@ async def delete_recipe(
 @app.post("/plans", response_model=PlanRecord)
 async def create_plan(
     payload: PlanPayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> PlanRecord:
     payload_json = json.dumps(payload.payload, ensure_ascii=True)
+    warning_count = aafco_warning_count(payload.payload)
     existing = conn.execute("SELECT id FROM plans WHERE name = ?", (payload.name,)).fetchone()
     if existing:
         conn.execute(
-            "UPDATE plans SET payload = ?, updated_at = datetime('now') WHERE id = ?",
-            (payload_json, existing["id"]),
+            "UPDATE plans SET payload = ?, aafco_warning_count = ?, updated_at = datetime('now') WHERE id = ?",
+            (payload_json, warning_count, existing["id"]),
         )
         plan_id = existing["id"]
     else:
         cursor = conn.execute(
-            "INSERT INTO plans (name, payload) VALUES (?, ?)",
-            (payload.name, payload_json),
+            "INSERT INTO plans (name, payload, aafco_warning_count) VALUES (?, ?, ?)",
+            (payload.name, payload_json, warning_count),
         )
         plan_id = int(cursor.lastrowid)
     row = fetch_plan_or_404(conn, plan_id)
@@ -579,19 +1124,63 @@ async def create_plan(
 
 @app.get("/plans", response_model=List[PlanSummary])
 async def list_plans(
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> List[PlanSummary]:
+) -> Union[List[PlanSummary], Response]:
+    not_modified = catalog_not_modified(request, response, conn, ["plans"])
+    if not_modified:
+        return not_modified
     rows = conn.execute(
         "SELECT id, name, updated_at FROM plans ORDER BY updated_at DESC"
     ).fetchall()
     return [PlanSummary(id=row["id"], name=row["name"], updated_at=row["updated_at"]) for row in rows]
 
 
+@app.get("/plans/search", response_model=List[PlanSearchResult])
+async def search_saved_plans(
+    request: Request,
+    response: Response,
+    min_dog_weight_kg: Optional[float] = Query(None, ge=0),
+    max_dog_weight_kg: Optional[float] = Query(None, ge=0),
+    mer_factor_key: Optional[str] = None,
+    min_total_kcal: Optional[float] = Query(None, ge=0),
+    max_total_kcal: Optional[float] = Query(None, ge=0),
+    min_aafco_warnings: Optional[int] = Query(None, ge=0),
+    max_aafco_warnings: Optional[int] = Query(None, ge=0),
+    sort: str = "-updated_at",
+    limit: int = Query(100, ge=1, le=MAX_PLAN_SEARCH_LIMIT),
+    conn: sqlite3.Connection = Depends(db_session),
+) -> Union[List[PlanSearchResult], Response]:
+    filters = PlanFilters(
+        min_dog_weight_kg=min_dog_weight_kg,
+        max_dog_weight_kg=max_dog_weight_kg,
+        mer_factor_key=mer_factor_key,
+        min_total_kcal=min_total_kcal,
+        max_total_kcal=max_total_kcal,
+        min_aafco_warnings=min_aafco_warnings,
+        max_aafco_warnings=max_aafco_warnings,
+    )
+    not_modified = catalog_not_modified(request, response, conn, ["plans"])
+    if not_modified:
+        return not_modified
+    try:
+        rows = search_plans(conn, filters, sort, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return [PlanSearchResult(**row) for row in rows]
+
+
 @app.get("/plans/{plan_id}", response_model=PlanRecord)
 async def get_plan(
     plan_id: int,
+    request: Request,
+    response: Response,
     conn: sqlite3.Connection = Depends(db_session),
-) -> PlanRecord:
+) -> Union[PlanRecord, Response]:
+    not_modified = catalog_not_modified(request, response, conn, ["plans"])
+    if not_modified:
+        return not_modified
     row = fetch_plan_or_404(conn, plan_id)
     return PlanRecord(
         id=row["id"],
@@ -606,17 +1195,17 @@ async def get_plan(
 async def update_plan(
     plan_id: int,
     payload: PlanPayload,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> PlanRecord:
     payload_json = json.dumps(payload.payload, ensure_ascii=True)
     try:
         cursor = conn.execute(
             """
             UPDATE plans
-            SET name = ?, payload = ?, updated_at = datetime('now')
+            SET name = ?, payload = ?, aafco_warning_count = ?, updated_at = datetime('now')
             WHERE id = ?
             """,
-            (payload.name, payload_json, plan_id),
+            (payload.name, payload_json, aafco_warning_count(payload.payload), plan_id),
         )
     except sqlite3.IntegrityError as exc:
         raise HTTPException(status_code=409, detail="Plan name already exists") from exc
@@ -635,9 +1224,253 @@ async def update_plan(
 @app.delete("/plans/{plan_id}")
 async def delete_plan(
     plan_id: int,
-    conn: sqlite3.Connection = Depends(db_session),
+    conn: sqlite3.Connection = Depends(db_write_session),
 ) -> dict:
     cursor = conn.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="Plan not found")
     return {"status": "deleted"}
+
+
+@app.post("/dogs", response_model=DogRecord)
+async def create_dog(
+    payload: DogCreatePayload,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> DogRecord:
+    cursor = conn.execute(
+        f"INSERT INTO dogs (name, {', '.join(DOG_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (payload.name, *(getattr(payload, name) for name in DOG_FIELDS)),
+    )
+    return dog_record_from_row(fetch_dog_or_404(conn, int(cursor.lastrowid)))
+
+
+@app.get("/dogs", response_model=List[DogRecord])
+async def list_dogs(conn: sqlite3.Connection = Depends(db_session)) -> List[DogRecord]:
+    rows = conn.execute("SELECT * FROM dogs ORDER BY name, id").fetchall()
+    return [dog_record_from_row(row) for row in rows]
+
+
+@app.get("/dogs/{dog_id}", response_model=DogRecord)
+async def get_dog(dog_id: int, conn: sqlite3.Connection = Depends(db_session)) -> DogRecord:
+    return dog_record_from_row(fetch_dog_or_404(conn, dog_id))
+
+
+@app.put("/dogs/{dog_id}", response_model=DogRecord)
+def update_dog(
+    dog_id: int,
+    payload: DogCreatePayload,
+    response: Response,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> DogRecord:
+    cursor = conn.execute(
+        f"""
+        UPDATE dogs
+        SET name = ?, {', '.join(f'{name} = ?' for name in DOG_FIELDS)}, updated_at = datetime('now')
+        WHERE id = ?
+        """,
+        (payload.name, *(getattr(payload, name) for name in DOG_FIELDS), dog_id),
+    )
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Dog not found")
+    replan_dependents(response, conn, dog_ids=[dog_id])
+    return dog_record_from_row(fetch_dog_or_404(conn, dog_id))
+
+
+@app.delete("/dogs/{dog_id}")
+async def delete_dog(
+    dog_id: int,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> dict:
+    cursor = conn.execute("DELETE FROM dogs WHERE id = ?", (dog_id,))
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Dog not found")
+    return {"status": "deleted"}
+
+
+@app.post("/dogs/{dog_id}/plans", response_model=DogPlanRecord)
+def create_dog_plan(
+    dog_id: int,
+    payload: DogPlanPayload,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> DogPlanRecord:
+    dog = fetch_dog_or_404(conn, dog_id)
+    request = payload.model_dump(exclude={"name"})
+    result = compute_plan_response(conn, ComputePlanPayload(dog=DogPayload(**dog_fields(dog)), **request))
+    cursor = conn.execute(
+        "INSERT INTO dog_plans (dog_id, name, request, result) VALUES (?, ?, ?, ?)",
+        (dog_id, payload.name, json.dumps(request), json.dumps(result)),
+    )
+    plan_id = int(cursor.lastrowid)
+    record_dependencies(conn, plan_id, request)
+    return fetch_dog_plan_or_404(conn, plan_id)
+
+
+@app.get("/dogs/{dog_id}/plans", response_model=List[DogPlanRecord])
+async def list_dog_plans(dog_id: int, conn: sqlite3.Connection = Depends(db_session)) -> List[DogPlanRecord]:
+    fetch_dog_or_404(conn, dog_id)
+    rows = conn.execute("SELECT id FROM dog_plans WHERE dog_id = ? ORDER BY id", (dog_id,)).fetchall()
+    return [fetch_dog_plan_or_404(conn, row["id"]) for row in rows]
+
+
+@app.get("/dog-plans/{plan_id}", response_model=DogPlanRecord)
+async def get_dog_plan(plan_id: int, conn: sqlite3.Connection = Depends(db_session)) -> DogPlanRecord:
+    return fetch_dog_plan_or_404(conn, plan_id)
+
+
+@app.delete("/dog-plans/{plan_id}")
+async def delete_dog_plan(
+    plan_id: int,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> dict:
+    cursor = conn.execute("DELETE FROM dog_plans WHERE id = ?", (plan_id,))
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Dog plan not found")
+    return {"status": "deleted"}
+
+
+@app.post("/measurements")
+def ingest_measurements_endpoint(
+    payload: MeasurementBatchPayload,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> dict:
+    dog_ids = sorted({point.dog_id for point in payload.points})
+    known = {
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM dogs WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(dog_ids),)
+        )
+    }
+    missing = [dog_id for dog_id in dog_ids if dog_id not in known]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Dog not found: {', '.join(str(value) for value in missing)}")
+    ingested, rejected = ingest_measurements(
+        conn,
+        (MeasurementPoint(**point.model_dump()) for point in payload.points),
+        date.today(),
+    )
+    return {"ingested": ingested, "rejected": rejected}
+
+
+@app.get("/dogs/{dog_id}/measurements")
+async def dog_measurements(
+    dog_id: int,
+    period: str = "week",
+    since: Optional[date] = None,
+    conn: sqlite3.Connection = Depends(db_session),
+) -> List[dict]:
+    fetch_dog_or_404(conn, dog_id)
+    try:
+        return measurement_series(conn, dog_id, period, since or date.today() - timedelta(days=90))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/dogs/{dog_id}/mer-trend")
+async def dog_mer_trend(
+    dog_id: int,
+    weeks: int = Query(8, ge=2, le=104),
+    conn: sqlite3.Connection = Depends(db_session),
+) -> dict:
+    dog = fetch_dog_or_404(conn, dog_id)
+    return mer_trend(conn, dog_id, dog["target_weight_kg"], weeks, date.today())
+
+
+@app.get("/production")
+def production_sheet(
+    conn: sqlite3.Connection = Depends(db_session),
+) -> dict:
+    # Batch-prep sheet: grams per ingredient per day and per meal across all
+    # plans as of the last refresh; pending_plans counts changes since then.
+    return {"pending_plans": pending_plan_changes(conn), **production_rollup(conn)}
+
+
+@app.post("/production/refresh")
+def refresh_production_sheet(
+    mode: str = "incremental",
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> dict:
+    if mode not in ("incremental", "full"):
+        raise HTTPException(status_code=400, detail="mode must be incremental or full")
+    return {"mode": mode, "refreshed_plans": refresh_production_lines(conn, full=mode == "full")}
+
+
+@app.post("/jobs", response_model=JobRecord, status_code=202)
+async def create_job(
+    payload: JobSubmitPayload,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> JobRecord:
+    if payload.kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail="Unknown job kind")
+    try:
+        job_id = submit_job(conn, payload.kind, payload.payload, payload.max_attempts)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except JobConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    row = fetch_job_or_404(conn, job_id)
+    conn.commit()
+    job_runner.wake()
+    return job_record_from_row(row)
+
+
+@app.get("/jobs/{job_id}", response_model=JobRecord)
+async def get_job(
+    job_id: int,
+    conn: sqlite3.Connection = Depends(db_session),
+) -> JobRecord:
+    return job_record_from_row(fetch_job_or_404(conn, job_id))
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: int,
+    conn: sqlite3.Connection = Depends(db_session),
+) -> dict:
+    row = fetch_job_or_404(conn, job_id)
+    if row["status"] not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is {row['status']}")
+    if row["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=row["error"] or f"Job {row['status']}")
+    return json.loads(row["result"])
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=JobRecord)
+async def cancel_job_endpoint(
+    job_id: int,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> JobRecord:
+    if cancel_job(conn, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_record_from_row(fetch_job_or_404(conn, job_id))
+
+
+@app.post("/admin/backups", response_model=JobRecord, status_code=202)
+async def create_backup_job(
+    payload: BackupRequestPayload,
+    conn: sqlite3.Connection = Depends(db_write_session),
+) -> JobRecord:
+    # Runs as a job; the job result is the backup's manifest.
+    try:
+        job_id = submit_job(conn, "backup", {"incremental": payload.incremental})
+    except JobConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    row = fetch_job_or_404(conn, job_id)
+    conn.commit()
+    job_runner.wake()
+    return job_record_from_row(row)
+
+
+@app.get("/admin/backups", response_model=List[BackupRecord])
+def list_backup_records() -> List[BackupRecord]:
+    return [BackupRecord(**asdict(manifest)) for manifest in list_backups()]
+
+
+@app.post("/admin/backups/{name}/restore", response_model=BackupRecord)
+def restore_backup_endpoint(name: str) -> BackupRecord:
+    try:
+        manifest = restore_backup(name)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail="Backup not found") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return BackupRecord(**asdict(manifest))
@@ -30,10 +30,383 @@ CREATE TABLE IF NOT EXISTS recipe_items (
     FOREIGN KEY(ingredient_id) REFERENCES ingredients(id)
 );
 
+CREATE INDEX IF NOT EXISTS recipe_items_recipe ON recipe_items (recipe_id);
+
+-- The generated columns read both payload shapes: /compute-plan requests
+-- (dog.weight_kg, mer_factor_key) and the frontend's raw form fields, with
+-- totals from the compute response saved under result (or at the top level).
+-- aafco_warning_count is set when the plan is saved (plan_search.
+-- aafco_warning_count), since counting object keys needs json_each, which a
+-- generated column cannot use.
 CREATE TABLE IF NOT EXISTS plans (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL UNIQUE,
     payload TEXT NOT NULL,
     created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    dog_weight_kg REAL GENERATED ALWAYS AS (
+        coalesce(
+            json_extract(payload, '$.dog.weight_kg'),
+            CAST(nullif(json_extract(payload, '$.fields."dog-weight"'), '') AS REAL)
+                * CASE json_extract(payload, '$.fields."weight-unit"') WHEN 'lb' THEN 0.45359237 ELSE 1.0 END
+        )
+    ) STORED,
+    mer_factor_key TEXT GENERATED ALWAYS AS (
+        coalesce(json_extract(payload, '$.mer_factor_key'), json_extract(payload, '$.fields."mer-factor"'))
+    ) STORED,
+    total_kcal REAL GENERATED ALWAYS AS (
+        coalesce(json_extract(payload, '$.result.total_kcal'), json_extract(payload, '$.total_kcal'))
+    ) STORED,
+    aafco_warning_count INTEGER
+);
+
+-- Stored rather than virtual so search results are read from the row
+-- without parsing the payload again.
+CREATE INDEX IF NOT EXISTS plans_dog_weight ON plans (dog_weight_kg);
+CREATE INDEX IF NOT EXISTS plans_mer_factor ON plans (mer_factor_key);
+CREATE INDEX IF NOT EXISTS plans_total_kcal ON plans (total_kcal);
+CREATE INDEX IF NOT EXISTS plans_aafco_warnings ON plans (aafco_warning_count);
+CREATE INDEX IF NOT EXISTS plans_updated ON plans (updated_at);
+
+-- Per-table change counters; triggers below bump them on every write so
+-- catalog reads can be validated without scanning the tables.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    epoch TEXT NOT NULL DEFAULT (lower(hex(randomblob(8)))),
     updated_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
+
+INSERT OR IGNORE INTO table_versions (table_name)
+VALUES ('ingredients'), ('recipes'), ('recipe_items'), ('plans');
+
+CREATE TRIGGER IF NOT EXISTS ingredients_version_insert AFTER INSERT ON ingredients
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'ingredients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_version_update AFTER UPDATE ON ingredients
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'ingredients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_version_delete AFTER DELETE ON ingredients
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'ingredients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipes_version_insert AFTER INSERT ON recipes
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipes_version_update AFTER UPDATE ON recipes
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipes_version_delete AFTER DELETE ON recipes
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_items_version_insert AFTER INSERT ON recipe_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipe_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_items_version_update AFTER UPDATE ON recipe_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipe_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_items_version_delete AFTER DELETE ON recipe_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'recipe_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS plans_version_insert AFTER INSERT ON plans
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'plans';
+END;
+
+CREATE TRIGGER IF NOT EXISTS plans_version_update AFTER UPDATE ON plans
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'plans';
+END;
+
+CREATE TRIGGER IF NOT EXISTS plans_version_delete AFTER DELETE ON plans
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+    WHERE table_name = 'plans';
+END;
+
+-- Nutrient density per 100 kcal, indexed for range queries. R*Tree tables
+-- hold at most five dimensions, so the ten nutrients are split in two.
+-- Ingredients without calories have no density and are not indexed.
+CREATE VIRTUAL TABLE IF NOT EXISTS ingredient_density_macros USING rtree(
+    id,
+    protein_g_min, protein_g_max,
+    fat_g_min, fat_g_max,
+    carbs_g_min, carbs_g_max,
+    calcium_mg_min, calcium_mg_max,
+    phosphorus_mg_min, phosphorus_mg_max
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS ingredient_density_micros USING rtree(
+    id,
+    iron_mg_min, iron_mg_max,
+    zinc_mg_min, zinc_mg_max,
+    vitamin_a_iu_min, vitamin_a_iu_max,
+    vitamin_d_iu_min, vitamin_d_iu_max,
+    vitamin_e_mg_min, vitamin_e_mg_max
+);
+
+CREATE TRIGGER IF NOT EXISTS ingredients_density_insert AFTER INSERT ON ingredients
+WHEN NEW.kcal_per_100g > 0
+BEGIN
+    INSERT INTO ingredient_density_macros
+    SELECT NEW.id,
+        NEW.protein_g * 100.0 / NEW.kcal_per_100g, NEW.protein_g * 100.0 / NEW.kcal_per_100g,
+        NEW.fat_g * 100.0 / NEW.kcal_per_100g, NEW.fat_g * 100.0 / NEW.kcal_per_100g,
+        NEW.carbs_g * 100.0 / NEW.kcal_per_100g, NEW.carbs_g * 100.0 / NEW.kcal_per_100g,
+        NEW.calcium_mg * 100.0 / NEW.kcal_per_100g, NEW.calcium_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.phosphorus_mg * 100.0 / NEW.kcal_per_100g, NEW.phosphorus_mg * 100.0 / NEW.kcal_per_100g;
+    INSERT INTO ingredient_density_micros
+    SELECT NEW.id,
+        NEW.iron_mg * 100.0 / NEW.kcal_per_100g, NEW.iron_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.zinc_mg * 100.0 / NEW.kcal_per_100g, NEW.zinc_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_a_iu * 100.0 / NEW.kcal_per_100g, NEW.vitamin_a_iu * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_d_iu * 100.0 / NEW.kcal_per_100g, NEW.vitamin_d_iu * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_e_mg * 100.0 / NEW.kcal_per_100g, NEW.vitamin_e_mg * 100.0 / NEW.kcal_per_100g;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_density_update AFTER UPDATE ON ingredients
+BEGIN
+    DELETE FROM ingredient_density_macros WHERE id = OLD.id;
+    DELETE FROM ingredient_density_micros WHERE id = OLD.id;
+    INSERT INTO ingredient_density_macros
+    SELECT NEW.id,
+        NEW.protein_g * 100.0 / NEW.kcal_per_100g, NEW.protein_g * 100.0 / NEW.kcal_per_100g,
+        NEW.fat_g * 100.0 / NEW.kcal_per_100g, NEW.fat_g * 100.0 / NEW.kcal_per_100g,
+        NEW.carbs_g * 100.0 / NEW.kcal_per_100g, NEW.carbs_g * 100.0 / NEW.kcal_per_100g,
+        NEW.calcium_mg * 100.0 / NEW.kcal_per_100g, NEW.calcium_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.phosphorus_mg * 100.0 / NEW.kcal_per_100g, NEW.phosphorus_mg * 100.0 / NEW.kcal_per_100g
+    WHERE NEW.kcal_per_100g > 0;
+    INSERT INTO ingredient_density_micros
+    SELECT NEW.id,
+        NEW.iron_mg * 100.0 / NEW.kcal_per_100g, NEW.iron_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.zinc_mg * 100.0 / NEW.kcal_per_100g, NEW.zinc_mg * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_a_iu * 100.0 / NEW.kcal_per_100g, NEW.vitamin_a_iu * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_d_iu * 100.0 / NEW.kcal_per_100g, NEW.vitamin_d_iu * 100.0 / NEW.kcal_per_100g,
+        NEW.vitamin_e_mg * 100.0 / NEW.kcal_per_100g, NEW.vitamin_e_mg * 100.0 / NEW.kcal_per_100g
+    WHERE NEW.kcal_per_100g > 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_density_delete AFTER DELETE ON ingredients
+BEGIN
+    DELETE FROM ingredient_density_macros WHERE id = OLD.id;
+    DELETE FROM ingredient_density_micros WHERE id = OLD.id;
+END;
+
+-- Backfill databases created before the density index existed.
+INSERT INTO ingredient_density_macros
+SELECT id,
+    protein_g * 100.0 / kcal_per_100g, protein_g * 100.0 / kcal_per_100g,
+    fat_g * 100.0 / kcal_per_100g, fat_g * 100.0 / kcal_per_100g,
+    carbs_g * 100.0 / kcal_per_100g, carbs_g * 100.0 / kcal_per_100g,
+    calcium_mg * 100.0 / kcal_per_100g, calcium_mg * 100.0 / kcal_per_100g,
+    phosphorus_mg * 100.0 / kcal_per_100g, phosphorus_mg * 100.0 / kcal_per_100g
+FROM ingredients
+WHERE kcal_per_100g > 0 AND id NOT IN (SELECT id FROM ingredient_density_macros);
+
+INSERT INTO ingredient_density_micros
+SELECT id,
+    iron_mg * 100.0 / kcal_per_100g, iron_mg * 100.0 / kcal_per_100g,
+    zinc_mg * 100.0 / kcal_per_100g, zinc_mg * 100.0 / kcal_per_100g,
+    vitamin_a_iu * 100.0 / kcal_per_100g, vitamin_a_iu * 100.0 / kcal_per_100g,
+    vitamin_d_iu * 100.0 / kcal_per_100g, vitamin_d_iu * 100.0 / kcal_per_100g,
+    vitamin_e_mg * 100.0 / kcal_per_100g, vitamin_e_mg * 100.0 / kcal_per_100g
+FROM ingredients
+WHERE kcal_per_100g > 0 AND id NOT IN (SELECT id FROM ingredient_density_micros);
+
+-- Latest change sequence per ingredient, so in-memory indexes can apply
+-- only the rows written since they last synced.
+CREATE TABLE IF NOT EXISTS ingredient_changes (
+    ingredient_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ingredient_changes_seq ON ingredient_changes (seq);
+
+CREATE TRIGGER IF NOT EXISTS ingredients_change_insert AFTER INSERT ON ingredients
+BEGIN
+    INSERT OR REPLACE INTO ingredient_changes (ingredient_id, seq)
+    VALUES (NEW.id, (SELECT coalesce(max(seq), 0) + 1 FROM ingredient_changes));
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_change_update AFTER UPDATE ON ingredients
+BEGIN
+    INSERT OR REPLACE INTO ingredient_changes (ingredient_id, seq)
+    VALUES (OLD.id, (SELECT coalesce(max(seq), 0) + 1 FROM ingredient_changes));
+    INSERT OR REPLACE INTO ingredient_changes (ingredient_id, seq)
+    VALUES (NEW.id, (SELECT coalesce(max(seq), 0) + 1 FROM ingredient_changes));
+END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_change_delete AFTER DELETE ON ingredients
+BEGIN
+    INSERT OR REPLACE INTO ingredient_changes (ingredient_id, seq)
+    VALUES (OLD.id, (SELECT coalesce(max(seq), 0) + 1 FROM ingredient_changes));
+END;
+
+CREATE TABLE IF NOT EXISTS plan_changes (
+    plan_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS plan_changes_seq ON plan_changes (seq);
+
+CREATE TRIGGER IF NOT EXISTS plans_change_insert AFTER INSERT ON plans
+BEGIN
+    INSERT OR REPLACE INTO plan_changes (plan_id, seq)
+    VALUES (NEW.id, (SELECT coalesce(max(seq), 0) + 1 FROM plan_changes));
+END;
+
+CREATE TRIGGER IF NOT EXISTS plans_change_update AFTER UPDATE ON plans
+BEGIN
+    INSERT OR REPLACE INTO plan_changes (plan_id, seq)
+    VALUES (OLD.id, (SELECT coalesce(max(seq), 0) + 1 FROM plan_changes));
+    INSERT OR REPLACE INTO plan_changes (plan_id, seq)
+    VALUES (NEW.id, (SELECT coalesce(max(seq), 0) + 1 FROM plan_changes));
+END;
+
+CREATE TRIGGER IF NOT EXISTS plans_change_delete AFTER DELETE ON plans
+BEGIN
+    INSERT OR REPLACE INTO plan_changes (plan_id, seq)
+    VALUES (OLD.id, (SELECT coalesce(max(seq), 0) + 1 FROM plan_changes));
+END;
+
+-- Each plan's recipe flattened for the kitchen rollup, one row per distinct
+-- ingredient (or catalog recipe reference) per plan. meals is the plan's JSON
+-- list of meal names; grams are split evenly across them. Plans that reference
+-- a catalog recipe keep recipe_id and take grams from recipe_items at query
+-- time.
+CREATE TABLE IF NOT EXISTS plan_production_lines (
+    plan_id INTEGER NOT NULL,
+    meals TEXT NOT NULL,
+    recipe_id INTEGER,
+    ingredient_id INTEGER,
+    ingredient_name TEXT,
+    grams REAL
+);
+
+CREATE INDEX IF NOT EXISTS plan_production_lines_plan ON plan_production_lines (plan_id);
+
+CREATE TABLE IF NOT EXISTS rollup_cursors (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dogs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    weight_kg REAL NOT NULL,
+    target_weight_kg REAL,
+    age_years REAL NOT NULL,
+    sex TEXT NOT NULL,
+    neutered INTEGER NOT NULL,
+    activity TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Computed plans for registered dogs. request is the /compute-plan body
+-- without the dog, which is read from dogs on every recompute.
+CREATE TABLE IF NOT EXISTS dog_plans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dog_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    computed_at TEXT NOT NULL DEFAULT (datetime('now')),
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS dog_plans_dog ON dog_plans (dog_id);
+
+-- Catalog rows each dog plan was computed from: kind is 'ingredient' for
+-- kibble and inline recipe references, 'recipe' for recipe_id. Ingredients
+-- inside a referenced recipe are reached through recipe_items at lookup time.
+CREATE TABLE IF NOT EXISTS plan_dependencies (
+    kind TEXT NOT NULL,
+    ref_id INTEGER NOT NULL,
+    plan_id INTEGER NOT NULL REFERENCES dog_plans(id) ON DELETE CASCADE,
+    PRIMARY KEY (kind, ref_id, plan_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS plan_dependencies_plan ON plan_dependencies (plan_id);
+
+CREATE INDEX IF NOT EXISTS recipe_items_ingredient ON recipe_items (ingredient_id);
+
+-- Daily weight and fed kcal per dog, clustered by dog then day so one dog's
+-- history is a contiguous range. Points older than the raw retention window
+-- are deleted at ingest; the rollups below keep their sums.
+CREATE TABLE IF NOT EXISTS dog_measurements (
+    dog_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    weight_kg REAL,
+    kcal_fed REAL,
+    PRIMARY KEY (dog_id, day)
+) WITHOUT ROWID;
+
+-- Weekly (Monday start) and monthly sums maintained by ingest deltas.
+-- weight_offset_sum adds up each weighed day's offset from period_start, so
+-- the mean weight can be placed at the days actually measured.
+CREATE TABLE IF NOT EXISTS dog_measurement_rollups (
+    dog_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+    period TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    weight_sum REAL NOT NULL DEFAULT 0,
+    weight_count INTEGER NOT NULL DEFAULT 0,
+    weight_offset_sum INTEGER NOT NULL DEFAULT 0,
+    kcal_sum REAL NOT NULL DEFAULT 0,
+    kcal_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dog_id, period, period_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    run_after TEXT NOT NULL DEFAULT (datetime('now')),
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, run_after, id);
+
+-- USDA imports used to carry the caller's API key in the payload.
+UPDATE jobs SET payload = json_remove(payload, '$.api_key')
+WHERE kind = 'usda_import' AND json_extract(payload, '$.api_key') IS NOT NULL;
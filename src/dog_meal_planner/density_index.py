@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+# Mirrors the R*Tree tables in schema.sql; values are per 100 kcal.
+DENSITY_TABLES: Dict[str, Tuple[str, ...]] = {
+    "ingredient_density_macros": ("protein_g", "fat_g", "carbs_g", "calcium_mg", "phosphorus_mg"),
+    "ingredient_density_micros": ("iron_mg", "zinc_mg", "vitamin_a_iu", "vitamin_d_iu", "vitamin_e_mg"),
+}
+DENSITY_FIELDS = tuple(field for fields in DENSITY_TABLES.values() for field in fields)
+MAX_SEARCH_LIMIT = 1000
+
+
+@dataclass(frozen=True)
+class DensityRange:
+    field: str
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+
+def parse_density_ranges(params: Mapping[str, str]) -> List[DensityRange]:
+    bounds: Dict[str, Dict[str, float]] = {}
+    for key, raw in params.items():
+        field, _, side = key.rpartition("_")
+        if field not in DENSITY_FIELDS or side not in ("min", "max"):
+            raise ValueError(f"Unknown nutrient range parameter: {key}")
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValueError(f"{key} must be a number") from None
+        if not math.isfinite(value):
+            raise ValueError(f"{key} must be finite")
+        bounds.setdefault(field, {})[side] = value
+    ranges = []
+    for field in DENSITY_FIELDS:
+        if field not in bounds:
+            continue
+        minimum, maximum = bounds[field].get("min"), bounds[field].get("max")
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValueError(f"{field}_min is greater than {field}_max")
+        ranges.append(DensityRange(field, minimum, maximum))
+    return ranges
+
+
+def bound_count(item: DensityRange) -> int:
+    return (item.minimum is not None) + (item.maximum is not None)
+
+
+def search_by_density(
+    conn: sqlite3.Connection,
+    ranges: Sequence[DensityRange],
+    columns: Sequence[str],
+    limit: int = 100,
+) -> List[sqlite3.Row]:
+    if not ranges:
+        raise ValueError("Provide at least one nutrient range")
+    # Drive the query from the R*Tree carrying the most bounds; every other
+    # bound is checked exactly on the ingredient rows it yields. The R*Tree
+    # stores 32-bit floats rounded outwards, so its bounds are rechecked too.
+    by_field = {item.field: item for item in ranges}
+    table, fields = max(
+        DENSITY_TABLES.items(),
+        key=lambda entry: sum(bound_count(by_field[field]) for field in entry[1] if field in by_field),
+    )
+    conditions: List[str] = []
+    params: List[float] = []
+    for item in ranges:
+        density = f"i.{item.field} * 100.0 / i.kcal_per_100g"
+        if item.minimum is not None:
+            if item.field in fields:
+                conditions.append(f"d.{item.field}_max >= ?")
+                params.append(item.minimum)
+            conditions.append(f"{density} >= ?")
+            params.append(item.minimum)
+        if item.maximum is not None:
+            if item.field in fields:
+                conditions.append(f"d.{item.field}_min <= ?")
+                params.append(item.maximum)
+            conditions.append(f"{density} <= ?")
+            params.append(item.maximum)
+    select = ", ".join(f"i.{column}" for column in columns)
+    query = f"""
+        SELECT {select}
+        FROM {table} AS d
+        JOIN ingredients AS i ON i.id = d.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY i.name
+        LIMIT ?
+    """
+    return conn.execute(query, (*params, limit)).fetchall()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+DOG_FIELDS = ("weight_kg", "target_weight_kg", "age_years", "sex", "neutered", "activity")
+
+# compute(conn, dog, request) returns the plan result or raises ValueError when
+# the request can no longer be computed.
+PlanCompute = Callable[[sqlite3.Connection, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+def dog_fields(row: sqlite3.Row) -> Dict[str, Any]:
+    fields = {name: row[name] for name in DOG_FIELDS}
+    fields["neutered"] = bool(fields["neutered"])
+    return fields
+
+
+def plan_references(request: Mapping[str, Any]) -> Tuple[Set[int], Set[int]]:
+    ingredient_ids: Set[int] = set()
+    if request.get("kibble_id") is not None:
+        ingredient_ids.add(request["kibble_id"])
+    for item in (request.get("recipe") or {}).get("items") or []:
+        if item.get("ingredient") is None and item.get("ingredient_id") is not None:
+            ingredient_ids.add(item["ingredient_id"])
+    recipe_ids = {request["recipe_id"]} if request.get("recipe_id") is not None else set()
+    return ingredient_ids, recipe_ids
+
+
+def record_dependencies(conn: sqlite3.Connection, plan_id: int, request: Mapping[str, Any]) -> None:
+    ingredient_ids, recipe_ids = plan_references(request)
+    conn.execute("DELETE FROM plan_dependencies WHERE plan_id = ?", (plan_id,))
+    conn.executemany(
+        "INSERT INTO plan_dependencies (kind, ref_id, plan_id) VALUES (?, ?, ?)",
+        [("ingredient", ref_id, plan_id) for ref_id in sorted(ingredient_ids)]
+        + [("recipe", ref_id, plan_id) for ref_id in sorted(recipe_ids)],
+    )
+
+
+def dependent_plan_ids(
+    conn: sqlite3.Connection,
+    ingredient_ids: Iterable[int] = (),
+    recipe_ids: Iterable[int] = (),
+    dog_ids: Iterable[int] = (),
+) -> List[int]:
+    ingredients, recipes, dogs = (json.dumps(sorted(set(ids))) for ids in (ingredient_ids, recipe_ids, dog_ids))
+    rows = conn.execute(
+        """
+        SELECT plan_id FROM plan_dependencies
+        WHERE kind = 'ingredient' AND ref_id IN (SELECT value FROM json_each(:ingredients))
+        UNION
+        SELECT plan_id FROM plan_dependencies
+        WHERE kind = 'recipe' AND ref_id IN (
+            SELECT recipe_id FROM recipe_items
+            WHERE ingredient_id IN (SELECT value FROM json_each(:ingredients))
+        )
+        UNION
+        SELECT plan_id FROM plan_dependencies
+        WHERE kind = 'recipe' AND ref_id IN (SELECT value FROM json_each(:recipes))
+        UNION
+        SELECT id FROM dog_plans WHERE dog_id IN (SELECT value FROM json_each(:dogs))
+        ORDER BY 1
+        """,
+        {"ingredients": ingredients, "recipes": recipes, "dogs": dogs},
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def replan(conn: sqlite3.Connection, plan_ids: List[int], compute: PlanCompute) -> int:
+    # Must run inside the write transaction that changed the catalog. Returns
+    # the number of plans recomputed; plans that no longer compute keep the
+    # error instead of a result.
+    if not plan_ids:
+        return 0
+    rows = conn.execute(
+        f"""
+        SELECT dog_plans.id AS plan_id, dog_plans.request AS request,
+               {', '.join(f'dogs.{name} AS {name}' for name in DOG_FIELDS)}
+        FROM dog_plans
+        JOIN dogs ON dogs.id = dog_plans.dog_id
+        WHERE dog_plans.id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(plan_ids),),
+    ).fetchall()
+    for row in rows:
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[str] = None
+        try:
+            result = compute(conn, dog_fields(row), json.loads(row["request"]))
+        except ValueError as exc:
+            error = str(exc)
+        conn.execute(
+            "UPDATE dog_plans SET result = ?, error = ?, computed_at = datetime('now') WHERE id = ?",
+            (json.dumps(result) if result is not None else None, error, row["plan_id"]),
+        )
+    return len(rows)
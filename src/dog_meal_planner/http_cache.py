@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+STATIC_URL_PATTERN = re.compile(r'(href|src)="/static/([^"?#]+)"')
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    path: str
+    media_type: str
+    digest: str
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}-{encoding}"'
+
+
+def build_asset(path: str, body: bytes) -> StaticAsset:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type = f"{media_type}; charset=utf-8"
+    bodies = {"identity": body}
+    if media_type.startswith(COMPRESSIBLE_TYPES):
+        bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body)
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    return StaticAsset(path=path, media_type=media_type, digest=digest, bodies=bodies)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for token in header.split(","):
+        parts = [part.strip() for part in token.split(";")]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].lower()] = quality
+    return accepted
+
+
+def choose_encoding(asset: StaticAsset, accept_encoding: str) -> str:
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in asset.bodies and quality > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+
+class StaticAssetCache:
+    def __init__(self, directory: Path, index_name: str = "index.html") -> None:
+        self.directory = directory
+        self.index_name = index_name
+        self._assets: Optional[Dict[str, StaticAsset]] = None
+        self._index: Optional[StaticAsset] = None
+
+    def _load(self) -> Dict[str, StaticAsset]:
+        if self._assets is None:
+            assets: Dict[str, StaticAsset] = {}
+            if self.directory.is_dir():
+                for file_path in sorted(self.directory.rglob("*")):
+                    if file_path.is_file():
+                        relative = file_path.relative_to(self.directory).as_posix()
+                        assets[relative] = build_asset(relative, file_path.read_bytes())
+            self._assets = assets
+        return self._assets
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self._load().get(path)
+
+    def url_for(self, path: str) -> str:
+        asset = self.get(path)
+        if asset is None:
+            return f"/static/{path}"
+        return f"/static/{path}?v={asset.digest}"
+
+    def index(self) -> Optional[StaticAsset]:
+        if self._index is None:
+            source = self.get(self.index_name)
+            if source is None:
+                return None
+            # Fingerprint every /static reference so those assets can be immutable.
+            html = source.bodies["identity"].decode("utf-8")
+            html = STATIC_URL_PATTERN.sub(
+                lambda match: f'{match.group(1)}="{self.url_for(match.group(2))}"',
+                html,
+            )
+            self._index = build_asset(self.index_name, html.encode("utf-8"))
+        return self._index
+
+
+def asset_response_parts(
+    asset: StaticAsset,
+    accept_encoding: str,
+    if_none_match: Optional[str],
+    immutable: bool,
+) -> Tuple[int, bytes, Dict[str, str]]:
+    encoding = choose_encoding(asset, accept_encoding)
+    etag = asset.etag(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(if_none_match, etag):
+        return 304, b"", headers
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return 200, asset.bodies[encoding], headers
+
+
+def catalog_validators(conn: sqlite3.Connection, tables: Iterable[str]) -> Dict[str, str]:
+    names = sorted(set(tables))
+    placeholders = ", ".join("?" for _ in names)
+    rows = conn.execute(
+        f"""
+        SELECT table_name, version, epoch, updated_at
+        FROM table_versions
+        WHERE table_name IN ({placeholders})
+        ORDER BY table_name
+        """,
+        names,
+    ).fetchall()
+    tag = ".".join(f"{row['table_name']}-{row['epoch']}-{row['version']}" for row in rows)
+    headers = {
+        "ETag": f'W/"{hashlib.sha256(tag.encode("ascii")).hexdigest()[:20]}"',
+        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+    }
+    if rows:
+        latest = max(row["updated_at"] for row in rows)
+        modified = datetime.strptime(latest, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from dog_meal_planner import storage
+from dog_meal_planner.backup import BACKUP_NICE, create_backup
+from dog_meal_planner.traffic import REDACTED_FIELDS
+
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+LEASE_SECONDS = 600
+POLL_INTERVAL_SECONDS = 0.5
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobConflict(Exception):
+    pass
+
+
+@contextmanager
+def job_session(db_path: Path) -> Iterator[sqlite3.Connection]:
+    conn = storage.get_connection(db_path)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ProgressReporter:
+    def __init__(self, db_path: Path, job_id: int) -> None:
+        self.db_path = db_path
+        self.job_id = job_id
+
+    def report(self, done: float, total: float, message: Optional[str] = None) -> None:
+        fraction = min(done / total, 1.0) if total > 0 else 1.0
+        with job_session(self.db_path) as conn:
+            rows = conn.execute(
+                """
+                UPDATE jobs
+                SET progress = ?, progress_message = ?, updated_at = datetime('now')
+                WHERE id = ?
+                RETURNING cancel_requested
+                """,
+                (fraction, message, self.job_id),
+            ).fetchall()
+        if rows and rows[0]["cancel_requested"]:
+            raise JobCancelled()
+
+
+JobHandler = Callable[[Dict[str, Any], ProgressReporter], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class JobKind:
+    name: str
+    handler: JobHandler
+    executor: str
+    max_attempts: int = 3
+    retry_backoff_seconds: int = 5
+    # At most one job of this kind may be queued or running at a time.
+    exclusive: bool = False
+
+
+def compute_plans_job(payload: Dict[str, Any], reporter: ProgressReporter) -> Dict[str, Any]:
+    from dog_meal_planner.api import ComputePlanPayload, compute_plan_response
+
+    requests = payload.get("plans", [])
+    results: List[Dict[str, Any]] = []
+    step = max(len(requests) // 100, 1)
+    with job_session(reporter.db_path) as conn:
+        for index, request in enumerate(requests):
+            try:
+                results.append({"plan": compute_plan_response(conn, ComputePlanPayload(**request))})
+            except Exception as exc:
+                results.append({"error": str(exc)})
+            if (index + 1) % step == 0:
+                reporter.report(index + 1, len(requests))
+    reporter.report(len(requests), len(requests))
+    return {"plans": results}
+
+
+def usda_import_job(payload: Dict[str, Any], reporter: ProgressReporter) -> Dict[str, Any]:
+    from dog_meal_planner.api import IngredientPayload, NutrientsPayload, insert_ingredient
+    from dog_meal_planner.usda import USDAClient, ingredient_from_usda, server_api_key
+
+    client = USDAClient(api_key=server_api_key())
+    fdc_ids = payload.get("fdc_ids", [])
+    imported: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    for index, fdc_id in enumerate(fdc_ids):
+        try:
+            ingredient = ingredient_from_usda(client.fetch_food(fdc_id))
+        except Exception as exc:
+            errors[str(fdc_id)] = str(exc)
+        else:
+            entry: Dict[str, Any] = {
+                "fdc_id": fdc_id,
+                "name": ingredient.name,
+                "kcal_per_100g": ingredient.kcal_per_100g,
+            }
+            if payload.get("save", True):
+                with job_session(reporter.db_path) as conn:
+                    entry["id"] = insert_ingredient(
+                        conn,
+                        IngredientPayload(
+                            name=ingredient.name,
+                            kcal_per_100g=ingredient.kcal_per_100g,
+                            nutrients_per_100g=NutrientsPayload(**ingredient.nutrients_per_100g.to_dict()),
+                        ),
+                    )
+            imported.append(entry)
+        reporter.report(index + 1, len(fdc_ids), f"fetched {fdc_id}")
+    return {"imported": imported, "errors": errors}
+
+
+def backup_job(payload: Dict[str, Any], reporter: ProgressReporter) -> Dict[str, Any]:
+    reported = [0.0]
+
+    def progress(done: int, total: int) -> None:
+        # One progress write per 5% of pages rather than one per step.
+        if done >= total or done / total - reported[0] >= 0.05:
+            reported[0] = done / total
+            reporter.report(done, total, "copying pages")
+
+    manifest = create_backup(reporter.db_path, incremental=bool(payload.get("incremental")), progress=progress)
+    return asdict(manifest)
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "compute_plans": JobKind("compute_plans", compute_plans_job, executor="process"),
+    "usda_import": JobKind("usda_import", usda_import_job, executor="thread"),
+    "backup": JobKind("backup", backup_job, executor="background", max_attempts=1, exclusive=True),
+}
+
+
+def run_job(kind: str, job_id: int, payload: Dict[str, Any], db_path: str) -> Dict[str, Any]:
+    return JOB_KINDS[kind].handler(payload, ProgressReporter(Path(db_path), job_id))
+
+
+def submit_job(
+    conn: sqlite3.Connection,
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+) -> int:
+    if kind not in JOB_KINDS:
+        raise KeyError(kind)
+    secrets = REDACTED_FIELDS.intersection(payload)
+    if secrets:
+        raise ValueError(f"Job payloads are stored; do not send {', '.join(sorted(secrets))}")
+    # Callers hold the write lock, so the check and the insert cannot race.
+    if JOB_KINDS[kind].exclusive:
+        active = conn.execute(
+            "SELECT id FROM jobs WHERE kind = ? AND status IN ('queued', 'running') LIMIT 1",
+            (kind,),
+        ).fetchone()
+        if active is not None:
+            raise JobConflict(f"{kind} job {active[0]} is already queued or running")
+    cursor = conn.execute(
+        "INSERT INTO jobs (kind, payload, max_attempts) VALUES (?, ?, ?)",
+        (kind, json.dumps(payload, ensure_ascii=True), max_attempts or JOB_KINDS[kind].max_attempts),
+    )
+    return int(cursor.lastrowid)
+
+
+def cancel_job(conn: sqlite3.Connection, job_id: int) -> Optional[str]:
+    rows = conn.execute(
+        """
+        UPDATE jobs
+        SET status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+            finished_at = CASE WHEN status = 'queued' THEN datetime('now') ELSE finished_at END,
+            cancel_requested = CASE WHEN status IN ('queued', 'running') THEN 1 ELSE cancel_requested END,
+            updated_at = datetime('now')
+        WHERE id = ?
+        RETURNING status
+        """,
+        (job_id,),
+    ).fetchall()
+    return rows[0]["status"] if rows else None
+
+
+class JobRunner:
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        process_workers: Optional[int] = None,
+        thread_workers: int = 4,
+    ) -> None:
+        self._db_path = db_path
+        self.capacity = {
+            "process": process_workers or os.cpu_count() or 1,
+            "thread": thread_workers,
+            "background": 1,
+        }
+        self.in_flight = {"process": 0, "thread": 0, "background": 0}
+        self.executors: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path or storage.DB_PATH
+
+    def _new_executor(self, name: str) -> Executor:
+        if name == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.capacity["process"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        if name == "background":
+            # Backups get their own worker at lowered CPU priority so they
+            # yield to requests without slowing the compute pool.
+            return ProcessPoolExecutor(
+                max_workers=self.capacity["background"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=os.nice,
+                initargs=(BACKUP_NICE,),
+            )
+        return ThreadPoolExecutor(max_workers=self.capacity["thread"], thread_name_prefix="job")
+
+    def _replace_broken(self, name: str, broken: Executor) -> None:
+        # A process pool whose worker died rejects every later submit.
+        with self._lock:
+            if self.executors.get(name) is not broken:
+                return
+            self.executors[name] = self._new_executor(name)
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.executors = {name: self._new_executor(name) for name in self.capacity}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = {}
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._requeue_expired()
+            while self._dispatch_one():
+                pass
+            self._wake.wait(POLL_INTERVAL_SECONDS)
+            self._wake.clear()
+
+    def _requeue_expired(self) -> None:
+        # Jobs whose runner died stop reporting progress; hand them back to the
+        # queue unless that was their last attempt, so a job that always hangs
+        # or kills its worker cannot loop forever.
+        with job_session(self.db_path) as conn:
+            conn.execute(
+                f"""
+                UPDATE jobs
+                SET status = CASE
+                        WHEN cancel_requested THEN 'cancelled'
+                        WHEN attempts >= max_attempts THEN 'failed'
+                        ELSE 'queued'
+                    END,
+                    error = 'lease expired',
+                    finished_at = CASE
+                        WHEN cancel_requested OR attempts >= max_attempts THEN datetime('now')
+                    END,
+                    updated_at = datetime('now')
+                WHERE status = 'running'
+                  AND updated_at <= datetime('now', '-{LEASE_SECONDS} seconds')
+                """
+            )
+
+    def _claimable_kinds(self) -> List[str]:
+        with self._lock:
+            return [
+                kind.name
+                for kind in JOB_KINDS.values()
+                if self.in_flight[kind.executor] < self.capacity[kind.executor]
+            ]
+
+    def _dispatch_one(self) -> bool:
+        kinds = self._claimable_kinds()
+        if not kinds:
+            return False
+        placeholders = ", ".join("?" for _ in kinds)
+        with job_session(self.db_path) as conn:
+            rows = conn.execute(
+                f"""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, error = NULL,
+                    started_at = datetime('now'), updated_at = datetime('now')
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' AND run_after <= datetime('now')
+                      AND kind IN ({placeholders})
+                    ORDER BY id
+                    LIMIT 1
+                )
+                RETURNING id, kind, payload, attempts
+                """,
+                kinds,
+            ).fetchall()
+        if not rows:
+            return False
+        row = rows[0]
+        kind = JOB_KINDS[row["kind"]]
+        with self._lock:
+            self.in_flight[kind.executor] += 1
+            executor = self.executors[kind.executor]
+        try:
+            future = executor.submit(run_job, kind.name, row["id"], json.loads(row["payload"]), str(self.db_path))
+        except (BrokenExecutor, RuntimeError) as exc:
+            # The claim never reached a worker; undo it instead of stranding the job.
+            with self._lock:
+                self.in_flight[kind.executor] -= 1
+            self._unclaim(row["id"], row["attempts"])
+            if isinstance(exc, BrokenExecutor):
+                self._replace_broken(kind.executor, executor)
+                return True
+            return False
+        future.add_done_callback(
+            lambda done, job_id=row["id"], attempt=row["attempts"]: self._finish(job_id, attempt, kind, executor, done)
+        )
+        return True
+
+    def _unclaim(self, job_id: int, attempt: int) -> None:
+        with job_session(self.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'queued', attempts = attempts - 1, updated_at = datetime('now')
+                WHERE id = ? AND status = 'running' AND attempts = ?
+                """,
+                (job_id, attempt),
+            )
+
+    def _finish(self, job_id: int, attempt: int, kind: JobKind, executor: Executor, future: Future) -> None:
+        # Every update is conditional on this runner's claim still standing: a
+        # job whose lease expired may have been claimed again, and the late
+        # finisher must not overwrite the newer attempt.
+        with self._lock:
+            self.in_flight[kind.executor] -= 1
+        if future.cancelled():
+            self._unclaim(job_id, attempt)
+            return
+        exc = future.exception()
+        if isinstance(exc, BrokenExecutor):
+            self._replace_broken(kind.executor, executor)
+        with job_session(self.db_path) as conn:
+            if exc is None:
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'succeeded', result = ?, progress = 1,
+                        finished_at = datetime('now'), updated_at = datetime('now')
+                    WHERE id = ? AND status = 'running' AND attempts = ?
+                    """,
+                    (json.dumps(future.result(), ensure_ascii=True), job_id, attempt),
+                )
+            elif isinstance(exc, JobCancelled):
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'cancelled', finished_at = datetime('now'), updated_at = datetime('now')
+                    WHERE id = ? AND status = 'running' AND attempts = ?
+                    """,
+                    (job_id, attempt),
+                )
+            else:
+                conn.execute(
+                    f"""
+                    UPDATE jobs
+                    SET status = CASE
+                            WHEN cancel_requested THEN 'cancelled'
+                            WHEN attempts < max_attempts THEN 'queued'
+                            ELSE 'failed'
+                        END,
+                        error = ?,
+                        run_after = datetime(
+                            'now', '+' || ({kind.retry_backoff_seconds} * (1 << (attempts - 1))) || ' seconds'
+                        ),
+                        finished_at = CASE
+                            WHEN cancel_requested OR attempts >= max_attempts THEN datetime('now')
+                        END,
+                        updated_at = datetime('now')
+                    WHERE id = ? AND status = 'running' AND attempts = ?
+                    """,
+                    (f"{type(exc).__name__}: {exc}", job_id, attempt),
+                )
+        self.wake()
+
+
+def jobs_enabled() -> bool:
+    # Serverless instances freeze between requests, so background work is opt-in there.
+    default = "0" if os.getenv("VERCEL") or os.getenv("VERCEL_ENV") else "1"
+    return os.getenv("DOG_MEAL_PLANNER_JOBS", default) == "1"
+
+
+job_runner = JobRunner(
+    process_workers=int(os.getenv("DOG_MEAL_PLANNER_JOB_PROCESSES", "0")) or None,
+    thread_workers=int(os.getenv("DOG_MEAL_PLANNER_JOB_THREADS", "4")),
+)
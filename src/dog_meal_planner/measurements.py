@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dog_meal_planner.nutrition import MER_FACTORS, compute_rer
+
+RAW_RETENTION_DAYS = 180
+PERIODS = ("week", "month")
+# Energy in a kilogram of body weight change, the usual clinical estimate.
+KCAL_PER_KG = 7700.0
+# Recommended ceiling for weight change per week, as a fraction of body weight.
+MAX_WEEKLY_CHANGE = 0.01
+MIN_KCAL_DAYS = 7
+
+
+@dataclass(frozen=True, slots=True)
+class MeasurementPoint:
+    dog_id: int
+    day: date
+    weight_kg: Optional[float] = None
+    kcal_fed: Optional[float] = None
+
+
+def period_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def retention_cutoff(today: date) -> date:
+    return today - timedelta(days=RAW_RETENTION_DAYS)
+
+
+def ingest_measurements(conn: sqlite3.Connection, points: Iterable[MeasurementPoint], today: date) -> Tuple[int, int]:
+    # Upserts a batch of daily points and applies the change in each point to
+    # the weekly and monthly rollups. A field left as None keeps the stored
+    # value for that day. Points outside the raw window are rejected, since
+    # their previous value may already be downsampled away. Returns
+    # (ingested, rejected).
+    cutoff = retention_cutoff(today)
+    accepted = []
+    rejected = 0
+    for point in points:
+        if cutoff <= point.day <= today:
+            accepted.append(point)
+        else:
+            rejected += 1
+    if not accepted:
+        return 0, rejected
+
+    keys = sorted({(point.dog_id, point.day.isoformat()) for point in accepted})
+    state: Dict[Tuple[int, str], Tuple[Optional[float], Optional[float]]] = {
+        (row[0], row[1]): (row[2], row[3])
+        for row in conn.execute(
+            """
+            SELECT dog_measurements.dog_id, dog_measurements.day,
+                   dog_measurements.weight_kg, dog_measurements.kcal_fed
+            FROM json_each(?) AS key
+            JOIN dog_measurements
+              ON dog_measurements.dog_id = json_extract(key.value, '$[0]')
+             AND dog_measurements.day = json_extract(key.value, '$[1]')
+            """,
+            (json.dumps(keys),),
+        )
+    }
+    deltas: Dict[Tuple[int, str, str], List[float]] = defaultdict(lambda: [0.0, 0, 0, 0.0, 0])
+    for point in accepted:
+        key = (point.dog_id, point.day.isoformat())
+        old_weight, old_kcal = state.get(key, (None, None))
+        weight = point.weight_kg if point.weight_kg is not None else old_weight
+        kcal = point.kcal_fed if point.kcal_fed is not None else old_kcal
+        state[key] = (weight, kcal)
+        for period in PERIODS:
+            start = period_start(point.day, period)
+            delta = deltas[point.dog_id, period, start.isoformat()]
+            weighed = (weight is not None) - (old_weight is not None)
+            delta[0] += (weight or 0.0) - (old_weight or 0.0)
+            delta[1] += weighed
+            delta[2] += weighed * (point.day - start).days
+            delta[3] += (kcal or 0.0) - (old_kcal or 0.0)
+            delta[4] += (kcal is not None) - (old_kcal is not None)
+
+    conn.executemany(
+        """
+        INSERT INTO dog_measurements (dog_id, day, weight_kg, kcal_fed)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (dog_id, day) DO UPDATE
+        SET weight_kg = excluded.weight_kg, kcal_fed = excluded.kcal_fed
+        """,
+        [(dog_id, day, *state[dog_id, day]) for dog_id, day in keys],
+    )
+    conn.executemany(
+        """
+        INSERT INTO dog_measurement_rollups
+            (dog_id, period, period_start, weight_sum, weight_count, weight_offset_sum, kcal_sum, kcal_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (dog_id, period, period_start) DO UPDATE
+        SET weight_sum = weight_sum + excluded.weight_sum,
+            weight_count = weight_count + excluded.weight_count,
+            weight_offset_sum = weight_offset_sum + excluded.weight_offset_sum,
+            kcal_sum = kcal_sum + excluded.kcal_sum,
+            kcal_count = kcal_count + excluded.kcal_count
+        """,
+        [(*key, *delta) for key, delta in sorted(deltas.items())],
+    )
+    # Downsample the dogs in this batch; each delete is a primary key range.
+    conn.executemany(
+        "DELETE FROM dog_measurements WHERE dog_id = ? AND day < ?",
+        [(dog_id, cutoff.isoformat()) for dog_id in sorted({point.dog_id for point in accepted})],
+    )
+    return len(accepted), rejected
+
+
+def measurement_series(conn: sqlite3.Connection, dog_id: int, period: str, since: date) -> List[Dict[str, Any]]:
+    if period == "day":
+        rows = conn.execute(
+            """
+            SELECT day AS start, weight_kg, kcal_fed, weight_kg IS NOT NULL AS weight_days,
+                   kcal_fed IS NOT NULL AS kcal_days, 0.0 AS weight_offset
+            FROM dog_measurements
+            WHERE dog_id = ? AND day >= ?
+            ORDER BY day
+            """,
+            (dog_id, since.isoformat()),
+        ).fetchall()
+    elif period in PERIODS:
+        rows = conn.execute(
+            """
+            SELECT period_start AS start,
+                   CASE WHEN weight_count > 0 THEN weight_sum / weight_count END AS weight_kg,
+                   CASE WHEN kcal_count > 0 THEN kcal_sum / kcal_count END AS kcal_fed,
+                   weight_count AS weight_days, kcal_count AS kcal_days,
+                   CASE WHEN weight_count > 0 THEN weight_offset_sum * 1.0 / weight_count END AS weight_offset
+            FROM dog_measurement_rollups
+            WHERE dog_id = ? AND period = ? AND period_start >= ?
+            ORDER BY period_start
+            """,
+            (dog_id, period, period_start(since, period).isoformat()),
+        ).fetchall()
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return [
+        {
+            "start": row["start"],
+            "weight_kg": row["weight_kg"],
+            "kcal_fed": row["kcal_fed"],
+            "weight_days": row["weight_days"],
+            "kcal_days": row["kcal_days"],
+            "weight_offset_days": row["weight_offset"],
+        }
+        for row in rows
+    ]
+
+
+def weight_slope_per_day(weeks: List[Dict[str, Any]]) -> Optional[float]:
+    points = [
+        (date.fromisoformat(week["start"]).toordinal() + week["weight_offset_days"], week["weight_kg"])
+        for week in weeks
+        if week["weight_kg"] is not None
+    ]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def mer_trend(
+    conn: sqlite3.Connection,
+    dog_id: int,
+    target_weight_kg: Optional[float],
+    weeks: int,
+    today: date,
+) -> Dict[str, Any]:
+    # Energy balance over the window: the intake that would have held weight
+    # steady is the mean fed kcal minus the energy of the observed weight
+    # change. The suggestion adds back a capped change toward the target.
+    series = measurement_series(conn, dog_id, "week", today - timedelta(weeks=weeks))
+    slope = weight_slope_per_day(series)
+    kcal_days = sum(week["kcal_days"] for week in series)
+    trend: Dict[str, Any] = {
+        "dog_id": dog_id,
+        "weeks": series,
+        "weight_change_kg_per_week": slope * 7 if slope is not None else None,
+        "mean_kcal_fed": None,
+        "maintenance_kcal": None,
+        "observed_mer_factor": None,
+        "suggested_mer_factor": None,
+        "nearest_mer_factor_key": None,
+    }
+    if slope is None or kcal_days < MIN_KCAL_DAYS:
+        return trend
+    current_weight = next(week["weight_kg"] for week in reversed(series) if week["weight_kg"] is not None)
+    mean_kcal = sum(week["kcal_fed"] * week["kcal_days"] for week in series if week["kcal_days"]) / kcal_days
+    maintenance = mean_kcal - slope * KCAL_PER_KG
+    rer = compute_rer(current_weight)
+    gap = (target_weight_kg if target_weight_kg is not None else current_weight) - current_weight
+    limit = MAX_WEEKLY_CHANGE * current_weight
+    weekly_change = max(-limit, min(limit, gap))
+    suggested = (maintenance + weekly_change * KCAL_PER_KG / 7) / rer
+    trend.update(
+        mean_kcal_fed=mean_kcal,
+        maintenance_kcal=maintenance,
+        observed_mer_factor=round(maintenance / rer, 2),
+        suggested_mer_factor=round(suggested, 2),
+        nearest_mer_factor_key=min(MER_FACTORS, key=lambda key: abs(MER_FACTORS[key] - suggested)),
+    )
+    return trend
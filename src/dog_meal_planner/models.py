@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+import threading
+from operator import attrgetter
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Tuple
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Dog:
     weight_kg: float
     target_weight_kg: Optional[float]
@@ -14,7 +16,7 @@ class Dog:
     activity: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Nutrients:
     kcal: float = 0.0
     protein_g: float = 0.0
@@ -28,6 +30,12 @@ class Nutrients:
     vitamin_d_iu: float = 0.0
     vitamin_e_mg: float = 0.0
 
+    def to_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in NUTRIENT_FIELDS}
+
+    def to_tuple(self) -> Tuple[float, ...]:
+        return _nutrient_values(self)
+
     def __add__(self, other: "Nutrients") -> "Nutrients":
         return Nutrients(
             kcal=self.kcal + other.kcal,
@@ -44,20 +52,71 @@ class Nutrients:
         )
 
 
-@dataclass(frozen=True)
+NUTRIENT_FIELDS = tuple(item.name for item in fields(Nutrients))
+_nutrient_values = attrgetter(*NUTRIENT_FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
 class Ingredient:
     name: str
     kcal_per_100g: float
     nutrients_per_100g: Nutrients = field(default_factory=Nutrients)
 
 
-@dataclass(frozen=True)
+class InternRegistry:
+    # Flyweight store: equal immutable values share one instance. Cleared
+    # wholesale when it grows past max_size so client payloads cannot grow it
+    # without bound.
+    def __init__(self, max_size: int = 100_000) -> None:
+        self.max_size = max_size
+        self._entries: Dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], object]) -> object:
+        value = self._entries.get(key)
+        if value is not None:
+            return value
+        value = factory()
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            return self._entries.setdefault(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+ingredient_registry = InternRegistry()
+
+
+def intern_ingredient(
+    name: str,
+    kcal_per_100g: float,
+    nutrients_per_100g: Mapping[str, float],
+) -> Ingredient:
+    values = tuple(float(nutrients_per_100g.get(item, 0.0)) for item in NUTRIENT_FIELDS)
+    key = (name, float(kcal_per_100g), values)
+    return ingredient_registry.get_or_create(
+        key,
+        lambda: Ingredient(
+            name=name,
+            kcal_per_100g=kcal_per_100g,
+            nutrients_per_100g=Nutrients(*values),
+        ),
+    )
+
+
+@dataclass(frozen=True, slots=True)
 class RecipeItem:
     ingredient: Ingredient
     grams: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Recipe:
     items: List[RecipeItem]
 
@@ -81,7 +140,7 @@ class Recipe:
         return total
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MealPlan:
     target_kcal: float
     kibble_kcal: float
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Tuple
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
 
-from dog_meal_planner.aafco import AAFCO_STANDARDS, evaluate_aafco
+from dog_meal_planner.aafco import COMPILED_PROFILES, evaluate_aafco, evaluate_aafco_batch
 from dog_meal_planner.models import Dog, Ingredient, MealPlan, Nutrients, Recipe
 
 
@@ -24,6 +27,18 @@ class DailyCalories:
     mer: float
 
 
+@dataclass(frozen=True)
+class PlanInput:
+    dog: Dog
+    mer_factor: float
+    kibble_key: Hashable
+    kibble_grams: float
+    treats_kcal: float
+    recipe_key: Hashable
+    meals: Tuple[str, ...] = ("breakfast", "dinner")
+    aafco_profile: str = "adult_maintenance"
+
+
 def compute_rer(weight_kg: float) -> float:
     return RER_MULTIPLIER * (weight_kg ** 0.75)
 
@@ -58,6 +73,21 @@ def compute_meal_plan(
     treats_kcal: float,
     recipe: Recipe,
     meals: Tuple[str, ...] = ("breakfast", "dinner"),
+    aafco_profile: str = "adult_maintenance",
+) -> MealPlan:
+    plan = _meal_plan_without_warnings(dog, mer_factor, kibble, kibble_grams, treats_kcal, recipe, meals)
+    warnings = evaluate_aafco(plan.nutrients_per_1000_kcal, COMPILED_PROFILES[aafco_profile])
+    return replace(plan, aafco_warnings=warnings)
+
+
+def _meal_plan_without_warnings(
+    dog: Dog,
+    mer_factor: float,
+    kibble: Ingredient,
+    kibble_grams: float,
+    treats_kcal: float,
+    recipe: Recipe,
+    meals: Tuple[str, ...],
 ) -> MealPlan:
     daily = compute_daily_calories(dog, mer_factor)
     kibble_kcal = grams_to_calories(kibble_grams, kibble.kcal_per_100g)
@@ -67,7 +97,6 @@ def compute_meal_plan(
     homemade_kcal_budget = remaining_kcal
     nutrients_total = recipe_nutrients + Nutrients(kcal=kibble_kcal + treats_kcal)
     nutrients_per_1000 = normalize_per_1000_kcal(nutrients_total)
-    aafco_warnings = evaluate_aafco(nutrients_per_1000, AAFCO_STANDARDS)
     per_meal_grams = split_recipe_by_meals(recipe, meals)
 
     return MealPlan(
@@ -78,7 +107,7 @@ def compute_meal_plan(
         total_kcal=total_kcal,
         nutrients_total=nutrients_total,
         nutrients_per_1000_kcal=nutrients_per_1000,
-        aafco_warnings=aafco_warnings,
+        aafco_warnings={},
         per_meal_grams=per_meal_grams,
     )
 
@@ -108,3 +137,73 @@ def split_recipe_by_meals(recipe: Recipe, meals: Tuple[str, ...]) -> Dict[str, f
         return {}
     per_meal = total_grams / len(meals)
     return {meal: per_meal for meal in meals}
+
+
+def compute_meal_plans(
+    inputs: Sequence[PlanInput],
+    ingredients: Mapping[Hashable, Ingredient],
+    recipes: Mapping[Hashable, Recipe],
+) -> List[MealPlan]:
+    plans = [
+        _meal_plan_without_warnings(
+            plan_input.dog,
+            plan_input.mer_factor,
+            ingredients[plan_input.kibble_key],
+            plan_input.kibble_grams,
+            plan_input.treats_kcal,
+            recipes[plan_input.recipe_key],
+            plan_input.meals,
+        )
+        for plan_input in inputs
+    ]
+    # Evaluate AAFCO once per life-stage profile over the whole batch.
+    positions_by_profile: Dict[str, List[int]] = {}
+    for position, plan_input in enumerate(inputs):
+        positions_by_profile.setdefault(plan_input.aafco_profile, []).append(position)
+    for profile_name, positions in positions_by_profile.items():
+        vectors = [plans[position].nutrients_per_1000_kcal.to_tuple() for position in positions]
+        warnings = evaluate_aafco_batch(vectors, COMPILED_PROFILES[profile_name])
+        for position, plan_warnings in zip(positions, warnings):
+            plans[position] = replace(plans[position], aafco_warnings=plan_warnings)
+    return plans
+
+
+# Catalog data installed once per pool worker by the initializer, so tasks only
+# carry the small per-dog PlanInput records.
+_worker_ingredients: Mapping[Hashable, Ingredient] = {}
+_worker_recipes: Mapping[Hashable, Recipe] = {}
+
+
+def _init_plan_worker(
+    ingredients: Mapping[Hashable, Ingredient],
+    recipes: Mapping[Hashable, Recipe],
+) -> None:
+    global _worker_ingredients, _worker_recipes
+    _worker_ingredients = ingredients
+    _worker_recipes = recipes
+
+
+def _compute_plan_shard(inputs: Sequence[PlanInput]) -> List[MealPlan]:
+    return compute_meal_plans(inputs, _worker_ingredients, _worker_recipes)
+
+
+def compute_meal_plans_parallel(
+    inputs: Sequence[PlanInput],
+    ingredients: Mapping[Hashable, Ingredient],
+    recipes: Mapping[Hashable, Recipe],
+    workers: Optional[int] = None,
+    shard_size: Optional[int] = None,
+) -> List[MealPlan]:
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(inputs) <= 1:
+        return compute_meal_plans(inputs, ingredients, recipes)
+    if shard_size is None:
+        shard_size = max(len(inputs) // (workers * 4), 1)
+    shards = [inputs[start : start + shard_size] for start in range(0, len(inputs), shard_size)]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_plan_worker,
+        initargs=(dict(ingredients), dict(recipes)),
+    ) as executor:
+        return [plan for shard in executor.map(_compute_plan_shard, shards) for plan in shard]
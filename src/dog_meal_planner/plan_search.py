@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+SEARCH_COLUMNS = ("dog_weight_kg", "mer_factor_key", "total_kcal", "aafco_warning_count")
+SORT_COLUMNS = ("name", "updated_at", "dog_weight_kg", "total_kcal", "aafco_warning_count")
+MAX_PLAN_SEARCH_LIMIT = 1000
+
+# Filter field -> (generated column, comparison).
+FILTER_CLAUSES = {
+    "min_dog_weight_kg": ("dog_weight_kg", ">="),
+    "max_dog_weight_kg": ("dog_weight_kg", "<="),
+    "mer_factor_key": ("mer_factor_key", "="),
+    "min_total_kcal": ("total_kcal", ">="),
+    "max_total_kcal": ("total_kcal", "<="),
+    "min_aafco_warnings": ("aafco_warning_count", ">="),
+    "max_aafco_warnings": ("aafco_warning_count", "<="),
+}
+
+
+def aafco_warning_count(payload: Mapping[str, Any]) -> Optional[int]:
+    # Saved plans carry the compute response under result (frontend) or at
+    # the top level; plans saved without one have no count.
+    result = payload.get("result")
+    warnings = (result if isinstance(result, Mapping) else payload).get("aafco_warnings")
+    return len(warnings) if isinstance(warnings, Mapping) else None
+
+
+@dataclass(frozen=True, slots=True)
+class PlanFilters:
+    min_dog_weight_kg: Optional[float] = None
+    max_dog_weight_kg: Optional[float] = None
+    mer_factor_key: Optional[str] = None
+    min_total_kcal: Optional[float] = None
+    max_total_kcal: Optional[float] = None
+    min_aafco_warnings: Optional[int] = None
+    max_aafco_warnings: Optional[int] = None
+
+    def where(self) -> Tuple[str, List[Any]]:
+        clauses = []
+        params = []
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is not None:
+                column, operator = FILTER_CLAUSES[field.name]
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        return (" AND ".join(clauses) or "1"), params
+
+
+def order_by(sort: str) -> str:
+    # "total_kcal" sorts ascending, "-total_kcal" descending; plans without a
+    # value sort last either way.
+    column = sort.lstrip("-")
+    if column not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}, optionally prefixed with -")
+    direction = "DESC" if sort.startswith("-") else "ASC"
+    return f"{column} {direction} NULLS LAST, id"
+
+
+def search_plans(
+    conn: sqlite3.Connection,
+    filters: PlanFilters,
+    sort: str = "-updated_at",
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    where, params = filters.where()
+    rows = conn.execute(
+        f"""
+        SELECT id, name, updated_at, {', '.join(SEARCH_COLUMNS)}
+        FROM plans
+        WHERE {where}
+        ORDER BY {order_by(sort)}
+        LIMIT ?
+        """,
+        (*params, limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_MEALS = ("breakfast", "dinner")
+ROLLUP_CURSOR = "production"
+
+ProductionLine = Tuple[int, str, Optional[int], Optional[int], Optional[str], Optional[float]]
+
+
+def plan_meals(payload: Mapping[str, Any]) -> Tuple[str, ...]:
+    meals = payload.get("meals")
+    if meals is None:
+        # Plans saved from the frontend keep the raw form value.
+        meals = (payload.get("fields") or {}).get("meals")
+    if isinstance(meals, str):
+        meals = meals.split(",")
+    names = tuple(str(meal).strip() for meal in meals or () if str(meal).strip())
+    return names or DEFAULT_MEALS
+
+
+def plan_items(payload: Mapping[str, Any]) -> List[Mapping[str, Any]]:
+    recipe = payload.get("recipe")
+    if isinstance(recipe, Mapping):
+        return list(recipe.get("items") or [])
+    return list(payload.get("recipeItems") or [])
+
+
+def plan_lines(plan_id: int, payload: Any) -> List[ProductionLine]:
+    if not isinstance(payload, Mapping):
+        return []
+    meals = json.dumps(plan_meals(payload))
+    recipe_id = payload.get("recipe_id")
+    if isinstance(recipe_id, int) and not isinstance(recipe_id, bool):
+        return [(plan_id, meals, recipe_id, None, None, None)]
+    # Merge repeated ingredients so each plan counts once per ingredient.
+    merged: Dict[Any, List[Any]] = {}
+    for item in plan_items(payload):
+        if not isinstance(item, Mapping):
+            continue
+        try:
+            grams = float(item.get("grams") or 0)
+        except (TypeError, ValueError):
+            continue
+        ingredient = item.get("ingredient") or {}
+        ingredient_id = item.get("ingredient_id")
+        name = str(ingredient.get("name") or "").strip() or None
+        if grams <= 0 or (ingredient_id is None and name is None):
+            continue
+        key = ("id", ingredient_id) if ingredient_id is not None else ("name", name.lower())
+        if key in merged:
+            merged[key][1] += grams
+        else:
+            merged[key] = [name, grams, ingredient_id]
+    return [
+        (plan_id, meals, None, ingredient_id, name, grams)
+        for name, grams, ingredient_id in merged.values()
+    ]
+
+
+def _replace_lines(conn: sqlite3.Connection, plans: Iterable[Tuple[int, Optional[str]]]) -> int:
+    count = 0
+    for plan_id, payload_json in plans:
+        conn.execute("DELETE FROM plan_production_lines WHERE plan_id = ?", (plan_id,))
+        if payload_json is not None:
+            try:
+                payload = json.loads(payload_json)
+            except ValueError:
+                payload = None
+            conn.executemany(
+                """
+                INSERT INTO plan_production_lines
+                    (plan_id, meals, recipe_id, ingredient_id, ingredient_name, grams)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                plan_lines(plan_id, payload),
+            )
+        count += 1
+    return count
+
+
+def refresh_production_lines(conn: sqlite3.Connection, full: bool = False) -> int:
+    # Must run inside a write transaction. Returns the number of plans re-read.
+    latest = conn.execute("SELECT coalesce(max(seq), 0) FROM plan_changes").fetchone()[0]
+    cursor = conn.execute("SELECT seq FROM rollup_cursors WHERE name = ?", (ROLLUP_CURSOR,)).fetchone()
+    if full or cursor is None:
+        conn.execute("DELETE FROM plan_production_lines")
+        refreshed = _replace_lines(conn, conn.execute("SELECT id, payload FROM plans"))
+    else:
+        refreshed = _replace_lines(
+            conn,
+            conn.execute(
+                """
+                SELECT plan_changes.plan_id, plans.payload
+                FROM plan_changes
+                LEFT JOIN plans ON plans.id = plan_changes.plan_id
+                WHERE plan_changes.seq > ?
+                """,
+                (cursor[0],),
+            ).fetchall(),
+        )
+    conn.execute(
+        "INSERT OR REPLACE INTO rollup_cursors (name, seq) VALUES (?, ?)",
+        (ROLLUP_CURSOR, latest),
+    )
+    return refreshed
+
+
+def pending_plan_changes(conn: sqlite3.Connection) -> int:
+    # Plans saved, edited or deleted since the last refresh; before the first
+    # refresh nothing has been rolled up, so every plan counts.
+    cursor = conn.execute("SELECT seq FROM rollup_cursors WHERE name = ?", (ROLLUP_CURSOR,)).fetchone()
+    if cursor is None:
+        return conn.execute("SELECT count(*) FROM plans").fetchone()[0]
+    return conn.execute("SELECT count(*) FROM plan_changes WHERE seq > ?", (cursor[0],)).fetchone()[0]
+
+
+def production_rollup(conn: sqlite3.Connection) -> Dict[str, Any]:
+    # Lines are summed per recipe reference or inline ingredient and meal list
+    # before recipes are expanded, so the join touches each recipe once per
+    # meal list rather than once per plan.
+    rows = conn.execute(
+        """
+        WITH sources AS (
+            SELECT recipe_id, ingredient_id, lower(ingredient_name) AS name_key,
+                   max(ingredient_name) AS ingredient_name, meals,
+                   count(*) AS plans, sum(grams) AS grams
+            FROM plan_production_lines
+            GROUP BY recipe_id, ingredient_id, name_key, meals
+        ),
+        recipe_totals AS (
+            SELECT recipe_id, ingredient_id, sum(grams) AS grams
+            FROM recipe_items
+            GROUP BY recipe_id, ingredient_id
+        ),
+        expanded AS (
+            SELECT coalesce(recipe_totals.ingredient_id, sources.ingredient_id) AS ingredient_id,
+                   CASE
+                       WHEN coalesce(recipe_totals.ingredient_id, sources.ingredient_id) IS NULL
+                       THEN sources.name_key
+                   END AS name_key,
+                   sources.ingredient_name AS ingredient_name,
+                   sources.meals AS meals,
+                   sources.plans AS plans,
+                   coalesce(recipe_totals.grams * sources.plans, sources.grams) AS grams
+            FROM sources
+            LEFT JOIN recipe_totals ON recipe_totals.recipe_id = sources.recipe_id
+            WHERE sources.recipe_id IS NULL OR recipe_totals.recipe_id IS NOT NULL
+        ),
+        per_meal AS (
+            SELECT expanded.ingredient_id AS ingredient_id,
+                   expanded.name_key AS name_key,
+                   max(expanded.ingredient_name) AS ingredient_name,
+                   meal.value AS meal,
+                   sum(expanded.grams / json_array_length(expanded.meals)) AS grams
+            FROM expanded, json_each(expanded.meals) AS meal
+            GROUP BY expanded.ingredient_id, expanded.name_key, meal.value
+        ),
+        plan_counts AS (
+            SELECT ingredient_id, name_key, sum(plans) AS plans
+            FROM expanded
+            GROUP BY ingredient_id, name_key
+        )
+        SELECT per_meal.ingredient_id AS ingredient_id,
+               coalesce(max(ingredients.name), max(per_meal.ingredient_name)) AS name,
+               sum(per_meal.grams) AS grams_per_day,
+               json_group_object(per_meal.meal, per_meal.grams) AS per_meal_grams,
+               max(plan_counts.plans) AS plans
+        FROM per_meal
+        JOIN plan_counts
+          ON plan_counts.ingredient_id IS per_meal.ingredient_id
+         AND plan_counts.name_key IS per_meal.name_key
+        LEFT JOIN ingredients ON ingredients.id = per_meal.ingredient_id
+        GROUP BY per_meal.ingredient_id, per_meal.name_key
+        ORDER BY grams_per_day DESC, name
+        """
+    ).fetchall()
+    ingredients = [
+        {
+            "ingredient_id": row["ingredient_id"],
+            "name": row["name"],
+            "grams_per_day": row["grams_per_day"],
+            "per_meal_grams": json.loads(row["per_meal_grams"]),
+            "plans": row["plans"],
+        }
+        for row in rows
+    ]
+    plan_count = conn.execute(
+        "SELECT count(DISTINCT plan_id) FROM plan_production_lines"
+    ).fetchone()[0]
+    return {
+        "plan_count": plan_count,
+        "total_grams_per_day": sum(item["grams_per_day"] for item in ingredients),
+        "ingredients": ingredients,
+    }
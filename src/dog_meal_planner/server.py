@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+from typing import List, Optional
+
+import uvicorn
+
+from dog_meal_planner.storage import init_db
+
+
+APP_PATH = "dog_meal_planner.api:app"
+
+
+def default_workers() -> int:
+    env_workers = os.getenv("WEB_CONCURRENCY")
+    if env_workers:
+        return int(env_workers)
+    return os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # proto must be IPPROTO_TCP (not 0) or asyncio skips TCP_NODELAY on
+    # accepted connections, which stalls keep-alive responses by ~40ms.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(host: str, port: int, log_level: str, run_jobs: bool = True) -> None:
+    if not run_jobs:
+        os.environ["DOG_MEAL_PLANNER_JOBS"] = "0"
+    sock = bind_socket(host, port)
+    config = uvicorn.Config(APP_PATH, host=host, port=port, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int, log_level: str) -> None:
+    # Create the schema and switch to WAL once, before workers race to do it.
+    init_db()
+    if workers <= 1 or not hasattr(socket, "SO_REUSEPORT"):
+        if workers > 1 and not os.getenv("DOG_MEAL_PLANNER_JOB_PROCESSES"):
+            # Every uvicorn worker runs its own job runner here, so they split
+            # the job processes between them.
+            os.environ["DOG_MEAL_PLANNER_JOB_PROCESSES"] = str(max((os.cpu_count() or 1) // workers, 1))
+        uvicorn.run(APP_PATH, host=host, port=port, workers=workers, log_level=log_level)
+        return
+
+    # Every worker listens on its own SO_REUSEPORT socket and the kernel spreads
+    # connections across them. Only the first runs the job runner, so there is
+    # one job process pool however many workers serve requests.
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=serve_worker, args=(host, port, log_level, index == 0), daemon=False)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(signum: int, frame: object) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for process in processes:
+        process.join()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Dog Meal Planner API with several workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
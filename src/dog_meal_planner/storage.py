@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import json
 import os
 import sqlite3
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, Optional
+
+from dog_meal_planner.plan_search import aafco_warning_count
 
 
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -21,18 +24,75 @@ def resolve_db_path() -> Path:
 
 
 DB_PATH = resolve_db_path()
+BUSY_TIMEOUT_SECONDS = float(os.getenv("DOG_MEAL_PLANNER_BUSY_TIMEOUT", "30"))
+
+
+def upgrade_plans_table(conn: sqlite3.Connection) -> None:
+    # Generated columns cannot be added or changed with ALTER TABLE, so a plans
+    # table whose columns differ from schema.sql is rebuilt: the table, its
+    # indexes and its triggers, all in one transaction. A crash part way
+    # through rolls back to the old table.
+    reference = sqlite3.connect(":memory:")
+    try:
+        reference.executescript(SCHEMA_PATH.read_text())
+        expected = reference.execute("PRAGMA table_xinfo(plans)").fetchall()
+        definitions = [
+            row[0]
+            for row in reference.execute(
+                "SELECT sql FROM sqlite_master WHERE tbl_name = 'plans' AND sql IS NOT NULL ORDER BY rowid"
+            )
+        ]
+    finally:
+        reference.close()
+    current = conn.execute("PRAGMA table_xinfo(plans)").fetchall()
+    if not current or [tuple(row) for row in current] == [tuple(row) for row in expected]:
+        return
+    # Only plain columns hold data; generated ones are recomputed on insert.
+    kept = {row[1] for row in current if row[6] == 0}
+    columns = ", ".join(row[1] for row in expected if row[6] == 0 and row[1] in kept)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("ALTER TABLE plans RENAME TO plans_legacy")
+        conn.execute(definitions[0])
+        conn.execute(f"INSERT INTO plans ({columns}) SELECT {columns} FROM plans_legacy")
+        conn.executemany(
+            "UPDATE plans SET aafco_warning_count = ? WHERE id = ?",
+            [
+                (aafco_warning_count(json.loads(payload)), plan_id)
+                for plan_id, payload in conn.execute(
+                    "SELECT id, payload FROM plans WHERE aafco_warning_count IS NULL"
+                ).fetchall()
+            ],
+        )
+        # Dropping the old table drops its indexes and triggers, which frees
+        # their names for the new definitions.
+        conn.execute("DROP TABLE plans_legacy")
+        for definition in definitions[1:]:
+            conn.execute(definition)
+        # Searchable values may have changed, so cached plan reads must miss.
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'table_versions'").fetchone():
+            conn.execute(
+                "UPDATE table_versions SET version = version + 1, updated_at = datetime('now') "
+                "WHERE table_name = 'plans'"
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
 
 
 def init_db() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
+    with sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SECONDS) as conn:
+        conn.execute("PRAGMA journal_mode = WAL;")
         conn.execute("PRAGMA foreign_keys = ON;")
+        upgrade_plans_table(conn)
         conn.executescript(SCHEMA_PATH.read_text())
         conn.commit()
 
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+def get_connection(db_path: Optional[Path] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
@@ -45,3 +105,17 @@ def db_session() -> Iterator[sqlite3.Connection]:
         conn.commit()
     finally:
         conn.close()
+
+
+def db_write_session() -> Iterator[sqlite3.Connection]:
+    # Take the write lock up front so concurrent writers from other workers
+    # queue on busy_timeout instead of failing on a read-to-write upgrade.
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import heapq
+import math
+import sqlite3
+import threading
+from operator import itemgetter
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from dog_meal_planner.aafco import AAFCO_STANDARDS
+from dog_meal_planner.density_index import DENSITY_FIELDS
+from dog_meal_planner.models import Ingredient, Nutrients, Recipe, RecipeItem
+
+Vector = Tuple[float, ...]
+
+# Coordinates are nutrient density per 100 kcal divided by the adult AAFCO
+# minimum per 100 kcal, so grams, milligrams and IU weigh in on one scale.
+# Nutrients without a standard fall back to DEFAULT_SCALE.
+DEFAULT_SCALE = 10.0
+DENSITY_SCALES: Vector = tuple(
+    AAFCO_STANDARDS[field].minimum / 10.0 if field in AAFCO_STANDARDS else DEFAULT_SCALE
+    for field in DENSITY_FIELDS
+)
+DEFAULT_WEIGHTS: Vector = tuple(1.0 for _ in DENSITY_FIELDS)
+LEAF_SIZE = 8
+REBUILD_MIN_CHANGES = 64
+REBUILD_FRACTION = 0.05
+
+
+def density_vector(kcal_per_100g: float, nutrients_per_100g: Mapping[str, float]) -> Optional[Vector]:
+    if not kcal_per_100g or kcal_per_100g <= 0:
+        return None
+    return tuple(
+        (nutrients_per_100g[field] or 0.0) * 100.0 / kcal_per_100g / scale
+        for field, scale in zip(DENSITY_FIELDS, DENSITY_SCALES)
+    )
+
+
+def parse_weights(params: Mapping[str, str]) -> Vector:
+    weights = dict(zip(DENSITY_FIELDS, DEFAULT_WEIGHTS))
+    for key, raw in params.items():
+        field = key.removesuffix("_weight")
+        if field == key or field not in weights:
+            raise ValueError(f"Unknown weight parameter: {key}")
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValueError(f"{key} must be a number") from None
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{key} must be a non-negative number")
+        weights[field] = value
+    return tuple(weights[field] for field in DENSITY_FIELDS)
+
+
+def weighted_distance(a: Vector, b: Vector, weights: Vector) -> float:
+    total = 0.0
+    for weight, left, right in zip(weights, a, b):
+        delta = left - right
+        total += weight * delta * delta
+    return total
+
+
+class KDTree:
+    # Static tree over flat arrays. Node n is a leaf when split_dims[n] < 0 and
+    # then owns ids/points[starts[n]:ends[n]]; otherwise children are n + 1 and
+    # rights[n].
+    def __init__(self, ids: Sequence[int], points: Sequence[Vector], leaf_size: int = LEAF_SIZE) -> None:
+        self.leaf_size = leaf_size
+        self.ids: List[int] = []
+        self.points: List[Vector] = []
+        self.split_dims: List[int] = []
+        self.split_values: List[float] = []
+        self.rights: List[int] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        if ids:
+            self._build([(*point, ident) for ident, point in zip(ids, points)])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build(self, items: List[Tuple[float, ...]]) -> None:
+        # items are point coordinates with the id appended, so sorting can use
+        # itemgetter instead of a Python key function.
+        node = len(self.split_dims)
+        self.split_dims.append(-1)
+        self.split_values.append(0.0)
+        self.rights.append(-1)
+        self.starts.append(len(self.ids))
+        if len(items) <= self.leaf_size:
+            for item in items:
+                self.ids.append(item[-1])
+                self.points.append(item[:-1])
+            self.ends.append(len(self.ids))
+            return
+        self.ends.append(len(self.ids))
+        # Split on the widest dimension of an evenly spaced sample.
+        sample = items[:: max(len(items) // 64, 1)]
+        columns = list(zip(*sample))[:-1]
+        dim = max(range(len(columns)), key=lambda axis: max(columns[axis]) - min(columns[axis]))
+        items.sort(key=itemgetter(dim))
+        middle = len(items) // 2
+        self.split_dims[node] = dim
+        self.split_values[node] = items[middle][dim]
+        self._build(items[:middle])
+        self.rights[node] = len(self.split_dims)
+        self._build(items[middle:])
+
+    def nearest(
+        self,
+        query: Vector,
+        k: int,
+        weights: Vector = DEFAULT_WEIGHTS,
+        skip: Set[int] = frozenset(),
+    ) -> List[Tuple[float, int]]:
+        # Returns (squared weighted distance, id) pairs, nearest first.
+        heap: List[Tuple[float, int]] = []
+        if self.ids and k > 0:
+            self._search(0, 0.0, [0.0] * len(query), query, k, weights, skip, heap)
+        return sorted((-negated, ident) for negated, ident in heap)
+
+    def _search(
+        self,
+        node: int,
+        bound: float,
+        offsets: List[float],
+        query: Vector,
+        k: int,
+        weights: Vector,
+        skip: Set[int],
+        heap: List[Tuple[float, int]],
+    ) -> None:
+        # bound is the weighted squared distance from the query to this node's
+        # cell, kept incrementally from the per-axis offsets (Arya & Mount).
+        dim = self.split_dims[node]
+        if dim < 0:
+            ids, points = self.ids, self.points
+            for position in range(self.starts[node], self.ends[node]):
+                ident = ids[position]
+                if ident in skip:
+                    continue
+                distance = weighted_distance(points[position], query, weights)
+                if len(heap) < k:
+                    heapq.heappush(heap, (-distance, ident))
+                elif distance < -heap[0][0]:
+                    heapq.heapreplace(heap, (-distance, ident))
+            return
+        offset = query[dim] - self.split_values[node]
+        near, far = (node + 1, self.rights[node]) if offset < 0 else (self.rights[node], node + 1)
+        self._search(near, bound, offsets, query, k, weights, skip, heap)
+        previous = offsets[dim]
+        far_bound = bound + weights[dim] * (offset * offset - previous * previous)
+        if len(heap) < k or far_bound < -heap[0][0]:
+            offsets[dim] = offset
+            self._search(far, far_bound, offsets, query, k, weights, skip, heap)
+            offsets[dim] = previous
+
+
+INGREDIENT_VECTOR_COLUMNS = ("id", "kcal_per_100g") + DENSITY_FIELDS
+
+
+class SubstitutionIndex:
+    # KD-tree over every ingredient with calories, kept current from the
+    # ingredient_changes log. Edits since the last build live in a small
+    # overlay (pending points searched by brute force, stale tree entries
+    # skipped) until it grows past REBUILD_FRACTION of the catalog.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._epoch: Optional[str] = None
+        self._seq = 0
+        self._vectors: Dict[int, Vector] = {}
+        self._tree: Optional[KDTree] = None
+        self._tree_ids: Set[int] = set()
+        self._pending: Set[int] = set()
+        self._stale: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            row = conn.execute(
+                "SELECT epoch FROM table_versions WHERE table_name = 'ingredients'"
+            ).fetchone()
+            epoch = row[0] if row else None
+            if self._tree is None or epoch != self._epoch:
+                self._load(conn, epoch)
+                return
+            changes = conn.execute(
+                "SELECT ingredient_id, seq FROM ingredient_changes WHERE seq > ?",
+                (self._seq,),
+            ).fetchall()
+            if not changes:
+                return
+            current = {
+                row[0]: vector_from_row(row)
+                for row in conn.execute(
+                    f"""
+                    SELECT {', '.join(INGREDIENT_VECTOR_COLUMNS)} FROM ingredients
+                    WHERE id IN (SELECT ingredient_id FROM ingredient_changes WHERE seq > ?)
+                    """,
+                    (self._seq,),
+                )
+            }
+            for ident, seq in changes:
+                self._seq = max(self._seq, seq)
+                self._vectors.pop(ident, None)
+                self._pending.discard(ident)
+                if ident in self._tree_ids:
+                    self._stale.add(ident)
+                vector = current.get(ident)
+                if vector is not None:
+                    self._vectors[ident] = vector
+                    self._pending.add(ident)
+            if len(self._pending) + len(self._stale) > max(
+                REBUILD_MIN_CHANGES, len(self._vectors) * REBUILD_FRACTION
+            ):
+                self._rebuild()
+
+    def _load(self, conn: sqlite3.Connection, epoch: Optional[str]) -> None:
+        # Read the log position first so writes racing the scan are replayed.
+        self._seq = conn.execute("SELECT coalesce(max(seq), 0) FROM ingredient_changes").fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(INGREDIENT_VECTOR_COLUMNS)} FROM ingredients WHERE kcal_per_100g > 0"
+        )
+        self._vectors = {row[0]: vector_from_row(row) for row in rows}
+        self._epoch = epoch
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        ids = list(self._vectors)
+        self._tree = KDTree(ids, [self._vectors[ident] for ident in ids])
+        self._tree_ids = set(ids)
+        self._pending.clear()
+        self._stale.clear()
+
+    def vector(self, ingredient_id: int) -> Optional[Vector]:
+        return self._vectors.get(ingredient_id)
+
+    def nearest(
+        self,
+        query: Vector,
+        k: int,
+        weights: Vector = DEFAULT_WEIGHTS,
+        exclude: Set[int] = frozenset(),
+    ) -> List[Tuple[float, int]]:
+        # Returns (weighted distance, ingredient id) pairs, nearest first.
+        with self._lock:
+            if self._tree is None:
+                return []
+            found = self._tree.nearest(query, k, weights, self._stale | exclude)
+            for ident in self._pending - exclude:
+                found.append((weighted_distance(self._vectors[ident], query, weights), ident))
+        found.sort()
+        return [(math.sqrt(distance), ident) for distance, ident in found[:k]]
+
+
+def vector_from_row(row: Sequence) -> Optional[Vector]:
+    return density_vector(row[1], dict(zip(DENSITY_FIELDS, row[2:])))
+
+
+def substitute_in_recipe(
+    items: Sequence[Tuple[int, RecipeItem]],
+    original_id: int,
+    substitute: Ingredient,
+) -> Tuple[Recipe, float]:
+    # Swap at equal calories so the recipe's energy is unchanged. Returns the
+    # new recipe and the grams of substitute it uses.
+    swapped: List[RecipeItem] = []
+    grams = 0.0
+    for ingredient_id, item in items:
+        if ingredient_id == original_id:
+            item = RecipeItem(
+                ingredient=substitute,
+                grams=item.grams * item.ingredient.kcal_per_100g / substitute.kcal_per_100g,
+            )
+            grams += item.grams
+        swapped.append(item)
+    return Recipe(items=swapped), grams
+
+
+def aafco_delta(before: Mapping[str, str], after: Mapping[str, str]) -> Dict[str, object]:
+    return {
+        "added": {field: message for field, message in after.items() if field not in before},
+        "resolved": sorted(field for field in before if field not in after),
+    }
+
+
+def nutrient_delta(before: Nutrients, after: Nutrients) -> Dict[str, float]:
+    return {
+        field: value - previous
+        for (field, previous), value in zip(before.to_dict().items(), after.to_tuple())
+    }
+
+
+substitution_index = SubstitutionIndex()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REDACTED_FIELDS = frozenset({"api_key"})
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+
+def redact(value: Any, path: str = "", redacted: Optional[Set[str]] = None) -> Tuple[Any, Set[str]]:
+    # Returns the value without secret fields and the dotted paths that were removed.
+    redacted = set() if redacted is None else redacted
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            child = f"{path}.{key}" if path else str(key)
+            if key in REDACTED_FIELDS:
+                redacted.add(child)
+            else:
+                cleaned[key] = redact(item, child, redacted)[0]
+        return cleaned, redacted
+    if isinstance(value, list):
+        return [redact(item, f"{path}.{index}", redacted)[0] for index, item in enumerate(value)], redacted
+    return value, redacted
+
+
+def redact_query(query_string: str) -> Tuple[str, List[str]]:
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    removed = sorted({key for key, _ in pairs if key in REDACTED_FIELDS})
+    return urlencode([(key, value) for key, value in pairs if key not in REDACTED_FIELDS]), removed
+
+
+def traffic_record(
+    scope: Scope,
+    body: bytes,
+    status: int,
+    started: float,
+    duration_ms: float,
+) -> Dict[str, Any]:
+    query, redacted_query = redact_query(scope.get("query_string", b"").decode("latin-1"))
+    headers = dict(scope.get("headers") or [])
+    content_type = headers.get(b"content-type", b"").decode("latin-1")
+    record: Dict[str, Any] = {
+        "ts": started,
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": getattr(scope.get("route"), "path", None),
+        "query": query,
+        "status": status,
+        "duration_ms": round(duration_ms, 3),
+    }
+    redacted: Set[str] = set()
+    if body:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            # Only JSON bodies can be sanitized, so anything else is left out.
+            record["body_omitted"] = len(body)
+        else:
+            record["content_type"] = content_type or "application/json"
+            record["body"], redacted = redact(payload)
+    if redacted or redacted_query:
+        record["redacted"] = sorted(redacted) + [f"?{key}" for key in redacted_query]
+    return record
+
+
+def open_traffic_log(directory: Path, max_bytes: int, backup_count: int) -> Tuple[logging.Logger, QueueListener]:
+    # The logger only enqueues; the listener's thread does the file writes and
+    # rotation so they never block the event loop.
+    directory.mkdir(parents=True, exist_ok=True)
+    # One file per worker process so rotation never races between workers.
+    handler = RotatingFileHandler(
+        directory / f"traffic-{os.getpid()}.ndjson",
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, handler)
+    listener.start()
+    logger = logging.getLogger(f"dog_meal_planner.traffic.{os.getpid()}")
+    logger.handlers[:] = [QueueHandler(records)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, listener
+
+
+class TrafficRecorder:
+    def __init__(self, app: ASGIApp, directory: Path, max_bytes: int, backup_count: int) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._logger: Optional[logging.Logger] = None
+        self._listener: Optional[QueueListener] = None
+
+    def log(self, record: Dict[str, Any]) -> None:
+        # Opened lazily so each forked worker gets its own file and writer thread.
+        if self._logger is None:
+            self._logger, self._listener = open_traffic_log(self.directory, self.max_bytes, self.backup_count)
+            atexit.register(self.close)
+        self._logger.info(json.dumps(record, separators=(",", ":")))
+
+    def close(self) -> None:
+        # Writes out everything still queued, then stops the writer thread.
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._logger = self._listener = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.close()
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        chunks: List[bytes] = []
+        status = 500
+        started = time.time()
+        clock = time.perf_counter()
+
+        async def recording_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            duration_ms = (time.perf_counter() - clock) * 1000
+            self.log(traffic_record(scope, b"".join(chunks), status, started, duration_ms))
+
+
+def recording_directory() -> Optional[Path]:
+    directory = os.getenv("DOG_MEAL_PLANNER_RECORD_DIR")
+    return Path(directory) if directory else None
+
+
+def recorder_options() -> Dict[str, int]:
+    return {
+        "max_bytes": int(os.getenv("DOG_MEAL_PLANNER_RECORD_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+        "backup_count": int(os.getenv("DOG_MEAL_PLANNER_RECORD_BACKUPS", str(DEFAULT_BACKUP_COUNT))),
+    }
+
+
+def load_traffic(paths: Iterable[Path]) -> List[Dict[str, Any]]:
+    # Accepts files or directories of traffic-*.ndjson[.N] files; returns records by start time.
+    records = []
+    for path in paths:
+        files = sorted(Path(path).glob("traffic-*.ndjson*")) if Path(path).is_dir() else [Path(path)]
+        for file in files:
+            with file.open(encoding="utf-8") as handle:
+                records.extend(json.loads(line) for line in handle if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from typing import Dict, Optional
 
@@ -7,6 +8,18 @@ import requests
 
 from dog_meal_planner.models import Ingredient, Nutrients
 
+# Overridable so load tests can point the API at a local stub.
+USDA_BASE_URL = os.getenv("DOG_MEAL_PLANNER_USDA_URL", "https://api.nal.usda.gov/fdc/v1")
+
+
+def server_api_key() -> str:
+    # Background imports use the server's own key; a client's key would have
+    # to be stored in the job row, and from there in every backup.
+    api_key = os.getenv("DOG_MEAL_PLANNER_USDA_API_KEY")
+    if not api_key:
+        raise ValueError("Set DOG_MEAL_PLANNER_USDA_API_KEY to run USDA imports in the background")
+    return api_key
+
 
 @dataclass(frozen=True)
 class USDAFood:
@@ -17,7 +30,7 @@ class USDAFood:
 
 
 class USDAClient:
-    def __init__(self, api_key: str, base_url: str = "https://api.nal.usda.gov/fdc/v1") -> None:
+    def __init__(self, api_key: str, base_url: str = USDA_BASE_URL) -> None:
         self.api_key = api_key
         self.base_url = base_url
 
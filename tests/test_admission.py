@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from dog_meal_planner.admission import AdmissionController, Overloaded, RouteClass, classify
+
+CLASSES = {
+    "cheap": RouteClass("cheap", limit=1, queue_size=4, timeout_seconds=1.0, priority=0),
+    "expensive": RouteClass("expensive", limit=1, queue_size=1, timeout_seconds=0.05, priority=2),
+}
+
+
+def test_classify_routes():
+    assert classify("GET", "/health").name == "cheap"
+    assert classify("GET", "/rer/12.5").name == "cheap"
+    assert classify("GET", "/ingredients/3").name == "catalog"
+    assert classify("GET", "/ingredients/3/substitutes").name == "expensive"
+    assert classify("POST", "/compute-plan").name == "expensive"
+    assert classify("POST", "/production/refresh").name == "expensive"
+    assert classify("POST", "/admin/backups").name == "expensive"
+    assert classify("POST", "/admin/backups/20260101T000000000000Z-full/restore").name == "expensive"
+    assert classify("PUT", "/ingredients/3").name == "expensive"
+    assert classify("PUT", "/recipes/3").name == "expensive"
+    assert classify("POST", "/jobs").name == "write"
+    assert classify("POST", "/jobs/7/cancel").name == "write"
+    assert classify("POST", "/measurements").name == "write"
+    assert classify("POST", "/plans").name == "write"
+    assert classify("PUT", "/plans/2").name == "write"
+    assert classify("DELETE", "/plans/2").name == "write"
+    assert classify("POST", "/dogs").name == "write"
+    assert classify("DELETE", "/dogs/4").name == "write"
+    assert classify("POST", "/ingredients").name == "write"
+    assert classify("DELETE", "/ingredients/3").name == "write"
+
+
+def test_queue_full_and_deadline_shed_load():
+    async def scenario():
+        controller = AdmissionController(CLASSES, total_limit=2)
+        expensive = CLASSES["expensive"]
+        await controller.acquire(expensive)
+        waiter = asyncio.ensure_future(controller.acquire(expensive))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await controller.acquire(expensive)
+        assert full.value.retry_after >= 1
+        with pytest.raises(Overloaded):
+            await waiter
+        controller.release(expensive, 0.01)
+        assert controller.in_flight == {"cheap": 0, "expensive": 0}
+
+    asyncio.run(scenario())
+
+
+def test_freed_slots_go_to_cheap_routes_first():
+    async def scenario():
+        controller = AdmissionController(
+            {name: RouteClass(name, 2, 4, 1.0, route.priority) for name, route in CLASSES.items()},
+            total_limit=1,
+        )
+        cheap, expensive = controller.classes["cheap"], controller.classes["expensive"]
+        await controller.acquire(expensive)
+        admitted = []
+
+        async def request(route_class):
+            await controller.acquire(route_class)
+            admitted.append(route_class.name)
+            controller.release(route_class, 0.0)
+
+        waiters = [asyncio.ensure_future(request(expensive)), asyncio.ensure_future(request(cheap))]
+        await asyncio.sleep(0)
+        controller.release(expensive, 0.0)
+        await asyncio.gather(*waiters)
+        assert admitted == ["cheap", "expensive"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+from dog_meal_planner.api import ComputePlanPayload, compute_plan_response
+from dog_meal_planner.storage import SCHEMA_PATH
+
+
+@pytest.fixture()
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute("INSERT INTO ingredients (id, name, kcal_per_100g) VALUES (1, 'kibble', 350)")
+    connection.execute(
+        "INSERT INTO ingredients (id, name, kcal_per_100g, protein_g) VALUES (2, 'chicken', 165, 31)"
+    )
+    connection.execute("INSERT INTO recipes (id, name) VALUES (1, 'chicken bowl')")
+    connection.execute("INSERT INTO recipe_items (recipe_id, ingredient_id, grams) VALUES (1, 2, 200)")
+    yield connection
+    connection.close()
+
+
+def plan_payload(**overrides):
+    payload = {
+        "dog": {
+            "weight_kg": 20.0,
+            "age_years": 3.0,
+            "sex": "male",
+            "neutered": True,
+            "activity": "moderate",
+        },
+        "mer_factor_key": "neutered_adult",
+        "kibble_grams": 100.0,
+        "treats_kcal": 50.0,
+    }
+    payload.update(overrides)
+    return ComputePlanPayload(**payload)
+
+
+def test_references_match_inline_payload(conn):
+    inline = compute_plan_response(
+        conn,
+        plan_payload(
+            kibble={"name": "kibble", "kcal_per_100g": 350},
+            recipe={
+                "items": [
+                    {
+                        "grams": 200,
+                        "ingredient": {
+                            "name": "chicken",
+                            "kcal_per_100g": 165,
+                            "nutrients_per_100g": {"protein_g": 31},
+                        },
+                    }
+                ]
+            },
+        ),
+    )
+    by_recipe = compute_plan_response(conn, plan_payload(kibble_id=1, recipe_id=1))
+    by_item = compute_plan_response(
+        conn, plan_payload(kibble_id=1, recipe={"items": [{"grams": 200, "ingredient_id": 2}]})
+    )
+    assert by_recipe["total_kcal"] == inline["total_kcal"] == by_item["total_kcal"]
+    assert by_recipe["nutrients_total"]["protein_g"] == inline["nutrients_total"]["protein_g"]
+
+
+def test_missing_references_are_404(conn):
+    with pytest.raises(HTTPException) as excinfo:
+        compute_plan_response(conn, plan_payload(kibble_id=99, recipe_id=1))
+    assert excinfo.value.status_code == 404
+    with pytest.raises(HTTPException) as excinfo:
+        compute_plan_response(conn, plan_payload(kibble_id=1, recipe_id=99))
+    assert excinfo.value.status_code == 404
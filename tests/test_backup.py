@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dog_meal_planner import backup, jobs, storage
+from dog_meal_planner.api import app
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "dogs.db")
+    monkeypatch.setenv("DOG_MEAL_PLANNER_BACKUP_DIR", str(tmp_path / "backups"))
+    storage.init_db()
+    return TestClient(app)
+
+
+def ingredient_names(client):
+    return sorted(row["name"] for row in client.get("/ingredients").json())
+
+
+def add_ingredients(client, prefix, count):
+    for index in range(count):
+        body = {"name": f"{prefix} {index}", "kcal_per_100g": 100 + index, "nutrients_per_100g": {"protein_g": 1}}
+        assert client.post("/ingredients", json=body).status_code == 200
+
+
+def test_incremental_chain_restores_each_point_in_time(client):
+    add_ingredients(client, "base", 200)
+    full = backup.create_backup(step_pages=1)
+    add_ingredients(client, "later", 3)
+    names_at_incremental = ingredient_names(client)
+    incremental = backup.create_backup(incremental=True)
+    assert (incremental.kind, incremental.parent) == ("incremental", full.name)
+    assert 0 < incremental.pages_written < incremental.page_count
+
+    client.delete(f"/ingredients/{client.get('/ingredients').json()[0]['id']}")
+    etag = client.get("/ingredients").headers["ETag"]
+    response = client.post(f"/admin/backups/{incremental.name}/restore")
+    assert response.status_code == 200
+    assert ingredient_names(client) == names_at_incremental
+    assert client.get("/ingredients", headers={"If-None-Match": etag}).status_code == 200
+
+    backup.restore_backup(full.name)
+    assert len(ingredient_names(client)) == 200
+    assert [record["name"] for record in client.get("/admin/backups").json()] == [full.name, incremental.name]
+
+
+def test_restore_rejects_snapshot_that_does_not_match_schema(client):
+    conn = storage.get_connection()
+    conn.execute("ALTER TABLE dogs ADD COLUMN breed TEXT")
+    conn.commit()
+    conn.close()
+    manifest = backup.create_backup()
+
+    response = client.post(f"/admin/backups/{manifest.name}/restore")
+    assert response.status_code == 400
+    assert "table dogs differs" in response.json()["detail"]
+    assert client.post("/admin/backups/20990101T000000000000Z-full/restore").status_code == 404
+    assert client.post("/admin/backups/dogs.db/restore").status_code == 400
+
+    outside = storage.DB_PATH.parent / "notes.restore"
+    outside.write_text("keep")
+    with pytest.raises(ValueError):
+        backup.restore_backup("../notes")
+    assert outside.read_text() == "keep"
+
+
+def test_backup_jobs_run_one_at_a_time(client):
+    first = client.post("/admin/backups", json={})
+    assert first.status_code == 202
+    assert client.post("/admin/backups", json={"incremental": True}).status_code == 409
+
+    runner = jobs.JobRunner(process_workers=1, thread_workers=1)
+    runner.start()
+    try:
+        deadline = time.monotonic() + 60
+        while client.get(f"/jobs/{first.json()['id']}").json()["status"] != "succeeded":
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+    finally:
+        runner.stop()
+    assert [record["kind"] for record in client.get("/admin/backups").json()] == ["full"]
+    assert client.post("/admin/backups", json={"incremental": True}).status_code == 202
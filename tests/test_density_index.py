@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from dog_meal_planner.density_index import DensityRange, parse_density_ranges, search_by_density
+from dog_meal_planner.storage import SCHEMA_PATH
+
+
+@pytest.fixture()
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.executemany(
+        "INSERT INTO ingredients (id, name, kcal_per_100g, calcium_mg, phosphorus_mg, zinc_mg) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (1, "eggshell", 100, 3000, 100, 0),
+            (2, "sardines", 200, 400, 500, 3),
+            (3, "liver", 130, 5, 390, 4),
+            (4, "water", 0, 0, 0, 0),
+        ],
+    )
+    yield connection
+    connection.close()
+
+
+def names(rows):
+    return [row["name"] for row in rows]
+
+
+def test_box_query_uses_exact_density(conn):
+    ranges = [DensityRange("calcium_mg", minimum=200), DensityRange("phosphorus_mg", maximum=250)]
+    assert names(search_by_density(conn, ranges, ["name"])) == ["eggshell", "sardines"]
+    ranges = [DensityRange("calcium_mg", minimum=200), DensityRange("zinc_mg", minimum=1.5)]
+    assert names(search_by_density(conn, ranges, ["name"])) == ["sardines"]
+    assert names(search_by_density(conn, [DensityRange("zinc_mg", maximum=1.5)], ["name"])) == [
+        "eggshell",
+        "sardines",
+    ]
+
+
+def test_index_follows_updates_and_deletes(conn):
+    ranges = [DensityRange("calcium_mg", minimum=1000)]
+    conn.execute("UPDATE ingredients SET calcium_mg = 50 WHERE id = 1")
+    conn.execute("UPDATE ingredients SET kcal_per_100g = 20 WHERE id = 2")
+    assert names(search_by_density(conn, ranges, ["name"])) == ["sardines"]
+    conn.execute("DELETE FROM ingredients WHERE id = 2")
+    assert search_by_density(conn, ranges, ["name"]) == []
+    assert conn.execute("SELECT count(*) FROM ingredient_density_micros").fetchone()[0] == 2
+
+
+def test_parse_density_ranges():
+    ranges = parse_density_ranges({"calcium_mg_min": "1.5", "calcium_mg_max": "3", "iron_mg_max": "2"})
+    assert ranges == [DensityRange("calcium_mg", 1.5, 3.0), DensityRange("iron_mg", None, 2.0)]
+    for params in ({"sodium_mg_min": "1"}, {"iron_mg_min": "x"}, {"iron_mg_min": "3", "iron_mg_max": "1"}):
+        with pytest.raises(ValueError):
+            parse_density_ranges(params)
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from dog_meal_planner import storage
+from dog_meal_planner.api import app
+
+DOG = {"weight_kg": 20.0, "age_years": 3.0, "sex": "male", "neutered": True, "activity": "moderate"}
+PLAN = {"mer_factor_key": "neutered_adult", "kibble_grams": 100.0, "treats_kcal": 0.0}
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "dogs.db")
+    storage.init_db()
+    return TestClient(app)
+
+
+def ingredient(client, name, kcal, protein_g=0.0):
+    body = {"name": name, "kcal_per_100g": kcal, "nutrients_per_100g": {"protein_g": protein_g}}
+    return client.post("/ingredients", json=body).json()["id"]
+
+
+def test_catalog_changes_replan_only_dependent_plans(client):
+    kibble = ingredient(client, "kibble", 350)
+    chicken = ingredient(client, "chicken", 165, 31)
+    rice = ingredient(client, "rice", 130)
+    recipe = client.post("/recipes", json={"name": "bowl", "items": [{"ingredient_id": chicken, "grams": 200}]})
+    rex = client.post("/dogs", json={"name": "Rex", **DOG}).json()["id"]
+    bella = client.post("/dogs", json={"name": "Bella", **DOG, "weight_kg": 8.0}).json()["id"]
+    first = client.post(
+        f"/dogs/{rex}/plans", json={"name": "rex daily", "kibble_id": kibble, "recipe_id": recipe.json()["id"], **PLAN}
+    ).json()
+    second = client.post(
+        f"/dogs/{bella}/plans",
+        json={
+            "name": "bella daily",
+            "kibble": {"name": "inline kibble", "kcal_per_100g": 340},
+            "recipe": {"items": [{"ingredient_id": rice, "grams": 100}]},
+            **PLAN,
+        },
+    ).json()
+
+    response = client.put(
+        f"/ingredients/{chicken}",
+        json={"name": "chicken", "kcal_per_100g": 200, "nutrients_per_100g": {"protein_g": 27}},
+    )
+    assert response.headers["X-Replanned-Plans"] == "1"
+    replanned = client.get(f"/dog-plans/{first['id']}").json()
+    assert replanned["result"]["nutrients_total"]["protein_g"] != first["result"]["nutrients_total"]["protein_g"]
+    assert client.get(f"/dog-plans/{second['id']}").json()["computed_at"] == second["computed_at"]
+
+    assert client.put(f"/ingredients/{rice}", json={"name": "rice", "kcal_per_100g": 120}).headers[
+        "X-Replanned-Plans"
+    ] == "1"
+    response = client.put(f"/dogs/{bella}", json={"name": "Bella", **DOG, "weight_kg": 9.0})
+    assert response.headers["X-Replanned-Plans"] == "1"
+    assert client.get(f"/dog-plans/{second['id']}").json()["result"]["target_kcal"] > second["result"]["target_kcal"]
+
+    assert client.delete(f"/recipes/{recipe.json()['id']}").status_code == 409
+    assert client.delete(f"/ingredients/{kibble}").status_code == 409
+    client.delete(f"/dogs/{rex}")
+    assert client.delete(f"/ingredients/{kibble}").status_code == 200
@@ -0,0 +1,44 @@
+import sqlite3
+
+from dog_meal_planner.http_cache import (
+    StaticAssetCache,
+    asset_response_parts,
+    build_asset,
+    catalog_validators,
+    choose_encoding,
+)
+from dog_meal_planner.storage import SCHEMA_PATH
+
+
+def test_choose_encoding_respects_quality():
+    asset = build_asset("app.js", b"const x = 1;" * 100)
+    assert choose_encoding(asset, "gzip, deflate") == "gzip"
+    assert choose_encoding(asset, "gzip;q=0") == "identity"
+    assert choose_encoding(asset, "") == "identity"
+
+
+def test_index_references_fingerprinted_assets(tmp_path):
+    (tmp_path / "index.html").write_text('<script src="/static/app.js"></script>')
+    (tmp_path / "app.js").write_text("console.log(1);")
+    cache = StaticAssetCache(tmp_path)
+    digest = cache.get("app.js").digest
+    html = cache.index().bodies["identity"].decode()
+    assert f'/static/app.js?v={digest}' in html
+
+    status, _, headers = asset_response_parts(cache.get("app.js"), "gzip", None, True)
+    assert status == 200
+    assert "immutable" in headers["Cache-Control"]
+    status, body, _ = asset_response_parts(cache.get("app.js"), "gzip", headers["ETag"], True)
+    assert status == 304 and body == b""
+
+
+def test_catalog_etag_changes_on_write():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+    before = catalog_validators(conn, ["ingredients"])
+    assert catalog_validators(conn, ["ingredients"]) == before
+    conn.execute("INSERT INTO ingredients (name, kcal_per_100g) VALUES ('rice', 130)")
+    after = catalog_validators(conn, ["ingredients"])
+    assert after["ETag"] != before["ETag"]
+    assert catalog_validators(conn, ["plans"])["ETag"] != after["ETag"]
@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from dog_meal_planner import jobs, storage
+
+
+def flaky_job(payload, reporter):
+    reporter.report(1, 2)
+    if payload["calls"].pop() == "fail":
+        raise RuntimeError("transient")
+    return {"ok": True}
+
+
+def wait_for(conn, job_id, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row["status"] in statuses:
+            return row
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} stuck in {row['status']}")
+
+
+def test_runner_retries_then_succeeds(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "jobs.db")
+    storage.init_db()
+    calls = ["ok", "fail"]
+    monkeypatch.setitem(
+        jobs.JOB_KINDS,
+        "flaky",
+        jobs.JobKind("flaky", lambda payload, reporter: flaky_job({"calls": calls}, reporter), "thread", 2, 0),
+    )
+    conn = storage.get_connection()
+    job_id = jobs.submit_job(conn, "flaky", {})
+    conn.commit()
+    runner = jobs.JobRunner(process_workers=1, thread_workers=1)
+    runner.start()
+    try:
+        row = wait_for(conn, job_id, jobs.FINISHED_STATUSES)
+    finally:
+        runner.stop()
+        conn.close()
+    assert row["status"] == "succeeded"
+    assert row["attempts"] == 2
+    assert row["result"] == '{"ok": true}'
+
+
+def test_cancel_queued_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "jobs.db")
+    storage.init_db()
+    conn = storage.get_connection()
+    job_id = jobs.submit_job(conn, "compute_plans", {"plans": []})
+    assert jobs.cancel_job(conn, job_id) == "cancelled"
+    assert jobs.cancel_job(conn, job_id + 1) is None
+    conn.close()
+
+
+def test_expired_lease_fails_last_attempt_and_late_finish_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "jobs.db")
+    storage.init_db()
+    conn = storage.get_connection()
+    hung = jobs.submit_job(conn, "compute_plans", {"plans": []}, max_attempts=1)
+    retried = jobs.submit_job(conn, "compute_plans", {"plans": []}, max_attempts=3)
+    conn.execute(
+        "UPDATE jobs SET status = 'running', attempts = 1, updated_at = datetime('now', '-1 day') WHERE id IN (?, ?)",
+        (hung, retried),
+    )
+    conn.commit()
+    runner = jobs.JobRunner(process_workers=1, thread_workers=1)
+    runner._requeue_expired()
+    statuses = dict(conn.execute("SELECT id, status FROM jobs").fetchall())
+    assert statuses == {hung: "failed", retried: "queued"}
+
+    # The first attempt finishes after the job was claimed again.
+    conn.execute("UPDATE jobs SET status = 'running', attempts = 2 WHERE id = ?", (retried,))
+    conn.commit()
+    late = Future()
+    late.set_result({"stale": True})
+    runner._finish(retried, 1, jobs.JOB_KINDS["compute_plans"], None, late)
+    row = conn.execute("SELECT status, result FROM jobs WHERE id = ?", (retried,)).fetchone()
+    assert (row["status"], row["result"]) == ("running", None)
+    conn.close()
+
+
+def test_failed_submit_returns_claim_to_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "jobs.db")
+    storage.init_db()
+    conn = storage.get_connection()
+    job_id = jobs.submit_job(conn, "usda_import", {"fdc_ids": []})
+    conn.commit()
+    runner = jobs.JobRunner(process_workers=1, thread_workers=1)
+    closed = ThreadPoolExecutor(max_workers=1)
+    closed.shutdown()
+    runner.executors = {"process": closed, "thread": closed, "background": closed}
+    assert runner._dispatch_one() is False
+    row = conn.execute("SELECT status, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    assert (row["status"], row["attempts"]) == ("queued", 0)
+    assert runner.in_flight == {"process": 0, "thread": 0, "background": 0}
+    conn.close()
+
+
+def test_api_keys_are_never_stored_in_job_payloads(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "jobs.db")
+    storage.init_db()
+    conn = storage.get_connection()
+    with pytest.raises(ValueError):
+        jobs.submit_job(conn, "usda_import", {"api_key": "secret", "fdc_ids": [1]})
+    conn.execute("INSERT INTO jobs (kind, payload) VALUES ('usda_import', '{\"api_key\": \"old\", \"fdc_ids\": [1]}')")
+    conn.commit()
+    conn.close()
+    storage.init_db()
+    conn = storage.get_connection()
+    assert [row[0] for row in conn.execute("SELECT payload FROM jobs")] == ['{"fdc_ids":[1]}']
+    conn.close()
@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from dog_meal_planner.measurements import (
+    RAW_RETENTION_DAYS,
+    MeasurementPoint,
+    ingest_measurements,
+    measurement_series,
+    mer_trend,
+)
+from dog_meal_planner.nutrition import compute_rer
+from dog_meal_planner.storage import SCHEMA_PATH
+
+TODAY = date(2026, 6, 30)
+
+
+@pytest.fixture()
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute(
+        "INSERT INTO dogs (id, name, weight_kg, age_years, sex, neutered, activity) "
+        "VALUES (1, 'Rex', 20, 3, 'male', 1, 'moderate')"
+    )
+    yield connection
+    connection.close()
+
+
+def test_rollups_track_upserts_and_survive_downsampling(conn):
+    monday = date(2026, 6, 1)
+    points = [
+        MeasurementPoint(1, monday, 20.0, 900.0),
+        MeasurementPoint(1, monday + timedelta(days=1), 20.4),
+        MeasurementPoint(1, monday + timedelta(days=1), kcal_fed=1000.0),
+        MeasurementPoint(1, monday, 20.2),
+        MeasurementPoint(1, TODAY - timedelta(days=RAW_RETENTION_DAYS + 1), 19.0),
+    ]
+    assert ingest_measurements(conn, points, TODAY) == (4, 1)
+    week = measurement_series(conn, 1, "week", monday)[0]
+    assert week["weight_kg"] == pytest.approx(20.3)
+    assert week["kcal_fed"] == pytest.approx(950.0)
+    assert (week["weight_days"], week["kcal_days"]) == (2, 2)
+
+    later = TODAY + timedelta(days=RAW_RETENTION_DAYS)
+    assert ingest_measurements(conn, [MeasurementPoint(1, later, 21.0)], later) == (1, 0)
+    assert [row["start"] for row in measurement_series(conn, 1, "day", monday)] == [later.isoformat()]
+    month = measurement_series(conn, 1, "month", monday)[0]
+    assert month["start"] == "2026-06-01"
+    assert month["weight_kg"] == pytest.approx(20.3)
+
+
+def test_mer_trend_corrects_for_weight_gain(conn):
+    start = TODAY - timedelta(weeks=8)
+    points = [
+        MeasurementPoint(1, start + timedelta(days=offset), 20.0 + offset * 0.1 / 7, 1000.0)
+        for offset in range(8 * 7 + 1)
+    ]
+    ingest_measurements(conn, points, TODAY)
+    trend = mer_trend(conn, 1, 20.0, 8, TODAY)
+    assert trend["weight_change_kg_per_week"] == pytest.approx(0.1)
+    assert trend["maintenance_kcal"] == pytest.approx(1000.0 - 0.1 / 7 * 7700)
+    current = trend["weeks"][-1]["weight_kg"]
+    assert trend["observed_mer_factor"] == round(trend["maintenance_kcal"] / compute_rer(current), 2)
+    assert trend["suggested_mer_factor"] < trend["observed_mer_factor"]
+    assert mer_trend(conn, 1, None, 8, TODAY + timedelta(weeks=52))["suggested_mer_factor"] is None
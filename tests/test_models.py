@@ -0,0 +1,16 @@
+from dog_meal_planner.models import Nutrients, intern_ingredient
+
+
+def test_intern_ingredient_shares_equal_ingredients():
+    first = intern_ingredient("chicken", 165.0, {"protein_g": 31.0, "fat_g": 3.6})
+    second = intern_ingredient("chicken", 165, {"protein_g": 31, "fat_g": 3.6, "iron_mg": 0})
+    other = intern_ingredient("chicken", 165.0, {"protein_g": 30.0})
+    assert first is second
+    assert other is not first
+    assert first.nutrients_per_100g.protein_g == 31.0
+
+
+def test_nutrients_are_slotted():
+    nutrients = Nutrients(kcal=100.0, zinc_mg=2.0)
+    assert not hasattr(nutrients, "__dict__")
+    assert nutrients.to_dict()["zinc_mg"] == 2.0
@@ -1,8 +1,12 @@
+from dog_meal_planner.aafco import AAFCO_STANDARDS, COMPILED_PROFILES, evaluate_aafco, evaluate_aafco_batch
 from dog_meal_planner.models import Dog, Ingredient, Nutrients, Recipe, RecipeItem
 from dog_meal_planner.nutrition import (
     MER_FACTORS,
+    PlanInput,
     calories_to_grams,
     compute_meal_plan,
+    compute_meal_plans,
+    compute_meal_plans_parallel,
     compute_rer,
     grams_to_calories,
 )
@@ -52,3 +56,76 @@ def test_plan_aggregation():
     )
     assert plan.total_kcal > 0
     assert plan.nutrients_total.protein_g > 0
+
+
+def test_parallel_plans_match_serial_order():
+    kibbles = {"kibble": Ingredient(name="kibble", kcal_per_100g=350.0)}
+    recipes = {
+        "chicken": Recipe(
+            items=[
+                RecipeItem(
+                    ingredient=Ingredient(
+                        name="chicken",
+                        kcal_per_100g=165.0,
+                        nutrients_per_100g=Nutrients(protein_g=31.0, fat_g=3.6),
+                    ),
+                    grams=200.0,
+                )
+            ]
+        )
+    }
+    inputs = [
+        PlanInput(
+            dog=Dog(
+                weight_kg=5.0 + index,
+                target_weight_kg=None,
+                age_years=3.0,
+                sex="female",
+                neutered=True,
+                activity="moderate",
+            ),
+            mer_factor=MER_FACTORS["neutered_adult"],
+            kibble_key="kibble",
+            kibble_grams=50.0,
+            treats_kcal=20.0,
+            recipe_key="chicken",
+        )
+        for index in range(12)
+    ]
+    serial = compute_meal_plans(inputs, kibbles, recipes)
+    parallel = compute_meal_plans_parallel(inputs, kibbles, recipes, workers=2, shard_size=5)
+    assert parallel == serial
+    assert [plan.target_kcal for plan in parallel] == sorted(plan.target_kcal for plan in serial)
+
+
+def test_aafco_checks_maximums_and_ratio():
+    adult = COMPILED_PROFILES["adult_maintenance"]
+    within = Nutrients(
+        kcal=1000.0,
+        protein_g=60.0,
+        fat_g=20.0,
+        calcium_mg=1500.0,
+        phosphorus_mg=1200.0,
+        iron_mg=10.0,
+        zinc_mg=20.0,
+        vitamin_a_iu=2000.0,
+        vitamin_d_iu=200.0,
+        vitamin_e_mg=20.0,
+    )
+    assert evaluate_aafco(within, adult) == {}
+    excess = Nutrients(**{**within.to_dict(), "calcium_mg": 7000.0, "vitamin_d_iu": 900.0})
+    warnings = evaluate_aafco(excess, adult)
+    assert set(warnings) == {"calcium_mg", "vitamin_d_iu", "calcium_phosphorus_ratio"}
+    assert "above maximum" in warnings["calcium_mg"]
+
+    growth = evaluate_aafco_batch([within.to_tuple(), excess.to_tuple()], COMPILED_PROFILES["growth"])
+    assert "fat_g" in growth[0] and "protein_g" not in growth[0]
+    assert "calcium_phosphorus_ratio" in growth[1]
+
+
+def test_evaluate_aafco_accepts_standards_dict_and_reports_nan():
+    nutrients = Nutrients(protein_g=10.0, fat_g=float("nan"))
+    warnings = evaluate_aafco(nutrients, {"protein_g": AAFCO_STANDARDS["protein_g"], "fat_g": AAFCO_STANDARDS["fat_g"]})
+    assert set(warnings) == {"protein_g", "fat_g"}
+    assert "below minimum" in warnings["protein_g"]
+    assert warnings["fat_g"] == "fat is not a number"
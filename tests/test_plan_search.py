@@ -0,0 +1,97 @@
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dog_meal_planner import storage
+from dog_meal_planner.api import app
+
+LEGACY_PLANS = """
+CREATE TABLE plans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+
+def form_payload(weight, unit, mer_factor, total_kcal=None, warnings=None):
+    payload = {"fields": {"dog-weight": weight, "weight-unit": unit, "mer-factor": mer_factor}}
+    if total_kcal is not None:
+        payload["result"] = {"total_kcal": total_kcal, "aafco_warnings": warnings or {}}
+    return payload
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "dogs.db")
+    storage.init_db()
+    return TestClient(app)
+
+
+def test_search_filters_and_sorts_on_generated_columns(client):
+    plans = {
+        "rex": form_payload("31", "kg", "neutered_adult", 1200, {"calcium_mg": ': below "min"', "zinc_mg": "low"}),
+        "bella": form_payload("44", "lb", "weight_loss", 650),
+        "api": {"dog": {"weight_kg": 12.5}, "mer_factor_key": "neutered_adult", "total_kcal": 700, "aafco_warnings": {}},
+        "draft": form_payload("", "kg", "neutered_adult"),
+    }
+    for name, payload in plans.items():
+        assert client.post("/plans", json={"name": name, "payload": payload}).status_code == 200
+
+    rows = client.get("/plans/search", params={"sort": "dog_weight_kg"}).json()
+    assert [row["name"] for row in rows] == ["api", "bella", "rex", "draft"]
+    assert rows[1]["dog_weight_kg"] == pytest.approx(19.958, abs=1e-3)
+    assert rows[2]["aafco_warning_count"] == 2
+    assert rows[3]["total_kcal"] is None
+
+    rows = client.get(
+        "/plans/search",
+        params={"mer_factor_key": "neutered_adult", "min_total_kcal": 500, "max_aafco_warnings": 0},
+    ).json()
+    assert [row["name"] for row in rows] == ["api"]
+    assert [row["name"] for row in client.get("/plans/search", params={"min_aafco_warnings": 1}).json()] == ["rex"]
+
+    assert client.get("/plans/search", params={"sort": "payload"}).status_code == 400
+
+
+def test_init_db_upgrades_legacy_plans_table(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_PLANS)
+        conn.execute(
+            "INSERT INTO plans (name, payload) VALUES (?, ?)",
+            ("old", json.dumps(form_payload("20", "kg", "active", 1500, {"zinc_mg": ":low"}))),
+        )
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    storage.init_db()
+
+    client = TestClient(app)
+    [row] = client.get("/plans/search", params={"max_dog_weight_kg": 25}).json()
+    assert (row["name"], row["mer_factor_key"], row["total_kcal"], row["aafco_warning_count"]) == ("old", "active", 1500, 1)
+    response = client.put(f"/plans/{row['id']}", json={"name": "renamed", "payload": form_payload("30", "kg", "active")})
+    assert response.status_code == 200
+    assert client.get("/plans/search", params={"min_dog_weight_kg": 25}).json()[0]["name"] == "renamed"
+
+
+def test_upgrade_recreates_triggers_and_rolls_back_on_failure(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    conn.executescript(LEGACY_PLANS.replace("NOT NULL UNIQUE", "NOT NULL"))
+    conn.executemany("INSERT INTO plans (name, payload) VALUES (?, '{}')", [("twin",), ("twin",)])
+    conn.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.upgrade_plans_table(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "plans_legacy" not in tables
+    assert "dog_weight_kg" not in {row[1] for row in conn.execute("PRAGMA table_xinfo(plans)")}
+
+    conn.execute("DELETE FROM plans WHERE id = 2")
+    conn.commit()
+    storage.upgrade_plans_table(conn)
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {"plans_version_insert", "plans_change_update", "plans_change_delete"} <= triggers
+    assert conn.execute("SELECT id, name FROM plans").fetchall() == [(1, "twin")]
+    conn.close()
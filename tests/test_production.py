@@ -0,0 +1,92 @@
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dog_meal_planner import storage
+from dog_meal_planner.api import app
+from dog_meal_planner.production import plan_lines, production_rollup, refresh_production_lines
+from dog_meal_planner.storage import SCHEMA_PATH
+
+
+@pytest.fixture()
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute("INSERT INTO ingredients (id, name, kcal_per_100g) VALUES (1, 'chicken', 165)")
+    connection.execute("INSERT INTO ingredients (id, name, kcal_per_100g) VALUES (2, 'rice', 130)")
+    connection.execute("INSERT INTO recipes (id, name) VALUES (1, 'bowl')")
+    connection.execute("INSERT INTO recipe_items (recipe_id, ingredient_id, grams) VALUES (1, 1, 300), (1, 2, 100)")
+    yield connection
+    connection.close()
+
+
+def add_plan(conn, name, payload):
+    conn.execute("INSERT INTO plans (name, payload) VALUES (?, ?)", (name, json.dumps(payload)))
+
+
+def sheet(conn, full=False):
+    refreshed = refresh_production_lines(conn, full=full)
+    rollup = production_rollup(conn)
+    return refreshed, {item["name"]: item for item in rollup["ingredients"]}
+
+
+def test_rollup_combines_recipe_and_inline_plans(conn):
+    add_plan(conn, "rex", {"recipe_id": 1, "meals": ["breakfast", "lunch", "dinner"]})
+    add_plan(
+        conn,
+        "fido",
+        {
+            "fields": {"meals": "breakfast, dinner"},
+            "recipeItems": [
+                {"ingredient": {"name": "Chicken"}, "grams": 0},
+                {"ingredient": {"name": "Pumpkin"}, "grams": 80},
+            ],
+        },
+    )
+    add_plan(conn, "bella", {"recipe": {"items": [{"ingredient_id": 1, "grams": 200}]}})
+    refreshed, items = sheet(conn)
+    assert refreshed == 3
+    assert items["chicken"]["grams_per_day"] == pytest.approx(500)
+    assert items["chicken"]["per_meal_grams"] == pytest.approx({"breakfast": 200, "lunch": 100, "dinner": 200})
+    assert items["chicken"]["plans"] == 2
+    assert items["Pumpkin"]["per_meal_grams"] == pytest.approx({"breakfast": 40, "dinner": 40})
+
+
+def test_incremental_refresh_reads_only_changed_plans(conn):
+    add_plan(conn, "rex", {"recipe_id": 1})
+    add_plan(conn, "bella", {"recipe": {"items": [{"ingredient_id": 2, "grams": 50}]}})
+    assert sheet(conn)[0] == 2
+    assert sheet(conn)[0] == 0
+    conn.execute("DELETE FROM plans WHERE name = 'bella'")
+    conn.execute("UPDATE recipe_items SET grams = 400 WHERE ingredient_id = 1")
+    refreshed, items = sheet(conn)
+    assert refreshed == 1
+    assert items["chicken"]["grams_per_day"] == pytest.approx(400)
+    assert items["rice"]["grams_per_day"] == pytest.approx(100)
+    assert sheet(conn, full=True)[1] == items
+
+
+def test_plan_lines_skip_unusable_items():
+    assert plan_lines(1, "not a plan") == []
+    assert plan_lines(1, {"recipe": {"items": [{"grams": "x"}, {"grams": 10}, None]}}) == []
+    assert plan_lines(1, {"recipe_id": True}) == []
+
+
+def test_get_serves_last_refresh_without_writing(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "dogs.db")
+    storage.init_db()
+    client = TestClient(app)
+    item = {"ingredient": {"name": "pumpkin"}, "grams": 80}
+    assert client.post("/plans", json={"name": "rex", "payload": {"recipeItems": [item]}}).status_code == 200
+
+    sheet = client.get("/production").json()
+    assert (sheet["pending_plans"], sheet["ingredients"]) == (1, [])
+    assert client.post("/production/refresh", params={"mode": "partial"}).status_code == 400
+    assert client.post("/production/refresh").json() == {"mode": "incremental", "refreshed_plans": 1}
+
+    sheet = client.get("/production").json()
+    assert sheet["pending_plans"] == 0
+    assert sheet["ingredients"][0]["grams_per_day"] == pytest.approx(80)
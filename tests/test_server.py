@@ -0,0 +1,54 @@
+import signal
+
+from dog_meal_planner import jobs, server, storage
+
+
+class RecordingProcess:
+    def __init__(self, target, args, daemon):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        pass
+
+    def join(self):
+        pass
+
+    def is_alive(self):
+        return False
+
+
+class RecordingContext:
+    def __init__(self):
+        self.processes = []
+
+    def Process(self, **kwargs):
+        process = RecordingProcess(**kwargs)
+        self.processes.append(process)
+        return process
+
+
+def test_only_the_first_worker_runs_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "dogs.db")
+    monkeypatch.setattr(signal, "signal", lambda signum, handler: None)
+    context = RecordingContext()
+    monkeypatch.setattr(server.multiprocessing, "get_context", lambda method: context)
+    server.serve("127.0.0.1", 0, 3, "warning")
+    assert [process.args[3] for process in context.processes] == [True, False, False]
+
+    enabled = []
+
+    class RecordingServer:
+        def __init__(self, config):
+            pass
+
+        def run(self, sockets):
+            sockets[0].close()
+            enabled.append(jobs.jobs_enabled())
+
+    monkeypatch.setattr(server.uvicorn, "Server", RecordingServer)
+    for process in context.processes:
+        # Workers are spawned, so each starts from the parent's environment.
+        monkeypatch.setenv("DOG_MEAL_PLANNER_JOBS", "1")
+        process.target(*process.args)
+    assert enabled == [True, False, False]
@@ -0,0 +1,21 @@
+import sqlite3
+
+from dog_meal_planner import storage
+
+
+def test_write_session_takes_immediate_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "lock.db")
+    storage.init_db()
+    session = storage.db_write_session()
+    conn = next(session)
+    assert conn.in_transaction
+    other = sqlite3.connect(storage.DB_PATH, timeout=0)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+    except sqlite3.OperationalError as exc:
+        assert "locked" in str(exc)
+    else:
+        raise AssertionError("second writer acquired the lock")
+    finally:
+        other.close()
+    session.close()
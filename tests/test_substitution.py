@@ -0,0 +1,78 @@
+import random
+import sqlite3
+
+import pytest
+
+from dog_meal_planner.models import Ingredient, Nutrients, RecipeItem
+from dog_meal_planner.storage import SCHEMA_PATH
+from dog_meal_planner.substitution import (
+    KDTree,
+    SubstitutionIndex,
+    aafco_delta,
+    substitute_in_recipe,
+    weighted_distance,
+)
+
+
+def test_kd_tree_matches_brute_force():
+    rng = random.Random(5)
+    points = [tuple(rng.choice((0.0, rng.random())) for _ in range(4)) for _ in range(500)]
+    ids = list(range(500))
+    tree = KDTree(ids, points, leaf_size=4)
+    weights = (1.0, 3.0, 0.5, 0.0)
+    skip = {3, 7, 11}
+    for _ in range(20):
+        query = tuple(rng.random() for _ in range(4))
+        expected = sorted(
+            (weighted_distance(point, query, weights), ident)
+            for ident, point in zip(ids, points)
+            if ident not in skip
+        )[:5]
+        assert [ident for _, ident in tree.nearest(query, 5, weights, skip)] == [
+            ident for _, ident in expected
+        ]
+
+
+@pytest.fixture()
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.executemany(
+        "INSERT INTO ingredients (id, name, kcal_per_100g, protein_g, calcium_mg) VALUES (?, ?, ?, ?, ?)",
+        [(1, "chicken", 165, 31, 15), (2, "turkey", 190, 29, 20), (3, "eggshell", 100, 0, 3000)],
+    )
+    yield connection
+    connection.close()
+
+
+def nearest_ids(index, conn, ingredient_id):
+    index.sync(conn)
+    return [ident for _, ident in index.nearest(index.vector(ingredient_id), 2, exclude={ingredient_id})]
+
+
+def test_index_applies_changes_incrementally(conn):
+    index = SubstitutionIndex()
+    assert nearest_ids(index, conn, 1) == [2, 3]
+    conn.execute(
+        "INSERT INTO ingredients (id, name, kcal_per_100g, protein_g, calcium_mg) VALUES (4, 'duck', 165, 31, 16)"
+    )
+    conn.execute("UPDATE ingredients SET calcium_mg = 20 WHERE id = 3")
+    assert nearest_ids(index, conn, 1) == [4, 2]
+    conn.execute("DELETE FROM ingredients WHERE id = 4")
+    conn.execute("UPDATE ingredients SET kcal_per_100g = 0 WHERE id = 2")
+    assert nearest_ids(index, conn, 1) == [3]
+    assert len(index) == 2
+
+
+def test_substitute_in_recipe_keeps_calories():
+    chicken = Ingredient("chicken", 165, Nutrients(protein_g=31))
+    rice = Ingredient("rice", 130, Nutrients(carbs_g=28))
+    turkey = Ingredient("turkey", 110, Nutrients(protein_g=24))
+    items = [(1, RecipeItem(chicken, 200)), (2, RecipeItem(rice, 100))]
+    recipe, grams = substitute_in_recipe(items, 1, turkey)
+    assert grams == pytest.approx(300)
+    assert recipe.total_nutrients().kcal == pytest.approx(330 + 130)
+    assert aafco_delta({"fat_g": "low", "zinc_mg": "low"}, {"zinc_mg": "low", "iron_mg": "low"}) == {
+        "added": {"iron_mg": "low"},
+        "resolved": ["fat_g"],
+    }
@@ -0,0 +1,73 @@
+import http.client
+import json
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dog_meal_planner.traffic import TrafficRecorder, load_traffic, redact, redact_query
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+import replay_traffic  # noqa: E402
+
+
+def test_redact_strips_nested_keys():
+    payload = {"api_key": "secret", "fdc_id": 1, "items": [{"api_key": "x", "grams": 5}]}
+    cleaned, removed = redact(payload)
+    assert cleaned == {"fdc_id": 1, "items": [{"grams": 5}]}
+    assert removed == {"api_key", "items.0.api_key"}
+    assert redact_query("api_key=secret&limit=5") == ("limit=5", ["api_key"])
+
+
+def test_recorder_writes_rotating_sanitized_logs(tmp_path):
+    app = FastAPI()
+
+    @app.post("/echo/{item_id}")
+    async def echo(item_id: int, payload: dict) -> dict:
+        return payload
+
+    app.add_middleware(TrafficRecorder, directory=tmp_path, max_bytes=400, backup_count=2)
+    with TestClient(app) as client:
+        for index in range(5):
+            response = client.post(f"/echo/{index}?api_key=q", json={"api_key": "secret", "grams": index})
+            assert response.json() == {"api_key": "secret", "grams": index}
+
+    assert len(list(tmp_path.iterdir())) == 3
+    records = load_traffic([tmp_path])
+    assert [record["body"] for record in records] == [{"grams": index} for index in range(2, 5)]
+    assert records[-1]["route"] == "/echo/{item_id}"
+    assert records[-1]["redacted"] == ["api_key", "?api_key"]
+    assert "secret" not in "".join(path.read_text() for path in tmp_path.iterdir())
+
+
+def test_replayed_usda_import_jobs_reach_the_stub(monkeypatch):
+    monkeypatch.delenv("DOG_MEAL_PLANNER_USDA_API_KEY", raising=False)
+    monkeypatch.delenv("DOG_MEAL_PLANNER_JOBS", raising=False)
+    record = {
+        "ts": 0.0,
+        "method": "POST",
+        "path": "/jobs",
+        "content_type": "application/json",
+        "body": {"kind": "usda_import", "payload": {"fdc_ids": [42], "save": False}},
+    }
+    with replay_traffic.usda_stub() as usda_url, replay_traffic.serve(None, usda_url, 1) as port:
+        samples, _ = replay_traffic.replay(port, [record], None, 1)
+        assert samples[0][2] == 202
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        deadline = time.monotonic() + 30
+        while True:
+            conn.request("GET", "/jobs/1")
+            job = json.loads(conn.getresponse().read())
+            if job["status"] in ("succeeded", "failed", "cancelled"):
+                break
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        assert (job["status"], job["error"]) == ("succeeded", None)
+        conn.request("GET", "/jobs/1/result")
+        body = json.loads(conn.getresponse().read())
+        conn.close()
+    assert body["errors"] == {}
+    assert [item["name"] for item in body["imported"]] == ["stub food 42"]